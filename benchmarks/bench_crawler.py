@@ -0,0 +1,69 @@
+"""对比旧的顺序抓取（requests.get + time.sleep）与 crawler.Crawler 的抓取速度。
+
+在本地 FixtureServer 上运行，不访问外网：
+    python benchmarks/bench_crawler.py [页数] [延迟秒] [请求间隔秒]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+from bs4 import BeautifulSoup
+
+from crawler import Crawler
+from fixture_server import FixtureServer
+from bench_extract import _extract_quotes_from_soup, _find_next_url
+
+
+def sequential(start_url, delay):
+    """旧实现：抓取 → 解析 → 固定 sleep，逐页串行。"""
+    pages, quotes = 0, 0
+    next_url, visited = start_url, set()
+    while next_url and next_url not in visited:
+        visited.add(next_url)
+        resp = requests.get(next_url, timeout=15)
+        if resp.status_code != 200:
+            break
+        soup = BeautifulSoup(resp.text, "html.parser")
+        quotes += len(_extract_quotes_from_soup(soup))
+        pages += 1
+        next_url = _find_next_url(soup, next_url)
+        time.sleep(delay)
+    return pages, quotes
+
+
+def pipelined(start_url, delay):
+    counts = {"pages": 0, "quotes": 0}
+
+    def parse_page(url, html):
+        soup = BeautifulSoup(html, "html.parser")
+        nxt = _find_next_url(soup, url)
+        return _extract_quotes_from_soup(soup), [nxt] if nxt else []
+
+    def handle_items(url, items):
+        counts["pages"] += 1
+        counts["quotes"] += len(items)
+
+    Crawler(concurrency=4, rate_per_host=1 / delay, max_pages=10_000).crawl(start_url, parse_page, handle_items)
+    return counts["pages"], counts["quotes"]
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    delay = float(sys.argv[3]) if len(sys.argv) > 3 else 0.1
+
+    with FixtureServer(pages=pages, latency=latency) as server:
+        start_url = f"{server.base_url}/short-quotes/1"
+        for name, fn in (("sequential + sleep", sequential), ("Crawler pipeline", pipelined)):
+            t0 = time.perf_counter()
+            n_pages, n_quotes = fn(start_url, delay)
+            elapsed = time.perf_counter() - t0
+            print(f"{name:20s} {n_pages:4d} pages {n_quotes:5d} quotes "
+                  f"{elapsed:6.2f}s  {n_pages / elapsed:6.1f} pages/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""各编码 profile 的编码耗时与体积，以及多 profile 串行 / 并行编码的对比。
+
+在仓库根目录运行：python benchmarks/bench_encoding.py [重复次数]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from encoding import PROFILES, encode, encode_variants
+from generator import QuoteGenerator
+
+
+def canvas():
+    return QuoteGenerator(verbose=False).render_canvas("2025.08.11", "Steve Jobs", "Stay hungry, stay foolish")
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    image = canvas()
+    print(f"canvas {image.width}x{image.height}")
+    for name, profile in PROFILES.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            data = encode(image, profile)
+        ms = (time.perf_counter() - start) / repeat * 1000
+        extra = f" (<= {profile.max_bytes // 1024} KB)" if profile.max_bytes else ""
+        print(f"{name:14s} {ms:8.1f} ms  {len(data) / 1024:8.1f} KB{extra}")
+
+    names = list(PROFILES)
+    for parallel in (False, True):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            encode_variants(image, names, parallel=parallel)
+        ms = (time.perf_counter() - start) / repeat * 1000
+        print(f"all {len(names)} profiles, {'parallel' if parallel else 'serial':8s} {ms:8.1f} ms per canvas")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""对比页面抽取速度：旧的多次全树查找 vs extract.py 的单次遍历（html.parser / lxml）。
+
+在 fixtures/ 下保存的页面上运行，同时检查各实现的抽取结果是否一致：
+    python benchmarks/bench_extract.py [每个页面的重复次数]
+"""
+import os
+import re
+import sys
+import time
+from urllib.parse import urljoin
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from extract import available_backends, clean_quotes, extract_page
+from fixture_server import load_fixture
+
+FIXTURES = ["quotes_toscrape_page.html", "goodreads_page.html", "blockquote_page.html"]
+BASE_URL = "http://fixtures.local/page/1/"
+
+
+# ---------- 旧实现：多次全树查找（main.py 改用 extract.extract_page 之前），作为速度与结果的对照 ----------
+def _extract_quotes_from_soup(soup):
+    extracted = []
+
+    # .quote 结构
+    for q in soup.select(".quote"):
+        t = q.select_one(".text")
+        a = q.select_one(".author")
+        if t and a:
+            text = " ".join(t.stripped_strings).strip('“”"')
+            author = " ".join(a.stripped_strings)
+            if text:
+                extracted.append((author, text))
+
+    # blockquote + cite / 或 “— Author”
+    for bq in soup.find_all("blockquote"):
+        text = " ".join(bq.stripped_strings)
+        if not text:
+            continue
+        author = None
+        cite = bq.find("cite")
+        if cite:
+            author = " ".join(cite.stripped_strings)
+        if not author:
+            m = re.search(r"[—\-–]\s*([^—\-–]{2,})$", text)
+            if m:
+                author = m.group(1).strip()
+                text = text[:m.start()].strip()
+        if text:
+            extracted.append((author or "Unknown", text.strip('“”"')))
+
+    # Goodreads 风格 .quoteText
+    for div in soup.select(".quoteText"):
+        full = " ".join(div.stripped_strings)
+        m = re.match(r"[“\"](.+?)[”\"]\s*[―\-–]\s*(.+)$", full)
+        if m:
+            text = m.group(1).strip()
+            author = m.group(2).strip()
+            extracted.append((author, text))
+
+    return clean_quotes(extracted)
+
+
+def _find_next_url(soup, base_url):
+    # 1) <link rel="next" href="...">
+    link = soup.find("link", attrs={"rel": re.compile(r"\bnext\b", re.I)})
+    if link and link.get("href"):
+        return urljoin(base_url, link["href"])
+
+    # 2) <a rel="next">、class 含 next
+    a = soup.find("a", attrs={"rel": re.compile(r"\bnext\b", re.I)})
+    if a and a.get("href"):
+        return urljoin(base_url, a["href"])
+    a = soup.find("a", class_=re.compile("next", re.I))
+    if a and a.get("href"):
+        return urljoin(base_url, a["href"])
+
+    # 3) 文本是“next / 下一页 / › / »”
+    a = soup.find("a", string=re.compile(r"^\s*(next|下一页|›|»)\s*$", re.I))
+    if a and a.get("href"):
+        return urljoin(base_url, a["href"])
+
+    # 4) 常见分页 li.next > a
+    li = soup.find("li", class_=re.compile("next", re.I))
+    if li:
+        a = li.find("a")
+        if a and a.get("href"):
+            return urljoin(base_url, a["href"])
+
+    return None
+
+
+def legacy(html, base_url):
+    soup = BeautifulSoup(html, "html.parser")
+    return _extract_quotes_from_soup(soup), _find_next_url(soup, base_url)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    pages = [load_fixture(name) for name in FIXTURES]
+
+    impls = [("legacy soup (multi-pass)", legacy)]
+    for backend in available_backends():
+        impls.append((f"single pass ({backend})", lambda html, url, b=backend: extract_page(html, url, b)))
+
+    expected = [legacy(html, BASE_URL) for html in pages]
+    for name, fn in impls:
+        for html, want, fixture in zip(pages, expected, FIXTURES):
+            got = fn(html, BASE_URL)
+            if got != want:
+                print(f"⚠️ {name} differs on {fixture}: {got} != {want}")
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for html in pages:
+                fn(html, BASE_URL)
+        elapsed = time.perf_counter() - start
+        print(f"{name:30s} {repeat * len(pages) / elapsed:8.0f} pages/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""对比逐张 generate()、generate_many() 与内存中 render() 的出图速度（images/sec）。
+
+在仓库根目录运行：python benchmarks/bench_generator.py [数量]
+"""
+import os
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generator
+from generator import QuoteGenerator
+
+
+def _records(n):
+    return [(f"2025.{i % 12 + 1:02d}.{i % 28 + 1:02d}", f"Author {i}", f"Stay hungry, stay foolish #{i}")
+            for i in range(n)]
+
+
+def bench_per_call(gen, records):
+    """模拟旧路径：每张图都重新解码背景并重新加载字体。"""
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for date, author, quote in records:
+            generator.clear_caches()
+            gen.generate(date, author, quote)
+    return len(records) / (time.perf_counter() - start)
+
+
+def bench_batch(gen, records):
+    generator.clear_caches()
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        gen.generate_many(records)
+    return len(records) / (time.perf_counter() - start)
+
+
+def bench_render(gen, records):
+    """render()：只在内存中绘制 + 编码，不写文件；同时统计绘制与编码各自的耗时。"""
+    draw = encode = 0.0
+    start = time.perf_counter()
+    for date, author, quote in records:
+        result = gen.render(date, author, quote)
+        draw += result.draw_seconds
+        encode += result.encode_seconds
+    elapsed = time.perf_counter() - start
+    return len(records) / elapsed, draw / len(records) * 1000, encode / len(records) * 1000
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    records = _records(n)
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+            gen = QuoteGenerator(output_folder=tmp)
+        per_call = bench_per_call(gen, records)
+        batch = bench_batch(gen, records)
+        in_memory, draw_ms, encode_ms = bench_render(gen, records)
+
+    print(f"images: {n}")
+    print(f"per-call generate(): {per_call:8.1f} images/sec")
+    print(f"generate_many():     {batch:8.1f} images/sec  ({batch / per_call:.2f}x)")
+    print(f"render() in memory:  {in_memory:8.1f} images/sec  (draw {draw_ms:.1f} ms + encode {encode_ms:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""HTTP 缓存效果：同一站点连续抓取三次（冷启动 / 无变化 / 部分页面更新）。
+
+在本地 FixtureServer 上运行，不访问外网：
+    python benchmarks/bench_http_cache.py [页数] [更新页数]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from crawler import Crawler
+from fixture_server import FixtureServer
+from http_cache import HttpCache
+from bench_extract import _extract_quotes_from_soup, _find_next_url
+
+
+def crawl(start_url, cache):
+    counts = {"parsed": 0}
+
+    def parse_page(url, html):
+        counts["parsed"] += 1
+        soup = BeautifulSoup(html, "html.parser")
+        nxt = _find_next_url(soup, url)
+        return _extract_quotes_from_soup(soup), [nxt] if nxt else []
+
+    crawler = Crawler(concurrency=4, rate_per_host=1000, max_pages=10_000, cache=cache)
+    crawler.crawl(start_url, parse_page, lambda url, items: None)
+    return counts["parsed"]
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    changed = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    with tempfile.TemporaryDirectory() as tmp, FixtureServer(pages=pages) as server:
+        cache = HttpCache(os.path.join(tmp, "http_cache.sqlite"))
+        start_url = f"{server.base_url}/short-quotes/1"
+        for name in ("cold", "unchanged", f"{changed} pages updated"):
+            if name.endswith("updated"):
+                server.changed.update(range(pages - changed + 1, pages + 1))
+            requests_before, bytes_before, hits_before = server.requests, server.bytes_sent, cache.hits
+            t0 = time.perf_counter()
+            parsed = crawl(start_url, cache)
+            elapsed = time.perf_counter() - t0
+            print(f"{name:18s} {server.requests - requests_before:4d} requests "
+                  f"{(server.bytes_sent - bytes_before) / 1024:8.1f} KB sent "
+                  f"{cache.hits - hits_before:4d} x 304 {parsed:4d} pages parsed {elapsed:6.2f}s")
+        print(cache)
+        cache.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""对比逐行 add_quotes()（每行 commit）与 QuoteWriter 批量事务写入的 inserts/sec。
+
+    python benchmarks/bench_inserts.py [行数 ...]
+
+默认测 10k 与 1M 行；逐行提交在大表上极慢，只在 ≤ PER_ROW_LIMIT 行时运行。
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import QuoteWriter, add_quotes, get_connection, initialize_database
+
+PER_ROW_LIMIT = 10_000
+
+
+def _rows(n):
+    for i in range(n):
+        yield "2025.01.01", f"Author {i % 997}", f"Quote number {i}"
+
+
+def bench_per_row(db_path, n):
+    """旧路径：默认 rollback journal，每行一次 commit。"""
+    initialize_database(db_path)
+    conn = sqlite3.connect(db_path)
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for date, author, quote in _rows(n):
+            add_quotes(conn, date, author, quote)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return n / elapsed
+
+
+def bench_writer(db_path, n, batch_size=5000):
+    conn = get_connection(db_path)
+    start = time.perf_counter()
+    with QuoteWriter(conn, batch_size=batch_size) as writer:
+        for date, author, quote in _rows(n):
+            writer.add(date, author, quote)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return n / elapsed
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 1_000_000]
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            if n <= PER_ROW_LIMIT:
+                rate = bench_per_row(os.path.join(tmp, "per_row.db"), n)
+                print(f"{n:>9,} rows  add_quotes() per-row commit: {rate:>10,.0f} inserts/sec")
+            rate = bench_writer(os.path.join(tmp, "batched.db"), n)
+            print(f"{n:>9,} rows  QuoteWriter (WAL, executemany): {rate:>9,.0f} inserts/sec")
+
+
+if __name__ == "__main__":
+    main()
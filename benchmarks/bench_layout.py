@@ -0,0 +1,65 @@
+"""排版耗时占比：批量渲染 quotes.db 中的语录，统计 LayoutEngine 占整张图渲染时间的比例，
+并与旧的 textwrap.wrap(width=30) + textbbox 测量做对比。
+
+    python benchmarks/bench_layout.py [数量]
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+from textwrap import wrap
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw
+
+import generator
+from generator import QuoteGenerator
+
+
+def load_quotes(n):
+    conn = sqlite3.connect("quotes.db")
+    rows = conn.execute("SELECT author, quote FROM quotes ORDER BY id LIMIT ?", (n,)).fetchall()
+    conn.close()
+    return [("2025.01.01", author, quote) for author, quote in rows]
+
+
+def old_measure(quotes, font):
+    draw = ImageDraw.Draw(Image.new("RGB", (1, 1)))
+    start = time.perf_counter()
+    for q in quotes:
+        draw.textbbox((0, 0), "\n".join(wrap(q, width=30)), font=font)
+    return time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    records = load_quotes(n)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        gen = QuoteGenerator(output_folder=tmp, verbose=False)
+        generator.clear_caches()
+        start = time.perf_counter()
+        gen.generate_many(records)
+        total = time.perf_counter() - start
+        stats = gen.layout_stats()
+
+        # 第二轮：字宽表与排版结果均已缓存
+        width = generator._get_background(gen.background_image).width
+        start = time.perf_counter()
+        for _, _, q in records:
+            gen.layout_quote(q, width)
+        warm = time.perf_counter() - start
+
+    quote_font = gen._load_fonts()[0]
+    old = old_measure([q for _, _, q in records], quote_font)
+
+    print(f"images: {len(records)}, total render {total:.2f}s")
+    print(f"layout (cold): {stats.seconds * 1000:8.1f} ms  = {stats.seconds / total:.1%} of render time")
+    print(f"layout (memoized): {warm * 1000:8.3f} ms")
+    print(f"old wrap+textbbox: {old * 1000:8.1f} ms (no font fitting)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""近似重复检测（neardup.py）的召回率、误报与吞吐量。
+
+标注数据有两份：fixtures/near_duplicates.json 是完整的名人名言，near_duplicates_short.json
+是不超过 25 个字符的语录（与 quotes.db 的长度限制一致）。每组一条原文及其变体（弯引号、
+结尾署名、去标点、大小写与空白、首尾省略号截断），另有若干对相似但不同的语录（不应判为重复；
+短语录的这些对带作者，包括同一句话署了不同作者的）。
+原文与 N 条干扰语录一起建索引，然后按作者逐条查询变体；短语录另外扫一遍 SHORT_THRESHOLD：
+    python benchmarks/bench_neardup.py [干扰语录条数 ...]
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fixture_server import FIXTURES_DIR
+from neardup import SHORT_THRESHOLD, NearDupIndex
+from utils import INSERT_QUOTE_SQL, content_hash, get_connection
+
+WORDS = ("love life hope stay hungry foolish dream light dark heart mind time truth peace world "
+         "smile brave quiet storm river home road star fire never always every people know think "
+         "only little great best make find give nothing something beautiful").split()
+
+
+FIXTURES = ("near_duplicates.json", "near_duplicates_short.json")
+SWEEP = (0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1.0)
+
+
+def load_labels(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def distinct_pairs(labels):
+    """[(作者或 None, 已入库的语录), (作者或 None, 查询的语录)]；长语录的对不带作者。"""
+    pairs = []
+    for first, second in labels["distinct"]:
+        if isinstance(first, str):
+            pairs.append(((None, first), (None, second)))
+        else:
+            pairs.append(((first["author"], first["quote"]), (second["author"], second["quote"])))
+    return pairs
+
+
+def build_db(path, labels, distractors):
+    rng = random.Random(0)
+    rows = [("2025.01.01", g["author"], g["quote"], content_hash(g["author"], g["quote"])) for g in labels["groups"]]
+    rows += [("2025.01.01", author or "Anonymous", quote, content_hash(author or "Anonymous", quote))
+             for (author, quote), _ in distinct_pairs(labels)]
+    for i in range(distractors):
+        quote = " ".join(rng.choices(WORDS, k=rng.randint(5, 14))).capitalize() + "."
+        rows.append(("2025.01.01", f"Author {i % 997}", quote, content_hash(f"Author {i % 997}", quote)))
+    conn = get_connection(path)
+    # 长语录的标注数据超过 25 字符的长度限制；临时库里去掉长度触发器
+    conn.execute("DROP TRIGGER trg_quotes_len_ins")
+    with conn:
+        conn.executemany(INSERT_QUOTE_SQL, rows)
+    return conn
+
+
+def evaluate(index, labels):
+    """返回 ({变体类型: 命中数}, {变体类型: 总数}, 误报数, 查询次数)。"""
+    hits, totals = Counter(), Counter()
+    for group in labels["groups"]:
+        want = content_hash(group["author"], group["quote"])
+        for v in group["variants"]:
+            totals[v["kind"]] += 1
+            if want in {h for h, _ in index.find(v["quote"], author=group["author"])}:
+                hits[v["kind"]] += 1
+    pairs = distinct_pairs(labels)
+    false_positives = sum(bool(index.find(quote, author=author)) for _, (author, quote) in pairs)
+    return hits, totals, false_positives, sum(totals.values()) + len(pairs)
+
+
+def sweep(labels, distractors):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_db(os.path.join(tmp, "bench.db"), labels, distractors)
+        NearDupIndex(conn).index_missing()
+        print(f"\n  short threshold sweep (default {SHORT_THRESHOLD}):")
+        for t in SWEEP:
+            hits, totals, false_positives, _ = evaluate(NearDupIndex(conn, short_threshold=t), labels)
+            print(f"    {t:.2f}: recall {sum(hits.values()) / sum(totals.values()):6.1%}  "
+                  f"false positives {false_positives}/{len(labels['distinct'])}")
+        conn.close()
+
+
+def run(name, labels, distractors):
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_db(os.path.join(tmp, "bench.db"), labels, distractors)
+        index = NearDupIndex(conn)
+        start = time.perf_counter()
+        indexed = index.index_missing()
+        index_rate = indexed / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        hits, totals, false_positives, queries = evaluate(index, labels)
+        query_rate = queries / (time.perf_counter() - start)
+        conn.close()
+
+    exact = sum(content_hash(g["author"], v["quote"]) == content_hash(g["author"], g["quote"])
+                for g in labels["groups"] for v in g["variants"])
+    variants = sum(totals.values())
+    print(f"\n{name}: {indexed:,} indexed quotes ({distractors:,} distractors): "
+          f"index {index_rate:,.0f} quotes/sec, query {query_rate:,.0f} checks/sec")
+    print(f"  recall {sum(hits.values()) / variants:6.1%}  ({sum(hits.values())}/{variants} variants; "
+          f"exact content_hash finds {exact / variants:.1%})")
+    for kind in totals:
+        print(f"    {kind:18s} {hits[kind]:3d}/{totals[kind]}")
+    print(f"  false positives on distinct pairs: {false_positives}/{len(labels['distinct'])}")
+
+
+def main():
+    for n in [int(a) for a in sys.argv[1:]] or [1_000, 100_000]:
+        for name in FIXTURES:
+            labels = load_labels(name)
+            run(name, labels, n)
+            if name == "near_duplicates_short.json":
+                sweep(labels, n)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""排版预检（render_fit.py）与真正出图的速度对比。
+
+用 quotes.db 中的真实语录（长度分布与线上一致）加编号生成 N 条不重复的语录，
+整表预检一遍，再抽样真正绘制画布（不编码）作对比：
+    python benchmarks/bench_render_fit.py [行数]        默认 200,000
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generator
+from render_fit import FitChecker, precheck, summary
+from utils import INSERT_QUOTE_SQL, content_hash, get_connection
+
+DRAW_SAMPLE = 300
+
+
+def load_quotes():
+    conn = sqlite3.connect("quotes.db")
+    rows = conn.execute("SELECT author, quote FROM quotes ORDER BY id").fetchall()
+    conn.close()
+    return rows
+
+
+def build_db(path, source, rows):
+    conn = get_connection(path)
+    # 源数据是完整的名人名言，超过 25 字符的长度限制；也不需要全文索引
+    conn.execute("DROP TRIGGER trg_quotes_len_ins")
+    conn.execute("DROP TRIGGER trg_quotes_fts_ins")
+    batch = []
+    for i in range(rows):
+        author, quote = source[i % len(source)]
+        quote = f"{quote} #{i}"
+        batch.append(("2025.01.01", author, quote, content_hash(author, quote)))
+    with conn:
+        conn.executemany(INSERT_QUOTE_SQL, batch)
+    return conn
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    source = load_quotes()
+    with tempfile.TemporaryDirectory() as tmp:
+        conn = build_db(os.path.join(tmp, "bench.db"), source, rows)
+        checker = FitChecker()
+
+        generator.clear_caches()
+        start = time.perf_counter()
+        checked, overflow = precheck(conn, checker)
+        elapsed = time.perf_counter() - start
+        print(f"precheck: {checked:,} rows in {elapsed:.2f}s ({checked / elapsed:,.0f} rows/sec), "
+              f"{overflow:,} do not fit ({overflow / checked:.1%})")
+        for size, (ok, bad) in sorted(summary(conn, checker.layout_key).items(), reverse=True):
+            print(f"  {size}px: {ok:,} fit" + (f", {bad:,} overflow" if bad else ""))
+
+        start = time.perf_counter()
+        again, _ = precheck(conn, checker)
+        print(f"re-run (nothing pending): {again} rows in {time.perf_counter() - start:.2f}s")
+
+        sample = conn.execute("SELECT quote_date, author, quote FROM quotes ORDER BY id LIMIT ?",
+                              (DRAW_SAMPLE,)).fetchall()
+        conn.close()
+
+    gen = checker.gen
+    generator.clear_caches()
+    gen.render_canvas(*sample[0])
+    start = time.perf_counter()
+    for record in sample:
+        gen.render_canvas(*record)
+    elapsed = time.perf_counter() - start
+    print(f"draw canvas (no encode): {len(sample)} rows in {elapsed:.2f}s ({len(sample) / elapsed:,.0f} rows/sec)")
+
+
+if __name__ == "__main__":
+    main()
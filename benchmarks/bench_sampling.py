@@ -0,0 +1,54 @@
+"""对比 ORDER BY RANDOM() LIMIT 5 与 utils.sample_quotes() 在不同表大小下的“换一批”耗时。
+
+    python benchmarks/bench_sampling.py [行数 ...]
+
+每张表删除约 1/7 的行制造 id 空洞，模拟真实库的删除痕迹。
+"""
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import CREATE_TABLE_QUERY, sample_quotes
+
+REPEAT = 20
+
+
+def build_db(path, n):
+    conn = sqlite3.connect(path)
+    conn.executescript(CREATE_TABLE_QUERY)
+    with conn:
+        conn.executemany(
+            "INSERT INTO quotes (quote_date, author, quote) VALUES (?, ?, ?)",
+            (("2025.01.01", f"Author {i % 997}", f"Quote number {i}") for i in range(n)),
+        )
+        conn.execute("DELETE FROM quotes WHERE id % 7 = 0")
+    return conn
+
+
+def timed(fn):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        rows = fn()
+        assert len(rows) == 5
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    print(f"{'rows':>10}  {'ORDER BY RANDOM()':>18}  {'sample_quotes()':>16}")
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            conn = build_db(os.path.join(tmp, "bench.db"), n)
+            order_by = timed(lambda: conn.execute(
+                "SELECT id, author, quote FROM quotes ORDER BY RANDOM() LIMIT 5").fetchall())
+            sampled = timed(lambda: sample_quotes(conn, 5))
+            conn.close()
+        print(f"{n:>10,}  {order_by:>15.2f} ms  {sampled:>13.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
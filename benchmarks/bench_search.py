@@ -0,0 +1,92 @@
+"""对比 LIKE '%词%' 全表扫描与 quotes_fts 全文索引（utils.search_quotes，BM25 排序）的查询延迟。
+
+    python benchmarks/bench_search.py [行数 ...]
+
+语录由 Zipf 分布的合成词表随机拼成（≤25 字符），作者 5000 个；建库时走迁移，FTS 索引由触发器同步。
+LIKE 无法按相关度排序，基线是扫出全部匹配行；FTS 返回 BM25 排序后的前 10 条。
+"""
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import INSERT_QUOTE_SQL, content_hash, get_connection, search_quotes
+
+REPEAT = 20
+VOCAB_SIZE = 20_000
+AUTHORS = 5_000
+
+
+def _word(i):
+    """第 i 个合成词（音节拼接，互不相同）。"""
+    syllables = ["ka", "lo", "mi", "ne", "ru", "sa", "to", "vi", "da", "pe", "qu", "zo", "ha", "ji", "fu", "be"]
+    out = ""
+    while True:
+        out += syllables[i % 16]
+        i //= 16
+        if not i:
+            return out
+
+
+def build_db(path, n):
+    """词频按 Zipf 分布：少数常见词出现在大量语录里，大多数词很少见。"""
+    rng = random.Random(0)
+    vocab = [_word(i) for i in range(VOCAB_SIZE)]
+    cum_weights = list(itertools.accumulate(1 / (rank + 1) for rank in range(VOCAB_SIZE)))
+    authors = [f"{_word(i + VOCAB_SIZE).title()} {_word(i * 7 + 3).title()}" for i in range(AUTHORS)]
+    conn = get_connection(path)
+    rows = []
+    for i in range(n):
+        quote = " ".join(rng.choices(vocab, cum_weights=cum_weights, k=4))[:25]
+        author = authors[i % AUTHORS]
+        rows.append(("2025.01.01", author, quote, content_hash(author, f"{quote} {i}")))
+    with conn:
+        conn.executemany(INSERT_QUOTE_SQL, rows)
+    return conn, vocab, authors
+
+
+def queries(vocab, authors):
+    """(说明, search_quotes 的查询, 等价的 LIKE 条件与参数)；LIKE 不能排序，只能扫出全部匹配。"""
+    common, mid, rare = vocab[5], vocab[300], vocab[5000]
+    author = authors[42].split()[0]
+    return [
+        ("common word", common, "quote LIKE ?", (f"%{common}%",)),
+        ("mid word", mid, "quote LIKE ?", (f"%{mid}%",)),
+        ("rare word", rare, "quote LIKE ?", (f"%{rare}%",)),
+        ("prefix", rare[:-1], "quote LIKE ?", (f"%{rare[:-1]}%",)),
+        ("two words", f"{common} {mid}", "quote LIKE ? AND quote LIKE ?", (f"%{common}%", f"%{mid}%")),
+        ("author", f"author:{author}", "author LIKE ?", (f"%{author}%",)),
+    ]
+
+
+def timed(fn):
+    fn()
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / REPEAT * 1000
+
+
+def main():
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for n in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            start = time.perf_counter()
+            conn, vocab, authors = build_db(os.path.join(tmp, "bench.db"), n)
+            print(f"\n{n:,} rows (built with FTS triggers in {time.perf_counter() - start:.1f}s)")
+            print(f"{'query':>12}  {'matches':>8}  {'LIKE scan':>12}  {'FTS5 top 10':>12}")
+            for name, text, where, args in queries(vocab, authors):
+                matched = []
+                like = timed(lambda: matched.append(len(conn.execute(
+                    f"SELECT id, quote_date, author, quote FROM quotes WHERE {where}", args).fetchall())))
+                fts = timed(lambda: search_quotes(conn, text, limit=10))
+                print(f"{name:>12}  {matched[-1]:>8,}  {like:>9.2f} ms  {fts:>9.2f} ms")
+            conn.close()
+
+
+if __name__ == "__main__":
+    main()
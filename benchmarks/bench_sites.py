@@ -0,0 +1,47 @@
+"""每个站点适配器的抽取吞吐量，对比通用的 extract.extract_page()。
+
+在 fixtures/ 下保存的页面上运行：
+    python benchmarks/bench_sites.py [重复次数]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract import available_backends, extract_page
+from fixture_server import load_fixture
+from sites import available_engines, get_adapter
+
+FIXTURES = {
+    "quotes.toscrape.com": ("quotes_toscrape_page.html", "https://quotes.toscrape.com/page/1/"),
+    "goodreads.com": ("goodreads_page.html", "https://www.goodreads.com/quotes?page=1"),
+}
+
+
+def rate(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return repeat / (time.perf_counter() - start)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    for name, (fixture, url) in FIXTURES.items():
+        adapter = get_adapter(name)
+        html = load_fixture(fixture)
+        quotes, _ = adapter.parse(url, html)
+        print(f"{name} ({len(quotes)} quotes/page)")
+        for backend in available_backends():
+            generic = rate(lambda: extract_page(html, url, backend), repeat)
+            print(f"  generic extract ({backend:11s}) {generic:8.0f} pages/sec")
+        for engine in available_engines():
+            if adapter.parse(url, html, engine)[0] != quotes:
+                print(f"  ⚠️ {engine} extracts different quotes")
+            adapted = rate(lambda: adapter.parse(url, html, engine), repeat)
+            print(f"  site adapter    ({engine:11s}) {adapted:8.0f} pages/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""出图各阶段的耗时占比（metrics.py 的 span）与埋点本身的开销。
+
+用 quotes.db 中的语录在内存中出图（绘制 + 编码，不写文件），打印各 span 的次数、
+总耗时、p50/p99 与占比；--metrics 同时导出 JSON / Prometheus 文本：
+    python benchmarks/bench_stages.py [数量] [--format jpeg-web] [--metrics stages.json]
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator import QuoteGenerator, clear_caches
+from metrics import METRICS, Metrics
+
+
+def span_overhead(n=200000):
+    m = Metrics()
+    start = time.perf_counter()
+    for _ in range(n):
+        with m.span("noop"):
+            pass
+    return (time.perf_counter() - start) / n
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("count", type=int, nargs="?", default=300)
+    parser.add_argument("--format", default="jpeg")
+    parser.add_argument("--metrics")
+    opts = parser.parse_args()
+
+    conn = sqlite3.connect("quotes.db")
+    rows = conn.execute("SELECT quote_date, author, quote FROM quotes ORDER BY id LIMIT ?", (opts.count,)).fetchall()
+    conn.close()
+
+    clear_caches()
+    METRICS.reset()
+    gen = QuoteGenerator(verbose=False)
+    start = time.perf_counter()
+    for date, author, quote in rows:
+        gen.render(date or "2025.01.01", author, quote, opts.format)
+    wall = time.perf_counter() - start
+
+    print(f"{len(rows)} posters ({opts.format}) in {wall:.2f}s ({len(rows) / wall:.1f}/s); "
+          f"draw includes text_layout\n")
+    print(METRICS.report())
+    spans = sum(h.count for h in METRICS.histograms.values())
+    overhead = span_overhead()
+    print(f"\nspan overhead: {overhead * 1e6:.2f} µs each, {spans} spans = "
+          f"{spans * overhead / wall:.3%} of wall time")
+    if opts.metrics:
+        print(f"📈 Metrics written to {METRICS.write(opts.metrics)}")
+
+
+if __name__ == "__main__":
+    main()
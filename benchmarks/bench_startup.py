@@ -0,0 +1,63 @@
+"""启动耗时报告（基于 python -X importtime），用于防止启动变慢。
+
+    python benchmarks/bench_startup.py [--max-ms 150]
+
+场景：
+    import main                  交互菜单出现前的开销
+    single image                 import main + 构造 QuoteGenerator（cron 单图任务）
+超过 --max-ms 时以非零状态退出，可放进 CI / cron 前置检查。
+"""
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "import main": "import main",
+    "single image": "import main; main._new_generator()",
+}
+
+
+def importtime(code):
+    """返回 (墙钟毫秒, [(累计微秒, 模块名), ...])。"""
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=ROOT, capture_output=True, text=True, check=True)
+    wall = (time.perf_counter() - start) * 1000
+    modules = []
+    for line in proc.stderr.splitlines():
+        # 格式："import time: <self us> | <cumulative us> | <缩进><模块名>"
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|", 2)
+        modules.append((int(cumulative_us), name[1:]))
+    return wall, modules
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--max-ms", type=float, default=None,
+                        help="fail when 'import main' wall time exceeds this")
+    parser.add_argument("--top", type=int, default=8)
+    opts = parser.parse_args()
+
+    results = {}
+    for name, code in SCENARIOS.items():
+        wall, modules = importtime(code)
+        results[name] = wall
+        top_level = [(us, mod) for us, mod in modules if not mod.startswith(" ")]
+        top_level.sort(reverse=True)
+        print(f"== {name}: {wall:.0f} ms wall")
+        for us, mod in top_level[:opts.top]:
+            print(f"   {us / 1000:8.1f} ms  {mod}")
+
+    if opts.max_ms is not None and results["import main"] > opts.max_ms:
+        print(f"❌ import main took {results['import main']:.0f} ms > {opts.max_ms:.0f} ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""对比每张图都完整绘制（背景副本 + 日期 + 正文 + 作者）与复制缓存的日期模板层后只画正文和作者。
+
+默认 10000 张海报、共 30 个日期；只计绘制时间（编码耗时两者相同，另行单独给出）：
+    python benchmarks/bench_template.py [数量] [日期数]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generator
+from generator import QuoteGenerator
+from encoding import encode
+
+
+def _records(n, dates):
+    return [(f"2025.{d % 12 + 1:02d}.{d % 28 + 1:02d}", f"Author {i}", f"Stay hungry, stay foolish #{i}")
+            for i, d in ((i, i % dates) for i in range(n))]
+
+
+def bench_full(gen, records):
+    background = generator._get_background(gen.background_image)
+    fonts = gen._load_fonts()
+    start = time.perf_counter()
+    for date, author, quote in records:
+        image = background.copy()
+        gen._draw_date(image, fonts[2], date)
+        gen._draw_text(image, fonts, author, quote)
+    return time.perf_counter() - start
+
+
+def bench_template(gen, records):
+    fonts = gen._load_fonts()
+    start = time.perf_counter()
+    for date, author, quote in records:
+        gen._compose(fonts, date, author, quote)
+    return time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    dates = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    records = _records(n, dates)
+    gen = QuoteGenerator(verbose=False)
+    gen.warm_up()
+    # 两种方式共用排版缓存，先预热一遍，只比较绘制本身
+    for _, _, quote in records:
+        gen.layout_quote(quote, generator._get_background(gen.background_image).width)
+
+    full = bench_full(gen, records)
+    generator._TEMPLATE_CACHE.clear()
+    templated = bench_template(gen, records)
+
+    sample = gen.render_canvas(*records[0])
+    start = time.perf_counter()
+    for _ in range(20):
+        encode(sample, "jpeg")
+    encode_ms = (time.perf_counter() - start) / 20 * 1000
+
+    print(f"posters: {n}, dates: {dates}")
+    print(f"full draw:      {full / n * 1000:6.2f} ms/image  ({n / full:7.1f} images/sec)")
+    print(f"template layer: {templated / n * 1000:6.2f} ms/image  ({n / templated:7.1f} images/sec)")
+    print(f"saving:         {(full - templated) / n * 1000:6.2f} ms/image  "
+          f"({(1 - templated / full) * 100:.1f}% of draw time; jpeg encode is {encode_ms:.1f} ms/image)")
+
+
+if __name__ == "__main__":
+    main()
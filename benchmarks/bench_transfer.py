@@ -0,0 +1,48 @@
+"""transfer.py 流式导出/导入的 rows/sec 与峰值内存（RSS）。
+
+    python benchmarks/bench_transfer.py [行数，默认 5000000]
+
+每个步骤在独立子进程中运行，峰值 RSS 互不影响。
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import QuoteWriter, get_connection
+
+
+def build_db(path, n):
+    conn = get_connection(path)
+    with QuoteWriter(conn, batch_size=50_000, flush_interval=float("inf")) as writer:
+        for i in range(n):
+            writer.add("2025.01.01", f"Author {i % 997}", f"Quote number {i}")
+    conn.close()
+
+
+def run(*args):
+    out = subprocess.run([sys.executable, os.path.join(ROOT, "transfer.py"), *args],
+                         capture_output=True, text=True, check=True).stdout.strip()
+    print(f"   transfer.py {args[0]:6s} {os.path.basename(args[1]):14s} {out}")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000
+    with tempfile.TemporaryDirectory() as tmp:
+        src, dst = os.path.join(tmp, "src.db"), os.path.join(tmp, "dst.db")
+        start = time.perf_counter()
+        build_db(src, n)
+        print(f"built {n:,}-row corpus in {time.perf_counter() - start:.1f}s")
+        for ext in ("jsonl", "csv"):
+            dump = os.path.join(tmp, f"quotes.{ext}")
+            run("export", dump, "--db", src)
+            run("import", dump, "--db", dst)
+            os.remove(dst)
+
+
+if __name__ == "__main__":
+    main()
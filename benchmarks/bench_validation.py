@@ -0,0 +1,100 @@
+"""validation.py 在数百万行上的扫描与修复速度。
+
+临时库只建 quotes 表和 content_hash 唯一索引（不建 FTS / 长度触发器，只测规则本身），
+约 1% 的行带有超长、空作者、乱码、首尾空白等问题：
+    python benchmarks/bench_validation.py [行数]        默认 2,000,000
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils import CREATE_TABLE_QUERY, INSERT_QUOTE_SQL, connect, content_hash, find_violations
+from validation import RenderWidthRule, build_rules, validate
+
+WORDS = "love life hope stay hungry dream light heart mind time truth peace smile brave".split()
+RENDER_SAMPLE = 20000
+
+
+def _broken(rng, author, quote):
+    kind = rng.randrange(5)
+    if kind == 0:
+        return author, quote + " " + " ".join(rng.choices(WORDS, k=6))
+    if kind == 1:
+        return " ", quote
+    if kind == 2:
+        return author, quote.replace(" ", "’ ", 1).encode("utf-8").decode("cp1252", "replace")
+    if kind == 3:
+        return author + "​", " " + quote
+    return author, quote.replace(" ", " ", 1)
+
+
+def build_db(path, rows):
+    rng = random.Random(0)
+    conn = connect(path)
+    conn.execute(CREATE_TABLE_QUERY)
+    conn.execute("CREATE UNIQUE INDEX idx_quotes_content_hash ON quotes(content_hash)")
+    # 修复时会清理近似重复签名（migrations v7 的表）
+    conn.execute("CREATE TABLE quote_minhash (content_hash TEXT PRIMARY KEY, shingles INTEGER, "
+                 "signature BLOB) WITHOUT ROWID")
+    batch = []
+    for i in range(rows):
+        author = f"Author {i % 5000}"
+        quote = f"{' '.join(rng.choices(WORDS, k=3))} {i}"[:25]
+        if rng.random() < 0.01:
+            author, quote = _broken(rng, author, quote)
+        batch.append(("2025.01.01", author, quote, content_hash(author, quote)))
+        if len(batch) == 100000:
+            with conn:
+                conn.executemany(INSERT_QUOTE_SQL, batch)
+            batch = []
+    with conn:
+        conn.executemany(INSERT_QUOTE_SQL, batch)
+    return conn
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 2000000
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bench.db")
+        start = time.perf_counter()
+        conn = build_db(path, rows)
+        print(f"Built {rows:,} rows in {time.perf_counter() - start:.1f}s")
+
+        start = time.perf_counter()
+        long_rows = len(find_violations(conn))
+        elapsed = time.perf_counter() - start
+        print(f"\nfind_violations (SQL length only): {long_rows:,} rows in {elapsed:.2f}s "
+              f"({rows / elapsed:,.0f} rows/sec)")
+
+        rules = build_rules(["length", "empty", "encoding"])
+        print("\nreport, length + empty + encoding:")
+        for chunk_size in (100, 1000, 10000, 50000):
+            result = validate(conn, rules, chunk_size=chunk_size)
+            per_rule = ", ".join(f"{r.name} {result.timings[r.name]:.2f}s" for r in rules)
+            print(f"  chunk {chunk_size:6,d}: {result.seconds:6.2f}s  {result.rows / result.seconds:10,.0f} rows/sec"
+                  f"  ({sum(result.counts.values()):,} violations; {per_rule})")
+
+        sample = conn.execute("SELECT id, quote_date, author, quote FROM quotes ORDER BY id LIMIT ?",
+                              (RENDER_SAMPLE,)).fetchall()
+        rule = RenderWidthRule()
+        rule.check(sample[:10])
+        start = time.perf_counter()
+        hits = rule.check(sample)
+        elapsed = time.perf_counter() - start
+        print(f"\nrender-width on {len(sample):,} rows: {elapsed:.2f}s ({len(sample) / elapsed:,.0f} rows/sec, "
+              f"{len(hits)} violations)")
+
+        result = validate(conn, build_rules(["length", "empty", "encoding"], delete_long=True), fix=True)
+        print(f"\nfix in one transaction: {result.seconds:.2f}s — {result.updated:,} updated, "
+              f"{result.deleted:,} deleted, {result.failed:,} failed")
+        result = validate(conn, rules)
+        print(f"after fix: {sum(result.counts.values())} violations left ({dict(result.counts)})")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
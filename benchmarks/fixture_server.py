@@ -0,0 +1,106 @@
+"""本地 HTTP 替身：用 fixtures/ 下保存的页面模拟 quotes.toscrape.com、goodreads 和通用 blockquote 站点。
+
+路由：
+    /page/<n>/           quotes_toscrape_page.html
+    /quotes?page=<n>     goodreads_page.html
+    /short-quotes/<n>    blockquote_page.html
+n 超过 pages 时返回 404；每个请求额外等待 latency 秒以模拟网络延迟。
+每个页面带 ETag / Last-Modified，条件请求命中时返回 304；把页码加入 changed 可模拟页面更新。
+"""
+import hashlib
+import os
+import re
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "fixtures")
+
+
+def load_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding="utf-8") as f:
+        return f.read()
+
+
+ROUTES = [
+    (re.compile(r"^/page/(\d+)/$"), "quotes_toscrape_page.html", "/page/2/", "/page/{}/"),
+    (re.compile(r"^/quotes\?page=(\d+)$"), "goodreads_page.html", "/quotes?page=2", "/quotes?page={}"),
+    (re.compile(r"^/short-quotes/(\d+)$"), "blockquote_page.html", "/short-quotes/2", "/short-quotes/{}"),
+]
+
+
+class FixtureServer:
+    """在后台线程里运行的本地站点，用作 with 语句。"""
+
+    def __init__(self, pages=10, latency=0.0):
+        self.pages = pages
+        self.latency = latency
+        self.requests = 0
+        self.not_modified = 0
+        self.bytes_sent = 0
+        self.changed = set()
+        self.last_modified = formatdate(time.time() - 3600, usegmt=True)
+        self._templates = {name: load_fixture(name) for _, name, _, _ in ROUTES}
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), self._make_handler())
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address
+        return f"http://{host}:{port}"
+
+    def render(self, path):
+        """返回 (status, body)；第 n 页的“下一页”链接改写为 n+1。"""
+        for pattern, name, next_href, next_fmt in ROUTES:
+            m = pattern.match(path)
+            if not m:
+                continue
+            n = int(m.group(1))
+            if n < 1 or n > self.pages:
+                return 404, "not found"
+            body = self._templates[name].replace(f'"{next_href}"', f'"{next_fmt.format(n + 1)}"')
+            if n in self.changed:
+                body += "\n<!-- updated -->"
+            return 200, body
+        return 404, "not found"
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                status, body = server.render(self.path)
+                data = body.encode("utf-8")
+                etag = '"%s"' % hashlib.sha1(data).hexdigest()[:16]
+                if status == 200 and self.headers.get("If-None-Match") == etag:
+                    server.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(status)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                if status == 200:
+                    self.send_header("ETag", etag)
+                    self.send_header("Last-Modified", server.last_modified)
+                self.end_headers()
+                self.wfile.write(data)
+                server.bytes_sent += len(data)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._httpd.shutdown()
+        self._httpd.server_close()
@@ -0,0 +1,125 @@
+"""poster_server 的本地压测：并发 keep-alive 连接请求海报，报告 requests/sec 与 p50/p99 延迟。
+
+默认在后台线程启动一个 PosterServer（使用 quotes.db 的临时副本），也可以用 --url 压测已运行的服务：
+    python benchmarks/load_test.py --requests 2000 --concurrency 32 --hot 50
+    python benchmarks/load_test.py --url http://127.0.0.1:8080
+请求的 id 从前 --hot 个 id 中按 1/rank 分布抽取，模拟“热门海报”。
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from poster_server import PosterServer
+
+
+def start_local_server(workers, cache_mb):
+    tmp = tempfile.mkdtemp()
+    db_path = os.path.join(tmp, "quotes.db")
+    shutil.copy(os.path.join(ROOT, "quotes.db"), db_path)
+    server = PosterServer(db_path, workers, cache_mb * 1024 * 1024,
+                          os.path.join(ROOT, "quote_template_background.jpg"))
+    server.start_pool()
+    ready = threading.Event()
+    port = []
+
+    def on_ready(p):
+        port.append(p)
+        ready.set()
+
+    threading.Thread(target=asyncio.run, args=(server.serve(port=0, ready=on_ready),), daemon=True).start()
+    ready.wait()
+    return f"http://127.0.0.1:{port[0]}", server, tmp
+
+
+async def fetch(reader, writer, host, path):
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+    await writer.drain()
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split()[1])
+    length = next(int(l.split(":", 1)[1]) for l in lines if l.lower().startswith("content-length"))
+    body = await reader.readexactly(length)
+    return status, body
+
+
+async def run(base_url, total, concurrency, paths):
+    parts = urlsplit(base_url)
+    latencies, statuses = [], {}
+    queue = asyncio.Queue()
+    for p in paths[:total]:
+        queue.put_nowait(p)
+
+    async def client():
+        reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+        try:
+            while not queue.empty():
+                path = queue.get_nowait()
+                start = time.perf_counter()
+                status, _ = await fetch(reader, writer, parts.netloc, path)
+                latencies.append(time.perf_counter() - start)
+                statuses[status] = statuses.get(status, 0) + 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+    _, body = await fetch(reader, writer, parts.netloc, "/stats")
+    writer.close()
+    return elapsed, sorted(latencies), statuses, json.loads(body)
+
+
+def pct(values, p):
+    return values[min(len(values) - 1, int(len(values) * p))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url")
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--hot", type=int, default=50, help="number of distinct poster ids requested")
+    parser.add_argument("--format", default="jpeg")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--cache-mb", type=int, default=64)
+    opts = parser.parse_args()
+
+    server = tmp = None
+    base_url = opts.url
+    if not base_url:
+        base_url, server, tmp = start_local_server(opts.workers, opts.cache_mb)
+
+    rng = random.Random(0)
+    ids = list(range(1, opts.hot + 1))
+    weights = [1 / rank for rank in ids]
+    paths = [f"/poster/{i}?format={opts.format}" for i in rng.choices(ids, weights, k=opts.requests)]
+
+    try:
+        elapsed, lat, statuses, stats = asyncio.run(run(base_url, opts.requests, opts.concurrency, paths))
+    finally:
+        if server is not None:
+            server.close()
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"{len(lat)} requests, concurrency {opts.concurrency}, {opts.hot} distinct posters")
+    print(f"throughput {len(lat) / elapsed:8.1f} req/s   p50 {pct(lat, 0.5):7.1f} ms   p99 {pct(lat, 0.99):7.1f} ms")
+    print(f"status {statuses}")
+    print(f"server: renders {stats['renders']}, LRU hits {stats['hits']}, coalesced {stats['coalesced']}, "
+          f"cached {stats['cached_images']} images / {stats['cached_bytes'] / 1024 / 1024:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""异步抓取引擎：有界连接池 + 按域名令牌桶限速 + 抓取/解析/入库流水线。
+
+网络请求仍由 requests 完成（在线程池里执行），解析也在线程池中进行，
+入库回调在事件循环线程上顺序执行，因此 sqlite 连接无需跨线程共享，
+而下一页的网络等待可以与当前页的解析、入库重叠。
+传入 http_cache.HttpCache 时使用条件请求，未变化的页面不再下载、解析和入库；
+传入 frontier.CrawlFrontier 时记录每页进度，支持断点续抓和“连续几页无新语录”提前结束。
+
+handle_items(url, items) 返回 False 表示该页未被接受；入库在下游异步完成时可以返回一个
+asyncio.Future，结果为 True 时才在缓存里记录该页的链接（下次内容不变时整页跳过），
+crawl() 会等所有这样的确认完成后再返回。
+"""
+import asyncio
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from http_cache import HttpCache, body_digest
+from metrics import METRICS
+
+DEFAULT_HEADERS = {"User-Agent": "quote-generator/1.0"}
+
+
+# ---------- 限速：令牌桶 ----------
+class TokenBucket:
+    """每秒补充 rate 个令牌，最多积攒 capacity 个。"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostRateLimiter:
+    """为每个 host 维护一个令牌桶。"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self._buckets = {}
+
+    async def acquire(self, url):
+        host = urlparse(url).netloc.lower()
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(self.rate, self.burst)
+        await bucket.acquire()
+
+
+# ---------- 抓取结果统计 ----------
+class CrawlStats:
+    def __init__(self):
+        self.pages = 0
+        self.cached = 0
+        self.errors = 0
+        self.bytes = 0
+        self.fetch_seconds = 0.0   # 各页请求耗时之和
+        self.parse_seconds = 0.0   # 各页解析耗时之和
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def __repr__(self):
+        return (f"CrawlStats(pages={self.pages}, cached={self.cached}, errors={self.errors}, "
+                f"bytes={self.bytes}, elapsed={self.elapsed:.2f}s)")
+
+
+# ---------- 抓取引擎 ----------
+class Crawler:
+    """并发抓取器。
+
+    parse_page(url, html) -> (items, next_urls)：在线程池中执行。
+    handle_items(url, items) -> bool | None：在事件循环线程上按页执行（适合写 sqlite）；
+    返回 False 时不再调度新页面（已在途的页面仍会抓完）。handle_items 也可以是协程函数，
+    它等待期间结果队列会被填满，抓取随之暂停（用于下游流水线的背压）。
+    parse_executor：可选的 Executor（例如 ProcessPoolExecutor），parse_page 在其中执行。
+    cache：可选的 HttpCache；命中且内容未变的页面只按缓存的链接翻页，不调用上面两个回调。
+    frontier：可选的 CrawlFrontier；handle_items 负责调用 frontier.record(url, found, new)，
+    frontier.exhausted 变为 True 后不再调度新页面。
+    """
+
+    def __init__(self, concurrency=4, rate_per_host=1.25, burst=1, timeout=15,
+                 headers=None, max_pages=50, same_host=True, session=None, cache=None, frontier=None,
+                 parse_executor=None):
+        self.concurrency = concurrency
+        self.limiter = HostRateLimiter(rate_per_host, burst)
+        self.timeout = timeout
+        self.headers = headers or DEFAULT_HEADERS
+        self.max_pages = max_pages
+        self.same_host = same_host
+        self.session = session or self._make_session(concurrency)
+        self.cache = cache
+        self.frontier = frontier
+        self.parse_executor = parse_executor
+        self.stats = CrawlStats()
+
+    @staticmethod
+    def _make_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _fetch(self, url, extra_headers=None):
+        headers = {**self.headers, **extra_headers} if extra_headers else self.headers
+        return self.session.get(url, timeout=self.timeout, headers=headers)
+
+    def crawl(self, start_urls, parse_page, handle_items):
+        """同步入口：跑完整个抓取并返回 CrawlStats。"""
+        if isinstance(start_urls, str):
+            start_urls = [start_urls]
+        if self.frontier is not None:
+            start_urls = self.frontier.resume(start_urls)
+        stats = asyncio.run(self._crawl(list(start_urls), parse_page, handle_items))
+        if self.frontier is not None:
+            self.frontier.finish()
+        return stats
+
+    async def _crawl(self, start_urls, parse_page, handle_items):
+        loop = asyncio.get_running_loop()
+        self.stats = CrawlStats()
+        frontier = self.frontier
+        hosts = {urlparse(u).netloc.lower() for u in start_urls}
+        queue = asyncio.Queue()
+        results = asyncio.Queue(maxsize=self.concurrency * 2)
+        seen = set()
+        state = {"scheduled": 0, "stopped": False, "error": None}
+
+        def schedule(url):
+            if state["stopped"] or url in seen or state["scheduled"] >= self.max_pages:
+                return
+            if self.same_host and urlparse(url).netloc.lower() not in hosts:
+                return
+            seen.add(url)
+            state["scheduled"] += 1
+            if frontier is not None:
+                frontier.add(url)
+            queue.put_nowait(url)
+
+        def page_failed(url):
+            self.stats.errors += 1
+            METRICS.inc("pages_failed")
+            if frontier is not None:
+                frontier.failed(url)
+
+        def check_frontier():
+            if frontier is not None and frontier.exhausted:
+                state["stopped"] = True
+
+        for u in start_urls:
+            schedule(u)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency * 2) as pool:
+
+            async def fetch_worker():
+                while True:
+                    url = await queue.get()
+                    try:
+                        entry = self.cache.get(url) if self.cache is not None else None
+                        await self.limiter.acquire(url)
+                        fetch_start = time.perf_counter()
+                        try:
+                            resp = await loop.run_in_executor(
+                                pool, self._fetch, url, HttpCache.conditional_headers(entry))
+                        except Exception as e:
+                            print(f"❌ 请求失败：{url} {e}")
+                            page_failed(url)
+                            continue
+                        if resp.status_code == 304 and entry is not None:
+                            status, text = "hit", entry.text
+                        elif resp.status_code != 200 or not resp.text:
+                            print(f"❌ 拉取失败，HTTP {resp.status_code}：{url}")
+                            page_failed(url)
+                            continue
+                        else:
+                            text = resp.text
+                            self.stats.bytes += len(resp.content)
+                            METRICS.inc("http_bytes", len(resp.content))
+                            same = entry is not None and entry.digest == body_digest(text)
+                            status = "unchanged" if same else "miss"
+                        self.stats.pages += 1
+                        fetch_seconds = time.perf_counter() - fetch_start
+                        self.stats.fetch_seconds += fetch_seconds
+                        METRICS.observe("http_fetch", fetch_seconds)
+                        if self.cache is not None:
+                            self.cache.record(status, entry)
+                            METRICS.inc(f"http_cache_{status}")
+                            # 内容未变：上次已经入库，直接沿用缓存的链接翻页
+                            if status != "miss" and entry.links is not None:
+                                self.stats.cached += 1
+                                if frontier is not None:
+                                    frontier.record(url, None, 0)
+                                    check_frontier()
+                                for nxt in entry.links:
+                                    schedule(nxt)
+                                continue
+                        parse_start = time.perf_counter()
+                        try:
+                            items, next_urls = await loop.run_in_executor(
+                                self.parse_executor or pool, parse_page, url, text)
+                        except Exception as e:
+                            print(f"❌ 解析失败：{url} {e}")
+                            page_failed(url)
+                            continue
+                        parse_seconds = time.perf_counter() - parse_start
+                        self.stats.parse_seconds += parse_seconds
+                        METRICS.observe("html_parse", parse_seconds)
+                        # 先调度下一页，使其抓取与本页入库重叠
+                        next_urls = list(next_urls or ())
+                        for nxt in next_urls:
+                            schedule(nxt)
+                        validators = resp.headers if status != "hit" else {
+                            "ETag": entry.etag, "Last-Modified": entry.last_modified}
+                        page = (text, validators.get("ETag"), validators.get("Last-Modified"), next_urls)
+                        await results.put((url, items, page))
+                    finally:
+                        queue.task_done()
+
+            async def confirm(url, links, pending):
+                try:
+                    accepted = await pending
+                except Exception:
+                    accepted = False
+                if accepted:
+                    self.cache.confirm(url, links)
+
+            confirmations = []
+
+            async def insert_worker():
+                while True:
+                    url, items, page = await results.get()
+                    try:
+                        if state["error"] is None:
+                            result = handle_items(url, items)
+                            if inspect.isawaitable(result) and not isinstance(result, asyncio.Future):
+                                result = await result
+                            deferred = isinstance(result, asyncio.Future)
+                            accepted = result is not False
+                            if not accepted:
+                                state["stopped"] = True
+                            check_frontier()
+                            if self.cache is not None:
+                                # 只有成功入库的页面才记录链接，下次内容不变时可整页跳过；
+                                # 下游异步入库的页面先不带链接保存，提交确认后再补上
+                                text, etag, last_modified, links = page
+                                self.cache.put(url, text, etag, last_modified,
+                                               links if accepted and not deferred else None)
+                                if deferred:
+                                    confirmations.append(asyncio.ensure_future(confirm(url, links, result)))
+                    except Exception as e:
+                        # 入库出错：停止发现新页面，排空队列后在 crawl() 中重新抛出
+                        state["error"] = e
+                        state["stopped"] = True
+                    finally:
+                        results.task_done()
+
+            workers = [asyncio.create_task(fetch_worker()) for _ in range(self.concurrency)]
+            inserter = asyncio.create_task(insert_worker())
+            try:
+                # 两个队列都空且无在途任务时结束（入库可能继续发现新页面，所以循环检查）
+                while True:
+                    await queue.join()
+                    await results.join()
+                    if queue.empty():
+                        break
+                await asyncio.gather(*confirmations)
+            finally:
+                for t in workers + [inserter]:
+                    t.cancel()
+                await asyncio.gather(*workers, inserter, return_exceptions=True)
+
+        if state["error"] is not None:
+            raise state["error"]
+        return self.stats
@@ -0,0 +1,165 @@
+"""出图编码参数（encoding profile）。
+
+同一张绘制好的画布可以按多个 profile 编码成不同格式/尺寸，不需要重新绘制：
+    data = encode(image, "jpeg-web")
+    variants = encode_variants(image, ["jpeg-web", "webp-small", "png"])
+
+max_bytes 不为空时，对有损格式二分查找满足体积上限的最高质量。
+Pillow 编码时会释放 GIL，encode_variants() 在多核机器上用线程并行编码多个 profile。
+"""
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image, features
+
+from metrics import METRICS
+
+# 支持 quality 参数、可以二分查找体积的格式
+LOSSY_FORMATS = {"JPEG", "WEBP", "AVIF"}
+MIN_QUALITY = 10
+
+
+class EncodingProfile:
+    """format 为 Pillow 格式名；width 不为空时等比缩放到该宽度（只缩小不放大）。"""
+
+    def __init__(self, name, format="JPEG", quality=None, optimize=False, progressive=False,
+                 subsampling=None, lossless=False, method=None, max_bytes=None, width=None,
+                 extension=None):
+        self.name = name
+        self.format = format.upper()
+        self.quality = quality
+        self.optimize = optimize
+        self.progressive = progressive
+        self.subsampling = subsampling
+        self.lossless = lossless
+        self.method = method
+        self.max_bytes = max_bytes
+        self.width = width
+        self.extension = extension or ("jpeg" if self.format == "JPEG" else self.format.lower())
+
+    def save_kwargs(self, quality=None):
+        quality = quality if quality is not None else self.quality
+        kw = {"format": self.format}
+        if quality is not None and self.format in LOSSY_FORMATS:
+            kw["quality"] = quality
+        if self.format == "JPEG":
+            if self.optimize:
+                kw["optimize"] = True
+            if self.progressive:
+                kw["progressive"] = True
+            if self.subsampling is not None:
+                kw["subsampling"] = self.subsampling
+        elif self.format == "WEBP":
+            if self.lossless:
+                kw["lossless"] = True
+            if self.method is not None:
+                kw["method"] = self.method
+        elif self.format == "PNG" and self.optimize:
+            kw["optimize"] = True
+        elif self.format == "AVIF" and self.method is not None:
+            kw["speed"] = self.method
+        return kw
+
+    def cache_id(self):
+        """写进 render key 的标识；只指定格式的 profile 与旧的 output_format 字符串一致。"""
+        if self.describe() == EncodingProfile(self.name, self.format, extension=self.extension).describe():
+            return self.name
+        return self.describe()
+
+    def describe(self):
+        return {k: v for k, v in vars(self).items() if k != "name"}
+
+    def __repr__(self):
+        return f"EncodingProfile({self.name!r}, {self.describe()})"
+
+
+PROFILES = {}
+
+
+def register(profile):
+    PROFILES[profile.name] = profile
+    return profile
+
+
+register(EncodingProfile("jpeg", "JPEG"))
+register(EncodingProfile("jpeg-web", "JPEG", quality=82, optimize=True, progressive=True, subsampling="4:2:0"))
+register(EncodingProfile("jpeg-small", "JPEG", quality=80, optimize=True, progressive=True,
+                         subsampling="4:2:0", max_bytes=80 * 1024, width=540))
+register(EncodingProfile("png", "PNG"))
+register(EncodingProfile("png-optimized", "PNG", optimize=True))
+register(EncodingProfile("webp", "WEBP", quality=80, method=4))
+register(EncodingProfile("webp-small", "WEBP", quality=75, method=4, max_bytes=50 * 1024, width=540))
+if features.check("avif"):
+    register(EncodingProfile("avif", "AVIF", quality=60, method=6))
+
+
+def get_profile(spec):
+    """spec 可以是 EncodingProfile、已注册的名称，或 Pillow 能识别的扩展名（"jpg"、"png"…）。"""
+    if isinstance(spec, EncodingProfile):
+        return spec
+    profile = PROFILES.get(spec)
+    if profile is not None:
+        return profile
+    fmt = Image.registered_extensions().get("." + spec.lower())
+    if fmt is None:
+        raise ValueError(f"unknown output format or profile: {spec!r}")
+    return EncodingProfile(spec, fmt, extension=spec.lower())
+
+
+def resize_for(image, profile):
+    if not profile.width or image.width <= profile.width:
+        return image
+    height = round(image.height * profile.width / image.width)
+    return image.resize((profile.width, height), Image.LANCZOS)
+
+
+def _encode_once(image, profile, quality=None):
+    buf = io.BytesIO()
+    image.save(buf, **profile.save_kwargs(quality))
+    return buf.getvalue()
+
+
+def encode(image, profile):
+    """按 profile 编码（必要时先缩放），返回 bytes。"""
+    profile = get_profile(profile)
+    with METRICS.span("encode"):
+        return _encode(image, profile)
+
+
+def _encode(image, profile):
+    image = resize_for(image, profile)
+    data = _encode_once(image, profile)
+    if (profile.max_bytes is None or len(data) <= profile.max_bytes
+            or profile.format not in LOSSY_FORMATS or profile.lossless):
+        return data
+
+    # 二分查找：体积不超过 max_bytes 的最高质量；最低质量也超限时返回最低质量的结果
+    lo, hi = MIN_QUALITY, (profile.quality or 75) - 1
+    best = None
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        candidate = _encode_once(image, profile, mid)
+        if len(candidate) <= profile.max_bytes:
+            best, lo = candidate, mid + 1
+        else:
+            hi = mid - 1
+    return best if best is not None else _encode_once(image, profile, MIN_QUALITY)
+
+
+def encode_variants(image, profiles, parallel=True):
+    """同一画布按多个 profile 编码，返回 {profile.name: bytes}；相同宽度只缩放一次。"""
+    profiles = [get_profile(p) for p in profiles]
+    resized = {}
+    for p in profiles:
+        if p.width not in resized:
+            resized[p.width] = resize_for(image, p)
+    jobs = [(resized[p.width], p) for p in profiles]
+
+    workers = min(len(jobs), os.cpu_count() or 1)
+    if parallel and workers > 1:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(lambda job: encode(*job), jobs))
+    else:
+        results = [encode(im, p) for im, p in jobs]
+    return {p.name: data for p, data in zip(profiles, results)}
@@ -0,0 +1,230 @@
+"""通用页面抽取：一次遍历同时收集 quote 候选和“下一页”链接。
+
+旧的 _extract_quotes_from_soup() + _find_next_url()（现保留在 benchmarks/bench_extract.py 作对照）会对整棵树做三次 select
+和最多五次 find；这里只遍历一遍节点，按 class / 标签把元素分到各个候选列表，
+遍历结束后再按旧实现的优先级组装结果，所以抽取结果与旧实现一致。
+
+后端可插拔：装了 lxml 时用 lxml.html（C 实现的解析器），否则退回 BeautifulSoup + html.parser。
+    extract_page(html, base_url) -> (quotes, next_url)
+"""
+import importlib.util
+import re
+from urllib.parse import urljoin
+
+_NEXT_REL = re.compile(r"\bnext\b", re.I)
+_NEXT_TEXT = re.compile(r"^\s*(next|下一页|›|»)\s*$", re.I)
+_DASH_AUTHOR = re.compile(r"[—\-–]\s*([^—\-–]{2,})$")
+_QUOTE_TEXT = re.compile(r"[“\"](.+?)[”\"]\s*[―\-–]\s*(.+)$")
+_SKIP_TEXT = {"script", "style", "template"}
+
+# “下一页”候选的优先级，与 _find_next_url() 的查找顺序一致
+NEXT_KINDS = ("link_rel", "a_rel", "a_class", "a_text", "li_class")
+
+
+def clean_quotes(extracted):
+    """清洗与页面内去重：(author, text) 按小写去重，过短的丢弃。"""
+    seen, cleaned = set(), []
+    for author, text in extracted:
+        key = (author.strip().lower(), text.strip().lower())
+        if key not in seen and len(text) >= 5:
+            seen.add(key)
+            cleaned.append((author.strip(), text.strip()))
+    return cleaned
+
+
+class _Collector:
+    """遍历时按类别登记元素；同类只保留文档顺序的第一个“下一页”候选。"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.boxes = []        # .quote
+        self.blockquotes = []  # <blockquote>
+        self.quote_texts = []  # .quoteText
+        self.next = {}
+
+    def visit(self, el, tag, classes, rel, class_attr):
+        if "quote" in classes:
+            self.boxes.append(el)
+        if tag == "blockquote":
+            self.blockquotes.append(el)
+        if "quoteText" in classes:
+            self.quote_texts.append(el)
+        if tag == "link":
+            if rel and _NEXT_REL.search(rel):
+                self.next.setdefault("link_rel", el)
+        elif tag == "a":
+            if rel and _NEXT_REL.search(rel):
+                self.next.setdefault("a_rel", el)
+            if "next" in class_attr.lower():
+                self.next.setdefault("a_class", el)
+            if "a_text" not in self.next and _NEXT_TEXT.match(self.backend.string(el) or ""):
+                self.next["a_text"] = el
+        elif tag == "li" and "next" in class_attr.lower():
+            self.next.setdefault("li_class", el)
+
+    def quotes(self):
+        text_of = self.backend.text
+        extracted = []
+        for box in self.boxes:
+            t = self.backend.first_with_class(box, "text")
+            a = self.backend.first_with_class(box, "author")
+            if t is not None and a is not None:
+                text = text_of(t).strip('“”"')
+                if text:
+                    extracted.append((text_of(a), text))
+
+        for bq in self.blockquotes:
+            text = text_of(bq)
+            if not text:
+                continue
+            author = None
+            cite = self.backend.first_tag(bq, "cite")
+            if cite is not None:
+                author = text_of(cite)
+            if not author:
+                m = _DASH_AUTHOR.search(text)
+                if m:
+                    author = m.group(1).strip()
+                    text = text[:m.start()].strip()
+            if text:
+                extracted.append((author or "Unknown", text.strip('“”"')))
+
+        for div in self.quote_texts:
+            m = _QUOTE_TEXT.match(text_of(div))
+            if m:
+                extracted.append((m.group(2).strip(), m.group(1).strip()))
+        return clean_quotes(extracted)
+
+    def next_url(self, base_url):
+        for kind in NEXT_KINDS:
+            el = self.next.get(kind)
+            if el is None:
+                continue
+            if kind == "li_class":
+                el = self.backend.first_tag(el, "a")
+                if el is None:
+                    continue
+            href = el.get("href")
+            if href:
+                return urljoin(base_url, href)
+        return None
+
+
+# ---------- 后端：lxml ----------
+class LxmlBackend:
+    name = "lxml"
+
+    def __init__(self):
+        import lxml.html
+        self._fromstring = lxml.html.fromstring
+
+    @staticmethod
+    def _strings(el):
+        if isinstance(el.tag, str) and el.tag not in _SKIP_TEXT and el.text:
+            yield el.text
+        for child in el:
+            if isinstance(child.tag, str):
+                yield from LxmlBackend._strings(child)
+            if child.tail:
+                yield child.tail
+
+    def text(self, el):
+        # 等价于 BeautifulSoup 的 " ".join(el.stripped_strings)
+        return " ".join(s.strip() for s in self._strings(el) if s.strip())
+
+    def string(self, el):
+        return el.text if len(el) == 0 else el.text_content()
+
+    def first_with_class(self, el, cls):
+        for node in el.iter():
+            if node is not el and isinstance(node.tag, str) and cls in (node.get("class") or "").split():
+                return node
+        return None
+
+    def first_tag(self, el, tag):
+        return next(el.iterdescendants(tag), None)
+
+    def parse(self, html):
+        """返回根节点；空页面返回 None。"""
+        if not html.strip():
+            return None
+        try:
+            return self._fromstring(html)
+        except ValueError:
+            # 带 <?xml encoding=...?> 声明的页面只能按字节解析
+            return self._fromstring(html.encode("utf-8"))
+
+    def collect(self, html):
+        c = _Collector(self)
+        root = self.parse(html)
+        if root is None:
+            return c
+        for el in root.iter():
+            tag = el.tag
+            if not isinstance(tag, str):  # 注释、处理指令
+                continue
+            class_attr = el.get("class") or ""
+            c.visit(el, tag, class_attr.split(), el.get("rel"), class_attr)
+        return c
+
+
+# ---------- 后端：BeautifulSoup + html.parser ----------
+class SoupBackend:
+    name = "html.parser"
+
+    def __init__(self):
+        from bs4 import BeautifulSoup, Tag
+        self._soup_cls = BeautifulSoup
+        self._tag_cls = Tag
+
+    def text(self, el):
+        return " ".join(el.stripped_strings)
+
+    def string(self, el):
+        return el.string
+
+    def first_with_class(self, el, cls):
+        return el.find(class_=cls)
+
+    def first_tag(self, el, tag):
+        return el.find(tag)
+
+    def parse(self, html):
+        return self._soup_cls(html, "html.parser")
+
+    def collect(self, html):
+        c = _Collector(self)
+        tag_cls = self._tag_cls
+        for el in self.parse(html).descendants:
+            if not isinstance(el, tag_cls):
+                continue
+            classes = el.get("class") or []
+            rel = el.get("rel")
+            c.visit(el, el.name, classes, " ".join(rel) if rel else None, " ".join(classes))
+        return c
+
+
+EXTRACTORS = {"lxml": LxmlBackend, "html.parser": SoupBackend}
+_backends = {}
+
+
+def available_backends():
+    # lxml 是可选依赖，只检查是否安装，真正用到时才导入
+    return [name for name in EXTRACTORS if name != "lxml" or importlib.util.find_spec("lxml") is not None]
+
+
+def get_backend(name=None):
+    """name 为空时优先 lxml；实例按名称缓存。"""
+    name = name or available_backends()[0]
+    if name not in available_backends():
+        raise ValueError(f"extractor backend {name!r} is not available")
+    backend = _backends.get(name)
+    if backend is None:
+        backend = _backends[name] = EXTRACTORS[name]()
+    return backend
+
+
+def extract_page(html, base_url, backend=None):
+    """一次遍历抽取 (quotes, next_url)；quotes 为 [(author, text), ...]。"""
+    collector = get_backend(backend).collect(html)
+    return collector.quotes(), collector.next_url(base_url)
@@ -0,0 +1,77 @@
+"""持久化的抓取前沿（crawl frontier），存在 quotes.db 的 crawl_frontier 表中。
+
+每个页面记录状态（pending / done / error）、最近抓取时间、找到的语录数和新增数：
+- 抓取中途崩溃时 pending 页面会保留，下次同名抓取从这些页面继续（断点续抓）；
+  抓取名称用起始 URL，同一站点换一个起始页是另一次抓取，不会续上之前的进度；
+- 连续 stale_limit 页都没有新语录时提前结束，日常增量抓取只需要请求开头几页。
+正常结束时调用 finish() 清掉未抓取的 pending 记录，下次从起始页重新开始。
+"""
+import time
+
+STALE_PAGE_LIMIT = 3
+
+
+class CrawlFrontier:
+    """crawl 为抓取名称（起始 URL），不同起始页的进度互不影响。"""
+
+    def __init__(self, conn, crawl, stale_limit=STALE_PAGE_LIMIT):
+        self.conn = conn
+        self.crawl = crawl
+        self.stale_limit = stale_limit
+        self.stale_streak = 0
+        self.resumed = False
+
+    def pending(self):
+        rows = self.conn.execute(
+            "SELECT url FROM crawl_frontier WHERE crawl = ? AND status = 'pending' ORDER BY queued",
+            (self.crawl,),
+        )
+        return [r[0] for r in rows]
+
+    def resume(self, start_urls):
+        """上次中断留下的 pending 页面优先，否则从 start_urls 开始。"""
+        pending = self.pending()
+        self.resumed = bool(pending)
+        self.stale_streak = 0
+        return pending or list(start_urls)
+
+    def add(self, url):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO crawl_frontier (crawl, url, status, queued) VALUES (?, ?, 'pending', ?) "
+                "ON CONFLICT(crawl, url) DO UPDATE SET status = 'pending', queued = excluded.queued",
+                (self.crawl, url, time.time()),
+            )
+
+    def record(self, url, found, new):
+        """页面处理完毕。found 为 None 时保留上次的语录数（页面未变化、未重新解析）。"""
+        with self.conn:
+            self.conn.execute(
+                "UPDATE crawl_frontier SET status = 'done', last_fetched = ?, "
+                "quotes_found = COALESCE(?, quotes_found), new_quotes = ? WHERE crawl = ? AND url = ?",
+                (time.time(), found, new, self.crawl, url),
+            )
+        self.stale_streak = 0 if new else self.stale_streak + 1
+
+    def failed(self, url):
+        with self.conn:
+            self.conn.execute(
+                "UPDATE crawl_frontier SET status = 'error', last_fetched = ? WHERE crawl = ? AND url = ?",
+                (time.time(), self.crawl, url),
+            )
+
+    @property
+    def exhausted(self):
+        return bool(self.stale_limit) and self.stale_streak >= self.stale_limit
+
+    def finish(self):
+        """正常结束：已排队但没抓的页面不作为下次的续抓起点。"""
+        with self.conn:
+            self.conn.execute(
+                "DELETE FROM crawl_frontier WHERE crawl = ? AND status = 'pending' AND last_fetched IS NULL",
+                (self.crawl,),
+            )
+            self.conn.execute(
+                "UPDATE crawl_frontier SET status = 'done' WHERE crawl = ? AND status = 'pending'",
+                (self.crawl,),
+            )
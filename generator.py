@@ -1,13 +1,108 @@
 from PIL import Image, ImageDraw, ImageFont
-from textwrap import wrap
+import io
 import os
 import platform
+import time
+from collections import OrderedDict, namedtuple
 from datetime import datetime
+from render_cache import file_fingerprint, render_key
+from layout import LAYOUT_VERSION, LayoutEngine
+from encoding import encode, get_profile
+from metrics import METRICS
+
+# ---------- 进程级缓存 ----------
+# 字体按 (path, size) 缓存；背景按路径缓存解码后的 RGB 原图（按 mtime 失效）
+_FONT_CACHE = {}
+_BACKGROUND_CACHE = {}
+
+
+def _get_font(path, size):
+    """返回缓存的 FreeTypeFont；path 为 None 时返回默认字体。"""
+    key = (path, size)
+    font = _FONT_CACHE.get(key)
+    if font is None:
+        with METRICS.span("font_load"):
+            font = ImageFont.load_default() if path is None else ImageFont.truetype(path, size)
+        _FONT_CACHE[key] = font
+    return font
+
+
+def _get_background(path):
+    """返回解码一次后缓存的背景原图；调用方需 copy() 后再绘制。"""
+    mtime = os.path.getmtime(path)
+    cached = _BACKGROUND_CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        with Image.open(path) as im:
+            cached = (mtime, im.convert("RGB"))
+        _BACKGROUND_CACHE[path] = cached
+    return cached[1]
+
+
+# ---------- 静态模板层 ----------
+# 背景 +（可选）装饰层 + 日期行只与日期有关：按日期预先合成一次并缓存，
+# 每张海报复制模板后只绘制正文和作者。按最近使用保留 TEMPLATE_CACHE_SIZE 个日期。
+TEMPLATE_CACHE_SIZE = 64
+_TEMPLATE_CACHE = OrderedDict()
+
+# 各行的纵向位置
+DATE_Y = 350
+QUOTE_Y = DATE_Y + 150
+AUTHOR_Y = QUOTE_Y + 200
+
+# 正文排版区域：左右各留 QUOTE_MARGIN，高度截止到作者行上方
+QUOTE_MARGIN = 195
+QUOTE_BOX_HEIGHT = 185
+QUOTE_MAX_SIZE = 45
+QUOTE_MIN_SIZE = 24
+
+# 按正文字体路径缓存排版引擎（字宽表与排版结果进程内共享）
+_LAYOUT_ENGINES = {}
+
+
+def _get_layout_engine(font_path):
+    engine = _LAYOUT_ENGINES.get(font_path)
+    if engine is None:
+        def loader(size):
+            if font_path and os.path.exists(font_path):
+                try:
+                    return _get_font(font_path, size)
+                except Exception:
+                    pass
+            return _get_font(None, 0)
+        engine = _LAYOUT_ENGINES[font_path] = LayoutEngine(
+            loader, font_path, max_size=QUOTE_MAX_SIZE, min_size=QUOTE_MIN_SIZE)
+    return engine
+
+
+class RenderResult(namedtuple("RenderResult", "data mime_type extension profile draw_seconds encode_seconds")):
+    """render() 的返回值：编码后的字节、MIME 类型、扩展名、profile 名，以及绘制/编码耗时（秒）。"""
+    __slots__ = ()
+
+    def stream(self):
+        return io.BytesIO(self.data)
+
+# 字体探测结果与启动提示：每个进程只做一次
+_ARIAL_PATHS = None
+_BANNER_SHOWN = False
+
+
+def clear_caches():
+    """清空字体、背景、模板层与排版缓存（基准测试或模板文件替换后使用）。"""
+    _FONT_CACHE.clear()
+    _BACKGROUND_CACHE.clear()
+    _TEMPLATE_CACHE.clear()
+    _LAYOUT_ENGINES.clear()
+
 
 class QuoteGenerator:
-    def __init__(self, background_image="quote_template_background.jpg", output_folder="outputs"):
+    def __init__(self, background_image="quote_template_background.jpg", output_folder="outputs",
+                 render_cache=None, verbose=True, overlay_image=None):
         self.background_image = background_image
+        # 可选的装饰层（带透明通道的 PNG，与背景同尺寸），合成进静态模板层
+        self.overlay_image = overlay_image
         self.output_folder = output_folder
+        # 可选的 render_cache.RenderCache：相同输入直接返回已生成的文件
+        self.render_cache = render_cache
 
         os.makedirs(self.output_folder, exist_ok=True)
 
@@ -15,6 +110,12 @@ class QuoteGenerator:
         self.arial_regular_path, self.arial_bold_italic_path = self._detect_arial_paths()
         self.notosans_path = os.path.join("fonts", "NotoSans-VariableFont.ttf")
 
+        # 启动提示只在本进程第一次构造时打印；verbose=False 完全静默
+        global _BANNER_SHOWN
+        if not verbose or _BANNER_SHOWN:
+            return
+        _BANNER_SHOWN = True
+
         print("Initialized")
         print(f"background path：{self.background_image}")
         print(f"output folder：{self.output_folder}")
@@ -32,7 +133,11 @@ class QuoteGenerator:
               self.arial_bold_italic_path if self.arial_bold_italic_path else "NOT found -> fallback to default")
 
     def _detect_arial_paths(self):
-        """跨平台查找 Arial Regular 与 Arial Bold Italic 的字体文件路径"""
+        """跨平台查找 Arial Regular 与 Arial Bold Italic 的字体文件路径（每个进程只探测一次）"""
+        global _ARIAL_PATHS
+        if _ARIAL_PATHS is not None:
+            return _ARIAL_PATHS
+
         sys_platform = platform.system()
         candidates_regular = []
         candidates_bi = []
@@ -78,92 +183,245 @@ class QuoteGenerator:
                     return p
             return None
 
-        return first_exists(candidates_regular), first_exists(candidates_bi)
+        _ARIAL_PATHS = first_exists(candidates_regular), first_exists(candidates_bi)
+        return _ARIAL_PATHS
 
     def _load_fonts(self):
-        """加载所需字体并在失败时回退默认字体；只在 generate() 调用时真正加载。"""
+        """加载所需字体并在失败时回退默认字体；已加载的字体按 (path, size) 复用。"""
         # 正文：NotoSans 45
         if os.path.exists(self.notosans_path):
             try:
-                quote_font = ImageFont.truetype(self.notosans_path, 45)
+                quote_font = _get_font(self.notosans_path, 45)
             except Exception:
                 print("[Font] Failed to load NotoSans -> fallback to default")
-                quote_font = ImageFont.load_default()
+                quote_font = _get_font(None, 0)
         else:
-            quote_font = ImageFont.load_default()
+            quote_font = _get_font(None, 0)
 
         # 作者：Arial Bold Italic 32
         if self.arial_bold_italic_path:
             try:
-                author_font = ImageFont.truetype(self.arial_bold_italic_path, 32)
+                author_font = _get_font(self.arial_bold_italic_path, 32)
             except Exception:
                 print("[Font] Failed to load Arial Bold Italic -> fallback to default")
-                author_font = ImageFont.load_default()
+                author_font = _get_font(None, 0)
         else:
-            author_font = ImageFont.load_default()
+            author_font = _get_font(None, 0)
 
         # 日期：Arial Regular 30
         if self.arial_regular_path:
             try:
-                date_font = ImageFont.truetype(self.arial_regular_path, 30)
+                date_font = _get_font(self.arial_regular_path, 30)
             except Exception:
                 print("[Font] Failed to load Arial Regular -> fallback to default")
-                date_font = ImageFont.load_default()
+                date_font = _get_font(None, 0)
         else:
-            date_font = ImageFont.load_default()
+            date_font = _get_font(None, 0)
 
         return quote_font, author_font, date_font
 
-    def generate(self, date, author, quote, output_format="jpeg"):
-        if not os.path.exists(self.background_image):
-            print("cannot find background image")
-            return
+    def warm_up(self):
+        """提前解码背景并加载字体，适合长驻进程/worker 启动时调用。"""
+        if os.path.exists(self.background_image):
+            _get_background(self.background_image)
+        self._load_fonts()
 
-        # 打开背景图
-        image = Image.open(self.background_image).convert("RGB")
-        draw = ImageDraw.Draw(image)
-        W, H = image.size
+    def layout_quote(self, quote, image_width):
+        """正文在模板区域内的排版结果（layout.Layout），结果按内容缓存。"""
+        engine = _get_layout_engine(self.notosans_path)
+        return engine.layout(quote, image_width - 2 * QUOTE_MARGIN, QUOTE_BOX_HEIGHT)
 
-        # 加载字体（带回退）
-        quote_font, author_font, date_font = self._load_fonts()
+    def layout_stats(self):
+        """排版耗时统计（layout.LayoutStats）：calls / hits / seconds。"""
+        return _get_layout_engine(self.notosans_path).stats
 
-        safe_date = date.replace(".", "-")
+    @staticmethod
+    def _draw_date(image, date_font, date):
+        draw = ImageDraw.Draw(image)
         date_text = f"{date}"
-        author_text = f"---{author}"
-
-        # 日期
         bbox = draw.textbbox((0, 0), date_text, font=date_font)
         w = bbox[2] - bbox[0]
-        date_y = 350
-        draw.text(((W - w) / 2, date_y), date_text, font=date_font, fill="black")
+        draw.text(((image.width - w) / 2, DATE_Y), date_text, font=date_font, fill="black")
 
-        # 换行处理（正文）
-        max_line_length = 30
-        wrapped_lines = wrap(quote, width=max_line_length)
-        quote_wrapped = "\n".join(wrapped_lines)
+    def _draw_text(self, image, fonts, author, quote):
+        """每张图各不相同的部分：正文与作者。"""
+        _, author_font, _ = fonts
+        draw = ImageDraw.Draw(image)
+        W = image.width
+        author_text = f"---{author}"
 
-        # 正文绘制
-        bbox = draw.textbbox((0, 0), quote_wrapped, font=quote_font)
-        w = bbox[2] - bbox[0]
-        h = bbox[3] - bbox[1]
-        quote_x = (W - w) / 2
-        quote_y = date_y + 150
-        draw.multiline_text(
-            (quote_x, quote_y),
-            quote_wrapped,
-            font=quote_font,
-            fill="black",
-            spacing=10,
-            align="center"
-        )
+        # 正文排版：按像素宽度断行，放不下时自动缩小字号
+        layout = self.layout_quote(quote, W)
+        font = _get_layout_engine(self.notosans_path).table(layout.font_size).font
+
+        # 正文绘制（逐行居中）
+        y = QUOTE_Y
+        for line, w in zip(layout.lines, layout.widths):
+            draw.text(((W - w) / 2, y), line, font=font, fill="black")
+            y += layout.line_height
 
         # 作者名
         bbox = draw.textbbox((0, 0), author_text, font=author_font)
         w = bbox[2] - bbox[0]
-        draw.text(((W - w) / 2, quote_y + 200), author_text, font=author_font, fill="black")
+        draw.text(((W - w) / 2, AUTHOR_Y), author_text, font=author_font, fill="black")
+
+    def template(self, date, date_font=None):
+        """该日期的静态模板层（背景 + 装饰 + 日期行），缓存的只读图像，调用方需 copy()。"""
+        date_font = date_font or self._load_fonts()[2]
+        key = (self.background_image, os.path.getmtime(self.background_image),
+               self.overlay_image, self.overlay_image and os.path.getmtime(self.overlay_image),
+               self.arial_regular_path, date)
+        image = _TEMPLATE_CACHE.get(key)
+        if image is not None:
+            _TEMPLATE_CACHE.move_to_end(key)
+            return image
+
+        image = _get_background(self.background_image).copy()
+        if self.overlay_image:
+            with Image.open(self.overlay_image) as overlay:
+                overlay = overlay.convert("RGBA")
+                image.paste(overlay, (0, 0), overlay)
+        self._draw_date(image, date_font, date)
+        _TEMPLATE_CACHE[key] = image
+        while len(_TEMPLATE_CACHE) > TEMPLATE_CACHE_SIZE:
+            _TEMPLATE_CACHE.popitem(last=False)
+        return image
+
+    def _compose(self, fonts, date, author, quote):
+        with METRICS.span("draw"):
+            image = self.template(date, fonts[2]).copy()
+            self._draw_text(image, fonts, author, quote)
+        return image
+
+    def render_key(self, date, author, quote, output_format):
+        """所有渲染输入（含模板、字体文件、排版参数与编码参数）的内容哈希。"""
+        engine = _get_layout_engine(self.notosans_path)
+        inputs = dict(
+            date=date, author=author, quote=quote, output_format=get_profile(output_format).cache_id(),
+            background=file_fingerprint(self.background_image),
+            fonts=[[file_fingerprint(self.notosans_path), 45],
+                   [file_fingerprint(self.arial_bold_italic_path), 32],
+                   [file_fingerprint(self.arial_regular_path), 30]],
+            layout=[LAYOUT_VERSION, engine.max_size, engine.min_size, engine.step, engine.spacing,
+                    QUOTE_MARGIN, QUOTE_BOX_HEIGHT, DATE_Y, QUOTE_Y, AUTHOR_Y],
+        )
+        # 没有装饰层时不写入，已有的缓存 key 保持不变
+        if self.overlay_image:
+            inputs["overlay"] = file_fingerprint(self.overlay_image)
+        return render_key(**inputs)
+
+    def _output_path(self, date, output_format):
+        safe_date = date.replace(".", "-")
+        return os.path.join(self.output_folder, f"quote_{safe_date}.{output_format}")
+
+    def _cache_filename(self, key, date, output_format):
+        safe_date = date.replace(".", "-")
+        return self.render_cache.filename(key, f"quote_{safe_date}", output_format)
+
+    @staticmethod
+    def _save(image, output_path, profile=None):
+        """按编码 profile 编码（默认由扩展名决定），先写临时文件再原子替换，中断时不会留下半张图。"""
+        if profile is None:
+            profile = get_profile(os.path.splitext(output_path)[1].lstrip("."))
+        QuoteGenerator._write(encode(image, profile), output_path)
+
+    @staticmethod
+    def _write(data, output_path):
+        tmp_path = output_path + ".part"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, output_path)
+
+    def render_canvas(self, date, author, quote):
+        """绘制好的 PIL 图像（未编码），背景图不存在时抛出 FileNotFoundError。"""
+        if not os.path.exists(self.background_image):
+            raise FileNotFoundError(self.background_image)
+        return self._compose(self._load_fonts(), date, author, quote)
+
+    def render(self, date, author, quote, output_format="jpeg"):
+        """在内存中绘制并编码，返回 RenderResult（不读写磁盘）；result.stream() 得到 BytesIO。"""
+        profile = get_profile(output_format)
+        start = time.perf_counter()
+        image = self.render_canvas(date, author, quote)
+        drawn = time.perf_counter()
+        data = encode(image, profile)
+        encoded = time.perf_counter()
+        return RenderResult(data, Image.MIME.get(profile.format, "application/octet-stream"),
+                            profile.extension, profile.name, drawn - start, encoded - drawn)
+
+    def generate(self, date, author, quote, output_format="jpeg"):
+        """render() 并保存到 output_folder，返回文件路径。
+
+        output_format 可以是格式扩展名，也可以是 encoding.py 中的 profile（名称或对象）。
+        """
+        if not os.path.exists(self.background_image):
+            print("cannot find background image")
+            return
+
+        # 出图缓存：相同输入直接返回已有文件
+        key = None
+        if self.render_cache is not None:
+            key = self.render_key(date, author, quote, output_format)
+            cached = self.render_cache.get(key)
+            if cached:
+                print(f"cache hit：{cached}")
+                return cached
+
+        result = self.render(date, author, quote, output_format)
 
         # 保存
-        output_path = os.path.join(self.output_folder, f"quote_{safe_date}.{output_format}")
+        if key is not None:
+            output_path = os.path.join(self.output_folder, self._cache_filename(key, date, result.extension))
+        else:
+            output_path = self._output_path(date, result.extension)
         print(f"saving image to：{output_path}")
-        image.save(output_path)
+        self._write(result.data, output_path)
+        if key is not None:
+            self.render_cache.put(key, output_path)
         print("image saved successfully")
+        return output_path
+
+    def generate_many(self, records, output_format="jpeg"):
+        """批量生成：字体只加载一次，每张图复制当天的模板层后只绘制正文和作者。
+
+        records 中每项可以是 (date, author, quote) 元组，或含 date/author/quote
+        （可选 output_format、filename）键的 dict。返回生成的文件路径列表。
+        """
+        if not os.path.exists(self.background_image):
+            print("cannot find background image")
+            return []
+
+        fonts = self._load_fonts()
+
+        paths = []
+        for rec in records:
+            if isinstance(rec, dict):
+                date, author, quote = rec["date"], rec["author"], rec["quote"]
+                fmt = rec.get("output_format", output_format)
+                filename = rec.get("filename")
+            else:
+                date, author, quote = rec
+                fmt = output_format
+                filename = None
+
+            profile = get_profile(fmt)
+            key = None
+            if not filename and self.render_cache is not None:
+                key = self.render_key(date, author, quote, profile)
+                cached = self.render_cache.get(key)
+                if cached:
+                    paths.append(cached)
+                    continue
+                filename = self._cache_filename(key, date, profile.extension)
+
+            image = self._compose(fonts, date, author, quote)
+            if filename:
+                output_path = os.path.join(self.output_folder, filename)
+            else:
+                output_path = self._output_path(date, profile.extension)
+            self._save(image, output_path, profile)
+            if key is not None:
+                self.render_cache.put(key, output_path)
+            paths.append(output_path)
+
+        return paths
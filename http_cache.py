@@ -0,0 +1,117 @@
+"""抓取用的磁盘 HTTP 缓存（按 URL 存 ETag / Last-Modified / 压缩后的页面）。
+
+Crawler 对缓存过的 URL 发条件请求（If-None-Match / If-Modified-Since）：
+服务器返回 304 时正文直接取自缓存，不再下载；页面内容没变（304 或正文 hash 相同）
+且上次解析出的下一页链接也已缓存时，连解析和入库都跳过，只按缓存的链接继续翻页。
+因此重复运行爬虫时只有变化过的页面会被传输和解析。
+"""
+import hashlib
+import json
+import sqlite3
+import time
+import zlib
+
+HTTP_CACHE_PATH = "http_cache.sqlite"
+
+CREATE_CACHE_TABLE = """
+CREATE TABLE IF NOT EXISTS http_cache (
+    url TEXT PRIMARY KEY,
+    etag TEXT,
+    last_modified TEXT,
+    digest TEXT NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    links TEXT,
+    fetched REAL NOT NULL
+)
+"""
+
+
+class CacheEntry:
+    __slots__ = ("url", "etag", "last_modified", "digest", "body", "size", "links")
+
+    def __init__(self, url, etag, last_modified, digest, body, size, links):
+        self.url = url
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+        self.body = body
+        self.size = size
+        self.links = links
+
+    @property
+    def text(self):
+        return zlib.decompress(self.body).decode("utf-8")
+
+
+def body_digest(text):
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    """URL → 页面缓存。hits 为 304 命中，unchanged 为 200 但内容未变，misses 为新页面或已变化的页面。"""
+
+    def __init__(self, path=HTTP_CACHE_PATH):
+        self.path = path
+        self.hits = 0
+        self.unchanged = 0
+        self.misses = 0
+        self.bytes_saved = 0
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(CREATE_CACHE_TABLE)
+
+    def get(self, url):
+        row = self.conn.execute(
+            "SELECT url, etag, last_modified, digest, body, size, links FROM http_cache WHERE url = ?",
+            (url,),
+        ).fetchone()
+        if row is None:
+            return None
+        links = json.loads(row[6]) if row[6] is not None else None
+        return CacheEntry(*row[:6], links)
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry is not None:
+            if entry.etag:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def put(self, url, text, etag=None, last_modified=None, links=None):
+        """保存页面；links 为解析出的下一页链接（解析完成后再写入）。"""
+        data = text.encode("utf-8")
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO http_cache (url, etag, last_modified, digest, body, size, links, fetched) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, etag, last_modified, hashlib.sha1(data).hexdigest(), zlib.compress(data),
+                 len(data), json.dumps(links) if links is not None else None, time.time()),
+            )
+
+    def confirm(self, url, links):
+        """页面内容已由下游确认入库后再写入链接（put() 时先不带链接）。"""
+        with self.conn:
+            self.conn.execute("UPDATE http_cache SET links = ? WHERE url = ?", (json.dumps(links), url))
+
+    def record(self, status, entry=None):
+        """按响应结果更新计数：'hit'（304）、'unchanged'（200 且 hash 相同）或 'miss'。"""
+        if status == "hit":
+            self.hits += 1
+            self.bytes_saved += entry.size
+        elif status == "unchanged":
+            self.unchanged += 1
+        else:
+            self.misses += 1
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM http_cache").fetchone()[0]
+
+    def __repr__(self):
+        return (f"HttpCache(hits={self.hits}, unchanged={self.unchanged}, misses={self.misses}, "
+                f"bytes_saved={self.bytes_saved})")
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,67 @@
+"""抓取脚本（scraper.py / scraper_goodreads.py）共用的逐页入库与结束汇总。
+
+每页一个 QuoteWriter 事务：完全相同的语录由 content_hash 唯一索引忽略，近似重复（署名、标点不同）
+由 neardup 跳过，超过长度限制的拒绝并计数，不影响同页其他语录。
+四类计数（新增 / 已存在 / 近似重复 / 被拒绝）每页打印一次，结束时由 report() 打印合计。
+
+    ingest = PageIngest(conn, frontier)
+    crawler.crawl(start_url, parse_page, ingest)   # parse_page 产出 [(author, text), ...]
+    ingest.report(crawler, cache)
+"""
+from collections import Counter
+
+from neardup import NearDupIndex
+from utils import QuoteWriter
+
+
+def day_date(day):
+    """第 day 条语录的日期：每月按 30 天排，从 2025.01.01 开始。"""
+    return f"2025.{(day - 1) // 30 + 1:02d}.{(day - 1) % 30 + 1:02d}"
+
+
+def _summary(counts):
+    return (f"{counts['added']} added, {counts['existed']} already existed, "
+            f"{counts['near_duplicates']} near duplicates, {counts['rejected']} rejected (too long)")
+
+
+class PageIngest:
+    """Crawler 的 handle_items 回调；first_day 为第一条语录用的日期序号（见 day_date）。"""
+
+    def __init__(self, conn, frontier, first_day=1):
+        self.conn = conn
+        self.frontier = frontier
+        self.neardup = NearDupIndex(conn)
+        self.day = first_day
+        self.pages = 0
+        self.totals = Counter()
+        if self.neardup.backfilled:
+            print(f"Indexed {self.neardup.backfilled} existing quotes for near-duplicate detection.")
+
+    def __call__(self, url, items):
+        rejected = 0
+        with QuoteWriter(self.conn, neardup=self.neardup) as writer:
+            for author, text in items:
+                date = day_date(self.day)
+                self.day += 1
+                try:
+                    writer.add(date, author, text)
+                except ValueError:
+                    rejected += 1
+        counts = Counter(added=writer.inserted, near_duplicates=writer.near_duplicates, rejected=rejected,
+                         existed=len(items) - writer.inserted - writer.near_duplicates - rejected)
+        self.pages += 1
+        self.totals.update(counts)
+        print(f"{url}: {_summary(counts)}")
+        self.frontier.record(url, len(items), writer.inserted)
+
+    def report(self, crawler, cache=None):
+        """抓取结束后的汇总：续抓 / 提前结束 / 缓存命中，以及各类计数的合计。"""
+        if self.frontier.resumed:
+            print("Resumed from the last checkpoint.")
+        if self.frontier.exhausted:
+            print(f"Stopped early: {self.frontier.stale_limit} pages in a row had no new quotes.")
+        if cache is not None:
+            print(f"HTTP cache: {crawler.stats.cached} unchanged pages skipped, {cache!r}")
+        if crawler.stats.errors:
+            print(f"Failed pages (download or parse errors): {crawler.stats.errors}")
+        print(f"Total: {self.pages} pages, {_summary(self.totals)}")
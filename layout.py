@@ -0,0 +1,172 @@
+"""正文排版：按像素宽度断行，并自动缩小字号以放进模板区域。
+
+每个字体只测量一次字符宽度（advance width 表），之后断行只做查表求和；
+同一 (text, 字体, 区域) 的排版结果会被缓存。LayoutEngine.stats 记录排版耗时，
+便于和整张图的渲染耗时对比。
+"""
+import time
+from collections import OrderedDict, namedtuple
+
+from metrics import METRICS
+
+Layout = namedtuple("Layout", "lines widths font_size line_height width height overflow")
+
+WORD_CACHE_SIZE = 100000
+# 断行、缩字号等排版规则有改动时加 1：出图缓存的 key 包含它，旧的缓存图随之失效
+LAYOUT_VERSION = 1
+
+
+# ---------- 字宽表 ----------
+class AdvanceTable:
+    """单个字体的字符宽度缓存：每个字符只调用一次 font.getlength()。"""
+
+    def __init__(self, font):
+        self.font = font
+        self._widths = {}
+        self._words = {}
+
+    def char(self, ch):
+        w = self._widths.get(ch)
+        if w is None:
+            w = self._widths[ch] = self.font.getlength(ch)
+        return w
+
+    def text(self, s):
+        widths = self._widths
+        total = 0.0
+        for ch in s:
+            w = widths.get(ch)
+            if w is None:
+                w = self.char(ch)
+            total += w
+        return total
+
+    def word(self, s):
+        """单词宽度；自然语言里单词重复率很高，按单词再缓存一层（满了就清空）。"""
+        w = self._words.get(s)
+        if w is None:
+            if len(self._words) >= WORD_CACHE_SIZE:
+                self._words.clear()
+            w = self._words[s] = self.text(s)
+        return w
+
+
+class LayoutStats:
+    def __init__(self):
+        self.calls = 0
+        self.hits = 0
+        self.seconds = 0.0
+
+    def __repr__(self):
+        return f"LayoutStats(calls={self.calls}, hits={self.hits}, seconds={self.seconds:.4f})"
+
+
+# ---------- 排版引擎 ----------
+class LayoutEngine:
+    """font_loader(size) 返回该字号的字体对象（一般传入带缓存的加载函数）。"""
+
+    def __init__(self, font_loader, font_id, max_size=45, min_size=24, step=3,
+                 spacing=10, cache_size=4096):
+        self.font_loader = font_loader
+        self.font_id = font_id
+        self.max_size = max_size
+        self.min_size = min_size
+        self.step = step
+        self.spacing = spacing
+        self.cache_size = cache_size
+        self.stats = LayoutStats()
+        self._tables = {}
+        self._line_heights = {}
+        self._cache = OrderedDict()
+
+    def table(self, size):
+        t = self._tables.get(size)
+        if t is None:
+            t = self._tables[size] = AdvanceTable(self.font_loader(size))
+        return t
+
+    def line_height(self, size):
+        # 与 Pillow multiline_text 的行距算法一致："A" 的底边 + spacing
+        lh = self._line_heights.get(size)
+        if lh is None:
+            lh = self._line_heights[size] = self.table(size).font.getbbox("A")[3] + self.spacing
+        return lh
+
+    def break_lines(self, text, size, max_width):
+        """贪心断行：按词累加像素宽度，超长的单词按字符拆开。返回 (lines, widths)。"""
+        table = self.table(size)
+        space = table.char(" ")
+        cached_width = table._words.get
+        lines, widths = [], []
+        cur, cur_w = [], 0.0
+
+        for word in text.split():
+            w = cached_width(word)
+            if w is None:
+                w = table.word(word)
+            if w > max_width:
+                # 超长单词：先结束当前行，再按字符切块
+                if cur:
+                    lines.append(" ".join(cur)); widths.append(cur_w)
+                    cur, cur_w = [], 0.0
+                chunk, chunk_w = "", 0.0
+                for ch in word:
+                    cw = table.char(ch)
+                    if chunk and chunk_w + cw > max_width:
+                        lines.append(chunk); widths.append(chunk_w)
+                        chunk, chunk_w = "", 0.0
+                    chunk += ch
+                    chunk_w += cw
+                cur, cur_w = [chunk], chunk_w
+                continue
+            if cur and cur_w + space + w > max_width:
+                lines.append(" ".join(cur)); widths.append(cur_w)
+                cur, cur_w = [word], w
+            else:
+                cur_w = cur_w + space + w if cur else w
+                cur.append(word)
+
+        if cur:
+            lines.append(" ".join(cur)); widths.append(cur_w)
+        return lines, widths
+
+    def layout(self, text, box_width, box_height):
+        """从 max_size 开始逐级缩小字号直到放进 box；最小字号仍放不下时 overflow=True。"""
+        key = (text, self.font_id, box_width, box_height)
+        cached = self._cache.get(key)
+        self.stats.calls += 1
+        if cached is not None:
+            self._cache.move_to_end(key)
+            self.stats.hits += 1
+            return cached
+
+        start = time.perf_counter()
+        passes = {}
+
+        def attempt(size):
+            result = passes.get(size)
+            if result is None:
+                lines, widths = self.break_lines(text, size, box_width)
+                lh = self.line_height(size)
+                height = lh * len(lines) - self.spacing if lines else 0
+                result = passes[size] = (lines, widths, lh, height, height <= box_height)
+            return result
+
+        sizes = range(self.max_size, self.min_size - 1, -self.step) or (self.max_size,)
+        # 最大字号放不下时先试最小字号：最小字号也放不下（长语录）就直接是结果，
+        # 不必逐级尝试中间的字号；结果与逐级缩小完全相同
+        if not attempt(sizes[0])[4] and not attempt(sizes[-1])[4]:
+            size = sizes[-1]
+        else:
+            size = next(s for s in sizes if attempt(s)[4])
+        lines, widths, lh, height, fits = attempt(size)
+
+        result = Layout(lines, widths, size, lh, max(widths, default=0), height, not fits)
+        elapsed = time.perf_counter() - start
+        self.stats.seconds += elapsed
+        METRICS.observe("text_layout", elapsed)
+
+        self._cache[key] = result
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return result
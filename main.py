@@ -3,37 +3,31 @@ from datetime import datetime
 import re
 import importlib.util
 import os
-import time
-import requests
-from bs4 import BeautifulSoup
-from urllib.parse import urljoin, urlparse
-import scraper  # 你的专用爬虫（已支持 quotes.toscrape.com）
+from metrics import profiled, write_from_env
+from utils import (SELECT_QUOTE_BY_ID_SQL, QuoteWriter, get_connection, insert_quote, sample_quotes,
+                   search_quotes)
 
-# === 强制从本地 generator.py 加载 QuoteGenerator ===
+# 重依赖（PIL / requests / bs4）只在需要的模式里加载，见 _new_generator() 与 scrape_from_website()
+
+# === 强制从本地 generator.py 加载 QuoteGenerator（首次出图时才加载）===
 gen_path = os.path.join(os.path.dirname(__file__), "generator.py")
-spec = importlib.util.spec_from_file_location("generator", gen_path)
-generator_module = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(generator_module)
-QuoteGenerator = generator_module.QuoteGenerator
+_generator_module = None
+
+def _new_generator():
+    global _generator_module
+    if _generator_module is None:
+        spec = importlib.util.spec_from_file_location("generator", gen_path)
+        _generator_module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(_generator_module)
+    from render_cache import RenderCache
+    return _generator_module.QuoteGenerator(render_cache=RenderCache("outputs"))
 # === 结束 ===
 
 DB_PATH = "quotes.db"
 MAX_PAGES = 50         # 默认最多翻 50 页，按需可调
-REQUEST_DELAY = 0.8    # 礼貌等待，避免请求过快
-
-# ---------- 公共工具 ----------
-def _list_columns(conn):
-    cur = conn.cursor()
-    cur.execute("PRAGMA table_info(quotes)")
-    return [r[1] for r in cur.fetchall()]
-
-def _detect_date_column(conn):
-    cols = _list_columns(conn)
-    if "date" in cols:
-        return "date"
-    if "quote_date" in cols:
-        return "quote_date"
-    return None
+REQUEST_DELAY = 0.8    # 礼貌等待：同一域名两次请求的最小间隔（令牌桶速率 = 1 / REQUEST_DELAY）
+CRAWL_CONCURRENCY = 4  # 并发连接数上限
+HTTP_CACHE_PATH = "http_cache.sqlite"  # 抓取缓存（ETag / Last-Modified + 页面正文）
 
 # ---------- 功能 1：Manual input ----------
 def manual_mode(conn):
@@ -60,23 +54,22 @@ def manual_mode(conn):
     author = input("Please enter author name: ").strip()
     quote = input("Please enter quotes: ").strip()
 
-    gen = QuoteGenerator()
+    gen = _new_generator()
     gen.generate(date=date_str, author=author, quote=quote, output_format="jpeg")
 
-    save_quote(conn, date_str, author, quote)
+    try:
+        save_quote(conn, date_str, author, quote)
+    except sqlite3.IntegrityError as e:
+        # 长度触发器（max 25）拒绝入库，图片已生成
+        print(f"⚠️ Image generated, but quote not saved: {e}\n")
+        return
     print("✅ Quote saved and image generated!\n")
 
 # ---------- 功能 2：From database（支持按 n 换一批） ----------
 def from_db_mode(conn):
-    date_col = _detect_date_column(conn)
-    cur = conn.cursor()
-
     def fetch_batch(limit=5):
-        if date_col:
-            cur.execute(f"SELECT id, {date_col}, author, quote FROM quotes ORDER BY RANDOM() LIMIT {limit}")
-        else:
-            cur.execute(f"SELECT id, author, quote FROM quotes ORDER BY RANDOM() LIMIT {limit}")
-        return cur.fetchall()
+        # 按主键随机探测，刷新耗时与表大小无关
+        return sample_quotes(conn, limit, "id, quote_date, author, quote")
 
     while True:
         rows = fetch_batch(5)
@@ -85,12 +78,8 @@ def from_db_mode(conn):
             return
 
         print("\nAvailable Quotes:")
-        if date_col:
-            for row in rows:
-                print(f"{row[0]}: [{row[1]}] {row[2]} - {row[3][:50]}...")
-        else:
-            for row in rows:
-                print(f"{row[0]}: {row[1]} - {row[2][:50]}...")
+        for row in rows:
+            print(f"{row[0]}: [{row[1]}] {row[2]} - {row[3][:50]}...")
 
         user_in = input("\nEnter ID to generate image, or press 'n' to refresh, 'q' to cancel: ").strip().lower()
 
@@ -106,152 +95,62 @@ def from_db_mode(conn):
             print("❌ Invalid input. Please enter a valid ID, 'n', or 'q'.")
             continue
 
-        if date_col:
-            cur.execute(f"SELECT {date_col}, author, quote FROM quotes WHERE id=?", (selected_id,))
-            result = cur.fetchone()
-            if not result:
-                print("❌ ID not found.")
-                continue
-            date, author, quote = result
-            if not date:
-                date = datetime.today().strftime("%Y.%m.%d")
-        else:
-            cur.execute("SELECT author, quote FROM quotes WHERE id=?", (selected_id,))
-            result = cur.fetchone()
-            if not result:
-                print("❌ ID not found.")
-                continue
-            author, quote = result
-            date = datetime.today().strftime("%Y.%m.%d")
-
-        gen = QuoteGenerator()
-        gen.generate(date, author, quote)
-        print("✅ Image generated!\n")
-        return
+        if generate_by_id(conn, selected_id):
+            return
 
-# ---------- 保存到数据库（兼容旧列名） ----------
-def save_quote(conn, date, author, quote):
-    cols = _list_columns(conn)
+# ---------- 功能 4：Search（全文检索，按相关度排序） ----------
+def search_mode(conn):
+    print("\nSearch Mode（关键词支持前缀匹配，author:名字 只搜作者，如 “stay hun author:jobs”）")
+    while True:
+        text = input("\nSearch quotes ('q' to cancel): ").strip()
+        if text.lower() == "q":
+            print("Canceled.")
+            return
 
-    insert_cols, params = [], []
-    if "date" in cols:
-        insert_cols.append("date"); params.append(date)
-    if "quote_date" in cols:
-        insert_cols.append("quote_date"); params.append(date)
+        rows = search_quotes(conn, text, limit=10)
+        if not rows:
+            print("⚠️ No matching quotes.")
+            continue
 
-    insert_cols.extend(["author", "quote"])
-    params.extend([author, quote])
+        print("\nBest matches:")
+        for _id, date, author, quote, _score in rows:
+            print(f"{_id}: [{date}] {author} - {quote[:50]}...")
 
-    placeholders = ",".join(["?"] * len(insert_cols))
-    sql = f"INSERT INTO quotes ({', '.join(insert_cols)}) VALUES ({placeholders})"
+        user_in = input("\nEnter ID to generate image, or press Enter to search again: ").strip()
+        if not user_in:
+            continue
+        try:
+            selected_id = int(user_in)
+        except ValueError:
+            print("❌ Invalid input. Please enter a valid ID.")
+            continue
 
-    cur = conn.cursor()
-    cur.execute(sql, params)
-    conn.commit()
+        if generate_by_id(conn, selected_id):
+            return
 
-# ---------- 初始化数据库（保持兼容旧库） ----------
-def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS quotes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            date TEXT,
-            author TEXT,
-            quote TEXT
-        )
-    """)
-    conn.commit()
-
-    cur.execute("PRAGMA table_info(quotes)")
-    cols = [r[1] for r in cur.fetchall()]
-    if "date" not in cols:
-        try:
-            cur.execute("ALTER TABLE quotes ADD COLUMN date TEXT")
-            conn.commit()
-        except sqlite3.OperationalError:
-            pass
+# ---------- 按 ID 出图（功能 2 / 4 共用） ----------
+def generate_by_id(conn, selected_id):
+    result = conn.execute(SELECT_QUOTE_BY_ID_SQL, (selected_id,)).fetchone()
+    if not result:
+        print("❌ ID not found.")
+        return False
+    date, author, quote = result
+    if not date:
+        date = datetime.today().strftime("%Y.%m.%d")
+
+    gen = _new_generator()
+    gen.generate(date, author, quote)
+    print("✅ Image generated!\n")
+    return True
+
+# ---------- 保存到数据库 ----------
+def save_quote(conn, date, author, quote):
+    # 相同内容（content_hash 唯一索引）直接忽略；新语录同时记录近似重复签名
+    return insert_quote(conn, date, author, quote)
 
-    return conn
-
-# ---------- 通用解析：抽取页面上的 quotes ----------
-def _extract_quotes_from_soup(soup):
-    extracted = []
-
-    # .quote 结构
-    for q in soup.select(".quote"):
-        t = q.select_one(".text")
-        a = q.select_one(".author")
-        if t and a:
-            text = " ".join(t.stripped_strings).strip('“”"')
-            author = " ".join(a.stripped_strings)
-            if text:
-                extracted.append((author, text))
-
-    # blockquote + cite / 或 “— Author”
-    for bq in soup.find_all("blockquote"):
-        text = " ".join(bq.stripped_strings)
-        if not text:
-            continue
-        author = None
-        cite = bq.find("cite")
-        if cite:
-            author = " ".join(cite.stripped_strings)
-        if not author:
-            m = re.search(r"[—\-–]\s*([^—\-–]{2,})$", text)
-            if m:
-                author = m.group(1).strip()
-                text = text[:m.start()].strip()
-        if text:
-            extracted.append((author or "Unknown", text.strip('“”"')))
-
-    # Goodreads 风格 .quoteText
-    for div in soup.select(".quoteText"):
-        full = " ".join(div.stripped_strings)
-        m = re.match(r"[“\"](.+?)[”\"]\s*[―\-–]\s*(.+)$", full)
-        if m:
-            text = m.group(1).strip()
-            author = m.group(2).strip()
-            extracted.append((author, text))
-
-    # 清洗与页面内去重
-    seen, cleaned = set(), []
-    for author, text in extracted:
-        key = (author.strip().lower(), text.strip().lower())
-        if key not in seen and len(text) >= 5:
-            seen.add(key)
-            cleaned.append((author.strip(), text.strip()))
-    return cleaned
-
-# ---------- 通用解析：发现“下一页”链接 ----------
-def _find_next_url(soup, base_url):
-    # 1) <link rel="next" href="...">
-    link = soup.find("link", attrs={"rel": re.compile(r"\bnext\b", re.I)})
-    if link and link.get("href"):
-        return urljoin(base_url, link["href"])
-
-    # 2) <a rel="next">、class 含 next
-    a = soup.find("a", attrs={"rel": re.compile(r"\bnext\b", re.I)})
-    if a and a.get("href"):
-        return urljoin(base_url, a["href"])
-    a = soup.find("a", class_=re.compile("next", re.I))
-    if a and a.get("href"):
-        return urljoin(base_url, a["href"])
-
-    # 3) 文本是“next / 下一页 / › / »”
-    a = soup.find("a", string=re.compile(r"^\s*(next|下一页|›|»)\s*$", re.I))
-    if a and a.get("href"):
-        return urljoin(base_url, a["href"])
-
-    # 4) 常见分页 li.next > a
-    li = soup.find("li", class_=re.compile("next", re.I))
-    if li:
-        a = li.find("a")
-        if a and a.get("href"):
-            return urljoin(base_url, a["href"])
-
-    return None
+# ---------- 初始化数据库（旧库由 migrations.py 升级到统一结构） ----------
+def init_db():
+    return get_connection(DB_PATH)
 
 # ---------- 功能 3：Scrape from website（自动翻页） ----------
 def scrape_from_website(conn):
@@ -260,75 +159,81 @@ def scrape_from_website(conn):
     if not re.match(r"^https?://", url, re.I):
         url = "https://" + url
 
-    # 限定在同一域名内抓取
-    start_host = urlparse(url).netloc.lower()
-
-    # 专用：quotes.toscrape.com 用你的爬虫（它自己会翻页、去重、入库）
-    if re.search(r"(^|\.)quotes\.toscrape\.com", start_host, re.I):
-        print("Using built-in scraper for quotes.toscrape.com ...")
-        try:
-            scraper.scrape_quotes()
-            print("✅ Scraping finished via custom scraper.")
-        except Exception as e:
-            print(f"❌ Custom scraper failed: {e}")
+    from crawler import Crawler
+    from extract import extract_page
+    from frontier import CrawlFrontier
+    from http_cache import HttpCache
+    from neardup import NearDupIndex
+    from sites import adapter_for
+
+    # 有站点适配器（sites.py）的用它的精确选择器，其余站点走通用抽取
+    adapter = adapter_for(url)
+    if adapter is not None:
+        print(f"Using site adapter: {adapter.name}")
+
+    totals = {"pages": 0, "new": 0, "skipped": 0, "near_duplicates": 0, "unscrapable": False}
+    today = datetime.today().strftime("%Y.%m.%d")
+
+    def parse_page(page_url, html):
+        if adapter is not None:
+            return adapter.parse(page_url, html)
+        quotes, nxt = extract_page(html, page_url)
+        return quotes, [nxt] if nxt else []
+
+    def handle_items(page_url, cleaned):
+        totals["pages"] += 1
+        if totals["pages"] == 1 and not cleaned:
+            totals["unscrapable"] = True
+            return False
+
+        # 入库（每页一个事务），重复内容由 content_hash 唯一索引忽略，近似重复由 neardup 跳过，超长的跳过
+        with QuoteWriter(conn, neardup=near_dups) as writer:
+            for author, text in cleaned:
+                try:
+                    writer.add(today, author, text)
+                except ValueError:
+                    pass
+        new_count = writer.inserted
+        skipped = len(cleaned) - new_count
+
+        totals["new"] += new_count
+        totals["skipped"] += skipped
+        totals["near_duplicates"] += writer.near_duplicates
+        print(f"Page {totals['pages']} ({page_url}): 新增 {new_count} 条，跳过 {skipped} 条")
+        frontier.record(page_url, len(cleaned), new_count)
+
+    # 重复抓取同一站点时，未变化的页面走 304 / 缓存，不再下载和入库
+    # 中断后从上次的进度继续；连续几页都没有新语录时提前结束
+    cache = HttpCache(HTTP_CACHE_PATH)
+    near_dups = NearDupIndex(conn)
+    if near_dups.backfilled:
+        print(f"🔎 已为 {near_dups.backfilled} 条已有语录建立近似重复索引。")
+    # 抓取进度（crawl_frontier）按起始 URL 记录：换了起始页就是一次新的抓取
+    frontier = CrawlFrontier(conn, url)
+    settings = {"concurrency": CRAWL_CONCURRENCY, "rate_per_host": 1 / REQUEST_DELAY, "max_pages": MAX_PAGES}
+    if adapter is not None:
+        settings.update(adapter.crawl)
+    crawler = Crawler(**settings, cache=cache, frontier=frontier)
+    try:
+        crawler.crawl(url, parse_page, handle_items)
+    finally:
+        cache.close()
+
+    if crawler.stats.pages == 0 and crawler.stats.errors:
+        print(f"❌ 拉取失败：{url} 无法访问，没有抓到任何页面。")
         return
-
-    visited = set()
-    page_count = 0
-    total_new, total_skipped = 0, 0
-    next_url = url
-
-    while next_url and page_count < MAX_PAGES:
-        # 域名保护
-        if urlparse(next_url).netloc.lower() != start_host:
-            break
-        if next_url in visited:
-            break
-
-        print(f"Fetching: {next_url}")
-        visited.add(next_url)
-        page_count += 1
-
-        try:
-            resp = requests.get(next_url, timeout=15, headers={"User-Agent": "quote-generator/1.0"})
-        except Exception as e:
-            print(f"❌ 请求失败：{e}")
-            break
-
-        if resp.status_code != 200 or not resp.text:
-            print(f"❌ 拉取失败，HTTP {resp.status_code}")
-            break
-
-        soup = BeautifulSoup(resp.text, "html.parser")
-        cleaned = _extract_quotes_from_soup(soup)
-
-        if page_count == 1 and not cleaned:
-            print("⚠️ 未检测到可识别的 quote 结构，或该网站不可爬取。")
-            return
-
-        # 与数据库去重后入库
-        cur = conn.cursor()
-        today = datetime.today().strftime("%Y.%m.%d")
-        new_count, skipped = 0, 0
-        for author, text in cleaned:
-            cur.execute("SELECT COUNT(*) FROM quotes WHERE quote=? AND author=?", (text, author))
-            if cur.fetchone()[0]:
-                skipped += 1
-                continue
-            save_quote(conn, today, author, text)
-            new_count += 1
-
-        total_new += new_count
-        total_skipped += skipped
-        print(f"Page {page_count}: 新增 {new_count} 条，跳过 {skipped} 条")
-
-        # 找下一页
-        nxt = _find_next_url(soup, next_url)
-        next_url = None if not nxt or nxt in visited else nxt
-
-        time.sleep(REQUEST_DELAY)
-
-    print(f"✅ 爬取完成：共处理 {page_count} 页，新增 {total_new} 条，跳过 {total_skipped} 条。")
+    if totals["unscrapable"]:
+        print("⚠️ 未检测到可识别的 quote 结构，或该网站不可爬取。")
+        return
+    print(f"✅ 爬取完成：共处理 {totals['pages']} 页，新增 {totals['new']} 条，跳过 {totals['skipped']} 条。")
+    if totals["near_duplicates"]:
+        print(f"🔁 其中 {totals['near_duplicates']} 条与已有语录近似重复（标点、署名、省略号等不同）。")
+    if frontier.resumed:
+        print("↩️ 已从上次中断的位置继续抓取。")
+    if frontier.exhausted:
+        print(f"⏹️ 连续 {frontier.stale_limit} 页没有新语录，提前结束。")
+    if crawler.stats.cached:
+        print(f"♻️ {crawler.stats.cached} 页未变化（缓存命中 {cache.hits}，节省 {cache.bytes_saved / 1024:.1f} KB）")
 
 # ---------- 主菜单 ----------
 def main():
@@ -338,15 +243,18 @@ def main():
     print("1. Manual input")
     print("2. From database")
     print("3. Scrape from website")
-
-    choice = input("Please enter 1, 2, or 3: ").strip()
-
-    if choice == "1":
-        manual_mode(conn)
-    elif choice == "2":
-        from_db_mode(conn)
-    elif choice == "3":
-        scrape_from_website(conn)
+    print("4. Search quotes")
+
+    choice = input("Please enter 1, 2, 3, or 4: ").strip()
+
+    modes = {"1": ("manual", manual_mode), "2": ("database", from_db_mode),
+             "3": ("scrape", scrape_from_website), "4": ("search", search_mode)}
+    if choice in modes:
+        # QUOTES_PROFILE=1 时对所选模式做 cProfile；QUOTES_METRICS=<文件> 时导出各阶段耗时
+        name, run = modes[choice]
+        with profiled(name):
+            run(conn)
+        write_from_env()
     else:
         print("❌ Invalid choice.")
 
@@ -0,0 +1,223 @@
+"""进程内的计时与计数：抓取、入库、出图各阶段的耗时分布，可导出为 JSON 或 Prometheus 文本格式。
+
+    from metrics import METRICS
+    with METRICS.span("http_fetch"):
+        ...
+    METRICS.inc("quotes_inserted", n)
+    METRICS.write("metrics.prom")          # .json 写 JSON，其他扩展名写 Prometheus 文本格式
+    print(METRICS.report())                # 各阶段次数、总耗时、均值、p50/p99 与占比
+
+已埋点的 span：http_fetch、html_parse、dedup_query、db_insert、font_load、text_layout、
+draw（复制模板层 + 绘制正文与作者，包含 text_layout）、encode。
+worker 进程中的指标用 drain() 取出传回主进程，再 merge()。
+
+cProfile：`with profiled("scrape"):` 在设置了环境变量 QUOTES_PROFILE（或 enabled=True）时
+对这段代码做 cProfile，结果写到 profiles/<mode>.prof 并打印累计耗时最多的函数。
+环境变量 QUOTES_METRICS=<文件> 时，main.py 等入口在结束时把指标写到该文件。
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+PROFILE_ENV = "QUOTES_PROFILE"
+METRICS_ENV = "QUOTES_METRICS"
+PROFILE_DIR = "profiles"
+PREFIX = "quotes_"
+
+# 秒；最后一个桶之后是 +Inf
+DEFAULT_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """固定桶的耗时直方图（与 Prometheus histogram 相同的桶语义：value <= le）。"""
+    __slots__ = ("buckets", "counts", "count", "sum")
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """按桶估计分位数（返回所在桶的上界；落在最后一个桶时返回 inf）。"""
+        if not self.count:
+            return 0.0
+        target, seen = q * self.count, 0
+        for le, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return le
+        return float("inf")
+
+
+class _Span:
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+        if exc_type is not None:
+            self.metrics.inc(f"{self.name}_errors")
+
+
+class Metrics:
+    """计数器 + span 耗时直方图；线程安全（抓取和编码会在线程池里记录）。"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counters = {}
+        self.histograms = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name, seconds):
+        with self._lock:
+            h = self.histograms.get(name)
+            if h is None:
+                h = self.histograms[name] = Histogram(self.buckets)
+            h.observe(seconds)
+
+    def span(self, name):
+        """with METRICS.span("encode"): ...  记录这段代码的耗时；抛出异常时另计 <name>_errors。"""
+        return _Span(self, name)
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    # ----- 跨进程汇总 -----
+    def snapshot(self):
+        """可 pickle 的快照：{"counters": {...}, "histograms": {name: (counts, count, sum)}}。"""
+        with self._lock:
+            return {"counters": dict(self.counters),
+                    "histograms": {k: (list(h.counts), h.count, h.sum) for k, h in self.histograms.items()}}
+
+    def drain(self):
+        """取出快照并清零（worker 每完成一批调用一次，避免重复汇总）。"""
+        with self._lock:
+            snap = {"counters": self.counters,
+                    "histograms": {k: (h.counts, h.count, h.sum) for k, h in self.histograms.items()}}
+            self.counters, self.histograms = {}, {}
+        return snap
+
+    def merge(self, snap):
+        with self._lock:
+            for name, value in snap["counters"].items():
+                self.counters[name] = self.counters.get(name, 0) + value
+            for name, (counts, count, total) in snap["histograms"].items():
+                h = self.histograms.get(name)
+                if h is None:
+                    h = self.histograms[name] = Histogram(self.buckets)
+                h.counts = [a + b for a, b in zip(h.counts, counts)]
+                h.count += count
+                h.sum += total
+
+    # ----- 导出 -----
+    def to_dict(self):
+        snap = self.snapshot()
+        spans = {}
+        for name, h in sorted(self.histograms.items()):
+            spans[name] = {"count": h.count, "seconds": round(h.sum, 6),
+                           "mean_ms": round(h.sum / h.count * 1000, 4) if h.count else 0.0,
+                           "p50_ms": h.quantile(0.5) * 1000, "p99_ms": h.quantile(0.99) * 1000,
+                           "buckets": dict(zip([str(b) for b in self.buckets] + ["+Inf"],
+                                               snap["histograms"][name][0]))}
+        return {"counters": dict(sorted(snap["counters"].items())), "spans": spans}
+
+    def to_prometheus(self, prefix=PREFIX):
+        snap = self.snapshot()
+        lines = []
+        for name, value in sorted(snap["counters"].items()):
+            metric = f"{prefix}{name}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        if snap["histograms"]:
+            metric = f"{prefix}span_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for name, (counts, count, total) in sorted(snap["histograms"].items()):
+                cumulative = 0
+                for le, n in zip([repr(b) for b in self.buckets] + ["+Inf"], counts):
+                    cumulative += n
+                    lines.append(f'{metric}_bucket{{span="{name}",le="{le}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{span="{name}"}} {total!r}')
+                lines.append(f'{metric}_count{{span="{name}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        """按扩展名写 JSON（.json）或 Prometheus 文本格式（其他）。"""
+        import json
+        text = (json.dumps(self.to_dict(), indent=2) if path.endswith(".json") else self.to_prometheus())
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+        return path
+
+    def report(self):
+        """给人看的汇总表：按总耗时降序，占比相对于耗时最多的 span（span 可以嵌套）。"""
+        with self._lock:
+            rows = sorted(self.histograms.items(), key=lambda kv: -kv[1].sum)
+            counters = sorted(self.counters.items())
+        if not rows and not counters:
+            return "(no metrics recorded)"
+        top = rows[0][1].sum if rows else 0.0
+        lines = [f"{'span':22s} {'count':>8s} {'total s':>9s} {'mean ms':>9s} {'p50 ms':>8s} {'p99 ms':>8s} {'share':>6s}"]
+        for name, h in rows:
+            lines.append(f"{name:22s} {h.count:8d} {h.sum:9.3f} {h.sum / h.count * 1000:9.3f} "
+                         f"{h.quantile(0.5) * 1000:8.2f} {h.quantile(0.99) * 1000:8.2f} "
+                         f"{h.sum / top if top else 0:6.1%}")
+        for name, value in counters:
+            lines.append(f"{name:22s} {value:8d}")
+        return "\n".join(lines)
+
+
+METRICS = Metrics()
+
+
+def write_from_env(metrics=METRICS):
+    """设置了 QUOTES_METRICS 时把指标写到该文件，返回路径（未设置时返回 None）。"""
+    path = os.environ.get(METRICS_ENV)
+    if not path:
+        return None
+    metrics.write(path)
+    print(f"📈 Metrics written to {path}")
+    return path
+
+
+@contextmanager
+def profiled(mode, enabled=None, out_dir=PROFILE_DIR, top=15):
+    """对一个模式（一次抓取、一批出图……）做 cProfile；enabled 为 None 时看 QUOTES_PROFILE。"""
+    if enabled is None:
+        enabled = bool(os.environ.get(PROFILE_ENV))
+    if not enabled:
+        yield None
+        return
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        os.makedirs(out_dir, exist_ok=True)
+        path = os.path.join(out_dir, f"{mode}.prof")
+        profiler.dump_stats(path)
+        print(f"\n📊 cProfile for {mode!r} written to {path} (python -m pstats {path})")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
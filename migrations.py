@@ -0,0 +1,222 @@
+"""quotes.db 版本化迁移。
+
+任何历史版本的 quotes.db（main.py 旧版建的 date 列、utils.py 建的 quote_date 列，
+或两者都有）都会被收敛到同一个规范结构：
+
+    quotes(id, quote_date, author, quote, content_hash)
+    + content_hash 唯一索引（每行都有 hash，重复行在迁移时删除）、quote_date / author 索引、长度触发器
+    + crawl_frontier 抓取进度表（见 frontier.py）
+    + quotes_fts 全文索引（FTS5，触发器同步，见 utils.search_quotes）
+    + quote_minhash / quote_lsh 近似重复索引（见 neardup.py）
+    + quote_fit 出图排版预检结果（见 render_fit.py）
+
+当前版本记录在 schema_version 表中，每个迁移在自己的事务里执行，只执行一次。
+之后所有代码都可以直接使用固定 SQL（sqlite3 会按 SQL 文本缓存预编译语句），
+不再需要运行时 PRAGMA 探测。
+"""
+import sqlite3
+
+from utils import (CREATE_CONTENT_HASH_INDEX, CREATE_FTS_TABLE, CREATE_FTS_TRIGGER_DELETE,
+                   CREATE_FTS_TRIGGER_INSERT, CREATE_FTS_TRIGGER_UPDATE, CREATE_LENGTH_CHECK_TRIGGER_INSERT,
+                   CREATE_LENGTH_CHECK_TRIGGER_UPDATE, CREATE_TABLE_QUERY, content_hash)
+
+CREATE_SCHEMA_VERSION = "CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"
+
+
+def _columns(conn, table):
+    return [r[1] for r in conn.execute(f"PRAGMA table_info({table})")]
+
+
+# ---------- 迁移 1：统一 quotes 表结构 ----------
+def _canonical_table(conn):
+    cols = _columns(conn, "quotes")
+    if not cols:
+        conn.execute(CREATE_TABLE_QUERY)
+        return
+    if cols == ["id", "quote_date", "author", "quote", "content_hash"]:
+        return
+
+    # 旧库：按列是否存在拼出取值表达式，date 优先（main.py 写入时两列相同）
+    if "date" in cols and "quote_date" in cols:
+        date_expr = "COALESCE(NULLIF(date, ''), quote_date, '')"
+    elif "date" in cols:
+        date_expr = "COALESCE(date, '')"
+    else:
+        date_expr = "COALESCE(quote_date, '')"
+    hash_expr = "content_hash" if "content_hash" in cols else "NULL"
+
+    conn.execute("ALTER TABLE quotes RENAME TO quotes_old")
+    conn.execute(CREATE_TABLE_QUERY)
+    conn.execute(f"""
+        INSERT INTO quotes (id, quote_date, author, quote, content_hash)
+        SELECT id, {date_expr}, COALESCE(author, ''), COALESCE(quote, ''), {hash_expr}
+        FROM quotes_old ORDER BY id
+    """)
+    conn.execute("DROP TABLE quotes_old")
+
+
+# ---------- 迁移 2：content_hash 回填与唯一索引 ----------
+def _content_hash(conn, chunk_size=10000):
+    """按 id 顺序回填缺失的 content_hash；内容重复的行只保留持有 hash 的一行（通常是最早的）。"""
+    conn.execute(CREATE_CONTENT_HASH_INDEX)
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, author, quote FROM quotes WHERE id > ? AND content_hash IS NULL ORDER BY id LIMIT ?",
+            (last_id, chunk_size),
+        ).fetchall()
+        if not rows:
+            break
+        conn.executemany(
+            "UPDATE OR IGNORE quotes SET content_hash = ? WHERE id = ?",
+            [(content_hash(author, quote), _id) for _id, author, quote in rows],
+        )
+        last_id = rows[-1][0]
+    # 回填后仍为 NULL 的行与已有的一行规范化后相同（唯一索引冲突），删除；
+    # 留着的话近似查重、排版预检等按 content_hash 工作的功能都看不到它们。
+    # 这会改动用户数据，所以不论 verbose 与否都报告删除的行数
+    removed = conn.execute("DELETE FROM quotes WHERE content_hash IS NULL").rowcount
+    if removed:
+        print(f"[DB] removed {removed} duplicate rows (same author and quote after normalizing "
+              f"case, whitespace and quote marks); one copy of each is kept")
+
+
+# ---------- 迁移 3：常用查询索引 ----------
+def _lookup_indexes(conn):
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_quotes_quote_date ON quotes(quote_date)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_quotes_author ON quotes(author)")
+
+
+# ---------- 迁移 4：长度触发器 ----------
+def _length_triggers(conn):
+    conn.execute(CREATE_LENGTH_CHECK_TRIGGER_INSERT)
+    conn.execute(CREATE_LENGTH_CHECK_TRIGGER_UPDATE)
+
+
+# ---------- 迁移 5：抓取前沿（断点续抓） ----------
+def _crawl_frontier(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS crawl_frontier (
+            crawl TEXT NOT NULL,
+            url TEXT NOT NULL,
+            status TEXT NOT NULL,
+            queued REAL,
+            last_fetched REAL,
+            quotes_found INTEGER,
+            new_quotes INTEGER,
+            PRIMARY KEY (crawl, url)
+        )
+    """)
+
+
+# ---------- 迁移 6：全文索引 ----------
+def _full_text_index(conn):
+    conn.execute(CREATE_FTS_TABLE)
+    conn.execute(CREATE_FTS_TRIGGER_INSERT)
+    conn.execute(CREATE_FTS_TRIGGER_DELETE)
+    conn.execute(CREATE_FTS_TRIGGER_UPDATE)
+    # 为已有的行建立索引
+    conn.execute("INSERT INTO quotes_fts (quotes_fts) VALUES ('rebuild')")
+
+
+# ---------- 迁移 7：近似重复索引（MinHash + LSH，见 neardup.py） ----------
+def _near_duplicate_index(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS quote_minhash (
+            content_hash TEXT PRIMARY KEY,
+            shingles INTEGER NOT NULL,
+            signature BLOB NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS quote_lsh (
+            bucket INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            PRIMARY KEY (bucket, content_hash)
+        ) WITHOUT ROWID
+    """)
+    # 删除语录时去掉签名；quote_lsh 中残留的桶在查询时因 JOIN 不到签名而被忽略
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_quotes_minhash_del
+        AFTER DELETE ON quotes
+        BEGIN
+        DELETE FROM quote_minhash WHERE content_hash = OLD.content_hash;
+        END
+    """)
+
+
+# ---------- 迁移 8：排版预检结果 ----------
+def _render_fit(conn):
+    # layout_key 标识计算时的字体与模板几何，模板变化后旧结果会被重新计算
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS quote_fit (
+            content_hash TEXT PRIMARY KEY,
+            layout_key TEXT NOT NULL,
+            fits INTEGER NOT NULL,
+            lines INTEGER NOT NULL,
+            font_size INTEGER NOT NULL
+        ) WITHOUT ROWID
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_quotes_fit_del
+        AFTER DELETE ON quotes
+        BEGIN
+        DELETE FROM quote_fit WHERE content_hash = OLD.content_hash;
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS trg_quotes_fit_upd
+        AFTER UPDATE OF content_hash ON quotes
+        BEGIN
+        DELETE FROM quote_fit WHERE content_hash = OLD.content_hash;
+        END
+    """)
+
+
+MIGRATIONS = [
+    (1, "canonical quotes table (quote_date, author, quote, content_hash)", _canonical_table),
+    (2, "content_hash backfill + unique index", _content_hash),
+    (3, "indexes on quote_date and author", _lookup_indexes),
+    (4, "quote length triggers", _length_triggers),
+    (5, "crawl_frontier table", _crawl_frontier),
+    (6, "quotes_fts full-text index + sync triggers", _full_text_index),
+    (7, "quote_minhash / quote_lsh near-duplicate index", _near_duplicate_index),
+    (8, "quote_fit render precheck table", _render_fit),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(conn):
+    conn.execute(CREATE_SCHEMA_VERSION)
+    row = conn.execute("SELECT MAX(version) FROM schema_version").fetchone()
+    return row[0] or 0
+
+
+def migrate(conn, verbose=False):
+    """执行所有未执行的迁移，返回迁移后的版本号。"""
+    version = current_version(conn)
+    for target, description, step in MIGRATIONS:
+        if target <= version:
+            continue
+        try:
+            conn.execute("BEGIN")
+            step(conn)
+            conn.execute("INSERT INTO schema_version (version) VALUES (?)", (target,))
+            conn.execute("COMMIT")
+        except sqlite3.Error:
+            conn.execute("ROLLBACK")
+            raise
+        if verbose:
+            print(f"[DB] migrated to v{target}: {description}")
+        version = target
+    return version
+
+
+if __name__ == "__main__":
+    import sys
+    from utils import DB_PATH
+
+    conn = sqlite3.connect(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
+    print(f"schema version: {migrate(conn, verbose=True)}")
+    conn.close()
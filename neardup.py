@@ -0,0 +1,332 @@
+"""近似重复检测：字符 shingle + MinHash + LSH 分桶。
+
+content_hash 只能去掉完全相同的语录；抓取来的同一句话常常只差标点、大小写、
+结尾的 “― Author, Book” 署名或被截断的省略号。这里把每条语录规范化后切成
+字符 5-gram，算 64 个 MinHash，再按 16 段 × 4 行分桶（LSH）存进 quotes.db：
+
+    quote_minhash(content_hash, shingles, signature)   签名
+    quote_lsh(bucket, content_hash)                    每条语录 16 个桶
+
+查重时只取与新语录落在同一个桶里的候选（与表大小无关），再用签名估计相似度确认。
+NearDupIndex 创建时先为还没有签名的行补建索引（旧库第一次使用时会花几秒），
+add_quotes() / save_quote() 等逐条写入的路径用 index_quote() 在同一个事务里记录签名。
+相似度取 Jaccard 与“较短一方被包含的比例”中的较大者，截掉一部分的语录也能匹配原文。
+库里的语录不超过 25 个字符，这么短的两句话只差一个词相似度就能到 0.8
+（“Love conquers all.” / “Love conquers nothing.”），所以短语录用更高的阈值，
+并且只有作者相同（规范化后）时才算重复；两条都足够长时才允许跨作者匹配。
+
+    python neardup.py cluster [--db quotes.db] [--json clusters.json]   列出库中的近似重复分组
+    python neardup.py check "Stay hungry, stay..." [--author "Steve Jobs"]   查询一条语录
+"""
+import argparse
+import hashlib
+import json
+import re
+import struct
+from collections import namedtuple
+
+from utils import DB_PATH, content_hash, get_connection, normalize_text
+
+SHINGLE_SIZE = 5
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+# 16 × 4：相似度 0.5 的两条约 64% 概率成为候选，0.7 时 98.8%，0.3 时 12%
+# 阈值按 fixtures/near_duplicates.json（长语录）与 near_duplicates_short.json（≤25 字符）调出，
+# 见 benchmarks/bench_neardup.py
+THRESHOLD = 0.7
+# 较长一条不足 LONG_SHINGLES 个 shingle（规范化后约 30 个字符）时用 SHORT_THRESHOLD：
+# 短语录里不同的两句最高约 0.83，去标点/大小写/引号的变体都是 1.0
+LONG_SHINGLES = 26
+SHORT_THRESHOLD = 0.9
+# 作者不同时，较短一条至少要有这么多 shingle 才可能判为重复
+MIN_CROSS_AUTHOR_SHINGLES = 30
+# 包含比例只在两条长度相近（较长的不超过较短的 1.5 倍）且较短的一条不少于
+# MIN_CONTAINMENT_SHINGLES 个 shingle 时使用：长度差太大时签名估计的误差会被放大，
+# 短语录也会“包含”在很多长语录里
+MAX_CONTAINMENT_RATIO = 1.5
+MIN_CONTAINMENT_SHINGLES = 12
+
+# 每个 shingle 做一次 shake_128，取 NUM_PERM 个 32 位值作为 NUM_PERM 个独立哈希函数
+_SIG = struct.Struct(f"<{NUM_PERM}I")
+_DIGEST_SIZE = _SIG.size
+_EMPTY = (0xFFFFFFFF,) * NUM_PERM
+
+Signature = namedtuple("Signature", "values size")
+
+# ---------- 规范化 ----------
+# 结尾的署名：“― Author, Book” / “— Author” / “ - Author”（署名需以大写字母开头）
+_ATTRIBUTION = re.compile(r"(?:\s*[―—–~]+|\s+-{1,2})\s*[A-Z][^―—–~\n]{0,80}$")
+_ELLIPSIS = re.compile(r"^(?:\.{2,}|…)+|(?:\.{2,}|…)+$")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(quote):
+    """去掉结尾署名与首尾省略号，统一大小写、引号和标点，只保留词与单个空格。"""
+    text = (quote or "").strip()
+    text = _ATTRIBUTION.sub("", text)
+    text = normalize_text(text)
+    text = _ELLIPSIS.sub("", text)
+    return _NON_WORD.sub(" ", text).strip()
+
+
+def shingles(quote):
+    text = normalize(quote)
+    if len(text) <= SHINGLE_SIZE:
+        return {text} if text else set()
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def author_key(author):
+    """规范化后的作者名：大小写、引号、标点与空白不同的视为同一作者。"""
+    return _NON_WORD.sub(" ", normalize_text(author)).strip()
+
+
+def signature(quote):
+    """Signature(values, size)：NUM_PERM 个哈希函数各自在所有 shingle 上的最小值，size 为 shingle 数。"""
+    rows = [_SIG.unpack(hashlib.shake_128(s.encode("utf-8")).digest(_DIGEST_SIZE)) for s in shingles(quote)]
+    if not rows:
+        return Signature(_EMPTY, 0)
+    # 按列取最小值（zip 转置 + min 都在 C 里完成）
+    return Signature(tuple(map(min, zip(*rows))), len(rows))
+
+
+def similarity(a, b):
+    """签名估计的相似度：Jaccard，或较短一方被另一方包含的比例（取较大者）。"""
+    if not a.size or not b.size:
+        return 0.0
+    j = sum(x == y for x, y in zip(a.values, b.values)) / NUM_PERM
+    small, large = sorted((a.size, b.size))
+    if j and small >= MIN_CONTAINMENT_SHINGLES and large <= small * MAX_CONTAINMENT_RATIO:
+        contained = j * (a.size + b.size) / ((1 + j) * small)
+        return min(1.0, max(j, contained))
+    return j
+
+
+def is_duplicate(a, b, score, same_author, threshold=THRESHOLD, short_threshold=SHORT_THRESHOLD):
+    """相似度 score 的两条签名是否判为重复：短语录用 short_threshold，跨作者只比较足够长的语录。"""
+    small, large = sorted((a.size, b.size))
+    if not same_author and small < MIN_CROSS_AUTHOR_SHINGLES:
+        return False
+    return score >= (threshold if large >= LONG_SHINGLES else short_threshold)
+
+
+def band_keys(sig):
+    """每段 ROWS 个值哈希成一个 64 位桶号（带段号，不同段不会混桶）。"""
+    values = sig.values
+    keys = []
+    for band in range(BANDS):
+        chunk = struct.pack(f"<B{ROWS}I", band, *values[band * ROWS:(band + 1) * ROWS])
+        keys.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(), "little", signed=True))
+    return keys
+
+
+# ---------- 索引 ----------
+_CANDIDATES_SQL = f"""
+SELECT DISTINCT m.content_hash, m.shingles, m.signature, q.author
+FROM quote_lsh l JOIN quote_minhash m ON m.content_hash = l.content_hash
+JOIN quotes q ON q.content_hash = m.content_hash
+WHERE l.bucket IN ({",".join("?" * BANDS)})
+"""
+_INSERT_MINHASH_SQL = "INSERT OR IGNORE INTO quote_minhash (content_hash, shingles, signature) VALUES (?, ?, ?)"
+_INSERT_LSH_SQL = "INSERT OR IGNORE INTO quote_lsh (bucket, content_hash) VALUES (?, ?)"
+
+
+def index_quote(conn, quote_hash, quote, sig=None):
+    """写入一条语录的签名与 LSH 桶（在调用方的事务里执行）；没有可比较的文字时返回 False。"""
+    sig = sig or signature(quote)
+    if not sig.size:
+        return False
+    conn.execute(_INSERT_MINHASH_SQL, (quote_hash, sig.size, _SIG.pack(*sig.values)))
+    conn.executemany(_INSERT_LSH_SQL, [(key, quote_hash) for key in band_keys(sig)])
+    return True
+
+
+class NearDupIndex:
+    """quotes.db 中的 MinHash/LSH 索引（表由 migrations.py 创建）。
+
+    check() 只查重并把新语录的签名暂存在内存里，同一批次内的近似重复也能被发现；
+    调用方 INSERT 成功后在同一个事务里调用 record() 写入签名，失败时调用 discard()，
+    被回滚或被拒绝的行不会留下签名挡住之后的插入。
+
+    创建时为还没有签名的行补建索引（backfilled 为补建的条数），
+    所以旧库和绕过索引写入的行（SQL、旧版本）也能被匹配到。
+    """
+
+    def __init__(self, conn, threshold=THRESHOLD, short_threshold=SHORT_THRESHOLD):
+        self.conn = conn
+        self.threshold = threshold
+        self.short_threshold = short_threshold
+        self.checked = 0
+        self.duplicates = 0
+        self._pending = {}          # content_hash -> (作者, 签名)，尚未入库
+        self._pending_buckets = {}  # 桶号 -> [content_hash]
+        self.backfilled = self.index_missing()
+
+    def find(self, quote, sig=None, author=None):
+        """返回 [(content_hash, 相似度), ...]，只含判为重复的，按相似度降序。
+
+        author 为 None 时不比较作者（命令行查询用）。
+        """
+        sig = sig or signature(quote)
+        if not sig.size:
+            return []
+        key = None if author is None else author_key(author)
+        keys = band_keys(sig)
+        candidates = [(h, Signature(_SIG.unpack(blob), size), other)
+                      for h, size, blob, other in self.conn.execute(_CANDIDATES_SQL, keys)]
+        pending = {h for k in keys for h in self._pending_buckets.get(k, ())}
+        candidates.extend((h, self._pending[h][1], self._pending[h][0]) for h in pending)
+        matches = []
+        for h, other_sig, other_author in candidates:
+            score = similarity(sig, other_sig)
+            same_author = key is None or author_key(other_author) == key
+            if is_duplicate(sig, other_sig, score, same_author, self.threshold, self.short_threshold):
+                matches.append((h, score))
+        matches.sort(key=lambda m: -m[1])
+        return matches
+
+    def add(self, quote_hash, quote, sig=None):
+        return index_quote(self.conn, quote_hash, quote, sig)
+
+    def check(self, author, quote):
+        """入库前调用：有近似重复时返回最相似的 (content_hash, 相似度)，否则暂存签名并返回 None。"""
+        self.checked += 1
+        sig = signature(quote)
+        matches = self.find(quote, sig, author)
+        if matches:
+            self.duplicates += 1
+            return matches[0]
+        if sig.size:
+            h = content_hash(author, quote)
+            self._pending[h] = (author, sig)
+            for key in band_keys(sig):
+                self._pending_buckets.setdefault(key, []).append(h)
+        return None
+
+    def record(self):
+        """INSERT 成功后、在同一个事务里写入暂存的签名。"""
+        for h, (_, sig) in self._pending.items():
+            index_quote(self.conn, h, None, sig)
+        self.discard()
+
+    def discard(self):
+        """INSERT 失败或回滚时丢掉暂存的签名。"""
+        self._pending.clear()
+        self._pending_buckets.clear()
+
+    def index_missing(self, chunk_size=5000):
+        """为还没有签名的行建索引（按 id 分块，每块一个事务），返回新建的条数。"""
+        indexed, last_id = 0, 0
+        while True:
+            rows = self.conn.execute(
+                "SELECT q.id, q.content_hash, q.quote FROM quotes q "
+                "LEFT JOIN quote_minhash m ON m.content_hash = q.content_hash "
+                "WHERE q.id > ? AND q.content_hash IS NOT NULL AND m.content_hash IS NULL "
+                "ORDER BY q.id LIMIT ?", (last_id, chunk_size)).fetchall()
+            if not rows:
+                return indexed
+            with self.conn:
+                indexed += sum(self.add(h, quote) for _, h, quote in rows)
+            last_id = rows[-1][0]
+
+    def clusters(self):
+        """按 LSH 桶找候选对并用签名确认，返回近似重复的 id 分组（每组 ≥ 2 条，大组在前）。"""
+        parent = {}
+
+        def root(x):
+            while parent.setdefault(x, x) != x:
+                parent[x] = parent[parent[x]]
+                x = parent[x]
+            return x
+
+        shared = self.conn.execute(
+            "SELECT bucket, group_concat(content_hash) FROM quote_lsh "
+            "GROUP BY bucket HAVING COUNT(*) > 1").fetchall()
+        sigs, authors = {}, {}
+        for _, members in shared:
+            members = members.split(",")
+            missing = [h for h in members if h not in sigs]
+            for start in range(0, len(missing), 500):
+                part = missing[start:start + 500]
+                for h, size, blob, author in self.conn.execute(
+                        f"SELECT m.content_hash, m.shingles, m.signature, q.author FROM quote_minhash m "
+                        f"JOIN quotes q ON q.content_hash = m.content_hash "
+                        f"WHERE m.content_hash IN ({','.join('?' * len(part))})", part):
+                    sigs[h] = Signature(_SIG.unpack(blob), size)
+                    authors[h] = author_key(author)
+            members = [h for h in members if h in sigs]
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    if root(a) == root(b):
+                        continue
+                    sa, sb = sigs[a], sigs[b]
+                    if is_duplicate(sa, sb, similarity(sa, sb), authors[a] == authors[b],
+                                    self.threshold, self.short_threshold):
+                        parent[root(a)] = root(b)
+
+        groups = {}
+        for h in parent:
+            groups.setdefault(root(h), set()).add(h)
+        ids = []
+        for hashes in groups.values():
+            hashes = list(hashes)
+            found = []
+            for start in range(0, len(hashes), 500):
+                part = hashes[start:start + 500]
+                found.extend(i for (i,) in self.conn.execute(
+                    f"SELECT id FROM quotes WHERE content_hash IN ({','.join('?' * len(part))})", part))
+            if len(found) > 1:
+                ids.append(sorted(found))
+        ids.sort(key=lambda g: (-len(g), g[0]))
+        return ids
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Near-duplicate quote detection (MinHash + LSH)")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--threshold", type=float, default=THRESHOLD)
+    parser.add_argument("--short-threshold", type=float, default=SHORT_THRESHOLD)
+    sub = parser.add_subparsers(dest="command", required=True)
+    cluster = sub.add_parser("cluster", help="print near-duplicate groups of existing rows")
+    cluster.add_argument("--json", help="write the groups (ids, author, quote) to this file")
+    cluster.add_argument("--show", type=int, default=10, help="number of groups to print")
+    check = sub.add_parser("check", help="look up near duplicates of one quote")
+    check.add_argument("quote")
+    check.add_argument("--author", help="only match quotes by this author (as ingestion does)")
+    opts = parser.parse_args()
+
+    conn = get_connection(opts.db)
+    index = NearDupIndex(conn, opts.threshold, opts.short_threshold)
+    try:
+        if opts.command == "check":
+            for h, score in index.find(opts.quote, author=opts.author):
+                row = conn.execute("SELECT id, author, quote FROM quotes WHERE content_hash = ?", (h,)).fetchone()
+                if row:
+                    print(f"{score:.2f}  {row[0]}: {row[1]} - {row[2][:60]}")
+            return
+
+        if index.backfilled:
+            print(f"🔎 Indexed {index.backfilled} quotes")
+        groups = index.clusters()
+        rows = sum(len(g) for g in groups)
+        print(f"✅ {len(groups)} near-duplicate groups ({rows} rows, {rows - len(groups)} redundant)")
+        report = []
+        for group in groups:
+            members = [conn.execute("SELECT id, author, quote FROM quotes WHERE id = ?", (i,)).fetchone()
+                       for i in group]
+            report.append([{"id": i, "author": a, "quote": q} for i, a, q in members])
+        for members in report[:opts.show]:
+            print()
+            for m in members:
+                print(f"  {m['id']}: {m['author']} - {m['quote'][:60]!r}")
+        if opts.json:
+            with open(opts.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+            print(f"\n📄 Groups written to {opts.json}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,456 @@
+"""抓取 → 解析 → 校验 → 入库 → 出图 的流式流水线。
+
+    python pipeline.py https://quotes.toscrape.com/page/1/
+    python pipeline.py URL --render --parse-processes 4
+
+抓取和解析由 crawler.Crawler 完成（解析可放进进程池），之后每个阶段是一组线程，
+阶段之间用有界队列连接：下游处理不过来时上游的 put 会阻塞，压力一路传回抓取端，
+内存占用与抓取页数无关。结束时打印每个阶段的吞吐量与延迟。
+一页的语录全部入库提交后，该页的链接才写进 HTTP 缓存（见 PageTracker），入库失败的页面下次会重新抓取。
+"""
+import argparse
+import asyncio
+import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from urllib.parse import urlparse
+
+from crawler import Crawler
+from extract import extract_page
+from http_cache import HTTP_CACHE_PATH, HttpCache
+from metrics import METRICS, METRICS_ENV, profiled
+from neardup import NearDupIndex
+from sites import adapter_for
+from utils import DB_PATH, INSERT_QUOTE_SQL, MAX_QUOTE_LENGTH, check_quote, content_hash, get_connection
+
+QUEUE_SIZE = 256
+INSERT_BATCH = 200
+RENDER_BATCH = 16
+
+_DONE = object()
+
+
+def parse_page(url, html):
+    """模块级函数，可以被进程池 pickle：有站点适配器用适配器，否则走通用抽取。"""
+    adapter = adapter_for(url)
+    if adapter is not None:
+        return adapter.parse(url, html)
+    quotes, nxt = extract_page(html, url)
+    return quotes, [nxt] if nxt else []
+
+
+# ---------- 阶段统计 ----------
+class StageStats:
+    def __init__(self, name):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.busy = 0.0
+        self.latencies = []
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, enqueued, produced, busy, now):
+        with self._lock:
+            if self.started is None:
+                self.started = now - busy
+            self.items_in += len(enqueued)
+            self.items_out += produced
+            self.busy += busy
+            self.latencies.extend(now - t for t in enqueued)
+            self.finished = now
+
+    @property
+    def throughput(self):
+        if not self.started or self.finished <= self.started:
+            return 0.0
+        return self.items_in / (self.finished - self.started)
+
+    def latency(self, pct):
+        if not self.latencies:
+            return 0.0
+        ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+    def __str__(self):
+        return (f"{self.name:10s} in {self.items_in:6d}  out {self.items_out:6d}  "
+                f"{self.throughput:8.1f}/s  busy {self.busy:6.2f}s  "
+                f"p50 {self.latency(0.5) * 1000:7.1f}ms  p95 {self.latency(0.95) * 1000:7.1f}ms")
+
+
+# ---------- 阶段 ----------
+class Stage:
+    """workers 个线程从有界 inbox 取数据，凑够 batch_size 条（或等待 linger 秒）调用一次 fn。
+
+    fn(batch, state) 返回要交给下一阶段的记录；setup() 在每个工作线程里调用一次，
+    返回值作为 state（例如该线程自己的 sqlite 连接），teardown(state) 在线程退出前调用。
+    """
+
+    def __init__(self, name, fn, workers=1, batch_size=1, linger=0.2, maxsize=QUEUE_SIZE,
+                 setup=None, teardown=None):
+        self.name = name
+        self.fn = fn
+        self.workers = workers
+        self.batch_size = batch_size
+        self.linger = linger
+        self.setup = setup
+        self.teardown = teardown
+        self.inbox = queue.Queue(maxsize)
+        self.downstream = None
+        self.stats = StageStats(name)
+        self.error = None
+        self._threads = []
+        self._remaining = workers
+        self._lock = threading.Lock()
+
+    def put(self, item):
+        self.inbox.put((time.perf_counter(), item))
+
+    def close(self):
+        for _ in range(self.workers):
+            self.inbox.put(_DONE)
+
+    def start(self):
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def join(self):
+        for t in self._threads:
+            t.join()
+
+    def _next_batch(self):
+        first = self.inbox.get()
+        if first is _DONE:
+            return None, True
+        batch = [first]
+        deadline = time.perf_counter() + self.linger
+        while len(batch) < self.batch_size:
+            try:
+                item = self.inbox.get(timeout=max(0.0, deadline - time.perf_counter()))
+            except queue.Empty:
+                break
+            if item is _DONE:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    def _run(self):
+        state = self.setup() if self.setup else None
+        try:
+            done = False
+            while not done:
+                batch, done = self._next_batch()
+                if not batch:
+                    continue
+                start = time.perf_counter()
+                try:
+                    out = self.fn([item for _, item in batch], state) if self.error is None else []
+                except Exception as e:  # 记录第一个错误，继续排空队列以免上游阻塞
+                    self.error = self.error or e
+                    out = []
+                now = time.perf_counter()
+                self.stats.record([t for t, _ in batch], len(out), now - start, now)
+                if self.downstream is not None:
+                    for item in out:
+                        self.downstream.put(item)
+        finally:
+            if self.teardown:
+                self.teardown(state)
+            with self._lock:
+                self._remaining -= 1
+                last = self._remaining == 0
+            if last and self.downstream is not None:
+                self.downstream.close()
+
+
+# ---------- 整页入库确认 ----------
+class PageTracker:
+    """按页面记录还有多少条语录没有走完校验和入库。
+
+    一页的语录全部提交（或被校验拒绝、被判为重复）后，该页的 future 置为 True，
+    crawler 这时才把该页的链接写进 HTTP 缓存；任何一批入库失败时所有未完成的页面置为 False，
+    下次抓取会重新解析和入库这些页面。
+    """
+
+    def __init__(self):
+        self.failed = False
+        self._pages = {}  # url -> [剩余条数, future]
+        self._lock = threading.Lock()
+
+    def expect(self, url, count):
+        """在事件循环里、该页的语录进入流水线之前调用。"""
+        future = asyncio.get_running_loop().create_future()
+        with self._lock:
+            if self.failed or not count:
+                future.set_result(not self.failed)
+            else:
+                self._pages[url] = [count, future]
+        return future
+
+    def done(self, counts):
+        """counts: Counter(url -> 走完的条数)，可在任意线程调用。"""
+        finished = []
+        with self._lock:
+            for url, n in counts.items():
+                page = self._pages.get(url)
+                if page is None:
+                    continue
+                page[0] -= n
+                if page[0] <= 0:
+                    finished.append(self._pages.pop(url)[1])
+        for future in finished:
+            future.get_loop().call_soon_threadsafe(_resolve, future, True)
+
+    def fail_all(self):
+        with self._lock:
+            self.failed = True
+            pages, self._pages = self._pages, {}
+        for _, future in pages.values():
+            future.get_loop().call_soon_threadsafe(_resolve, future, False)
+
+
+def _resolve(future, value):
+    if not future.done():
+        future.set_result(value)
+
+
+# ---------- 各阶段的处理函数 ----------
+def validate_batch(records, _state):
+    """25 字符规则（与 utils.check_quote / 数据库触发器一致），不合格的丢弃（由调用方计数）。"""
+    valid = []
+    for rec in records:
+        try:
+            check_quote(rec["quote"])
+        except ValueError:
+            continue
+        rec["hash"] = content_hash(rec["author"], rec["quote"])
+        valid.append(rec)
+    return valid
+
+
+def insert_batch(records, index):
+    """一个事务批量写入，返回新插入的行（带 id），已存在或近似重复的内容不再往下游传。"""
+    # 近似重复的跳过（index 为该线程连接上的 NearDupIndex）；新语录的签名在 INSERT 成功后、同一个事务里写入
+    conn = index.conn
+    with METRICS.span("dedup_query"):
+        hashes = list({rec["hash"] for rec in records})
+        marks = ",".join("?" * len(hashes))
+        existing = {h for (h,) in conn.execute(
+            f"SELECT content_hash FROM quotes WHERE content_hash IN ({marks})", hashes)}
+        # 完全相同的内容交给 INSERT OR IGNORE，只有新内容才做近似重复查询
+        checked, kept = set(), []
+        for rec in records:
+            h = rec["hash"]
+            if h in existing or h in checked:
+                continue
+            checked.add(h)
+            if index.check(rec["author"], rec["quote"]) is None:
+                kept.append(rec)
+        if not kept:
+            return []
+    with METRICS.span("db_insert"), conn:
+        conn.executemany(INSERT_QUOTE_SQL, [(r["date"], r["author"], r["quote"], r["hash"]) for r in kept])
+        index.record()
+    marks = ",".join("?" * len(kept))
+    ids = dict(conn.execute(f"SELECT content_hash, id FROM quotes WHERE content_hash IN ({marks})",
+                            [rec["hash"] for rec in kept]))
+    return [{**rec, "id": ids[rec["hash"]]} for rec in kept if rec["hash"] in ids]
+
+
+# ---------- 流水线 ----------
+class QuotePipeline:
+    def __init__(self, db_path=DB_PATH, render=False, parse_processes=0, render_workers=None,
+                 output_folder="outputs", background_image="quote_template_background.jpg",
+                 output_format="jpeg", cache_path=HTTP_CACHE_PATH, queue_size=QUEUE_SIZE,
+                 insert_batch_size=INSERT_BATCH, crawl_settings=None):
+        self.db_path = db_path
+        self.render = render
+        self.parse_processes = parse_processes
+        self.render_workers = render_workers or os.cpu_count()
+        self.output_folder = output_folder
+        self.background_image = background_image
+        self.output_format = output_format
+        self.cache_path = cache_path
+        self.queue_size = queue_size
+        self.insert_batch_size = insert_batch_size
+        self.crawl_settings = crawl_settings or {}
+        self.crawl_stats = None
+        self.stages = []
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    def _build_stages(self, render_pool, tracker=None):
+        # 先确保数据库已迁移、已有语录都有近似重复签名，入库线程再各自打开连接
+        conn = get_connection(self.db_path)
+        try:
+            backfilled = NearDupIndex(conn).backfilled
+        finally:
+            conn.close()
+        if backfilled:
+            print(f"🔎 Indexed {backfilled} existing quotes for near-duplicate detection")
+
+        def validate(records, state):
+            try:
+                valid = validate_batch(records, state)
+            except Exception:
+                if tracker is not None:
+                    tracker.fail_all()
+                raise
+            rejected = Counter(r["url"] for r in records)
+            rejected.subtract(r["url"] for r in valid)
+            rejected = +rejected
+            if rejected:
+                with self._lock:
+                    self.rejected += sum(rejected.values())
+                METRICS.inc("quotes_rejected", sum(rejected.values()))
+                if tracker is not None:
+                    tracker.done(rejected)
+            return valid
+
+        def insert(records, index):
+            try:
+                inserted = insert_batch(records, index)
+            except Exception:
+                if tracker is not None:
+                    tracker.fail_all()
+                raise
+            if tracker is not None:
+                tracker.done(Counter(r["url"] for r in records))
+            return inserted
+
+        stages = [
+            Stage("validate", validate, batch_size=64, maxsize=self.queue_size),
+            Stage("insert", insert, batch_size=self.insert_batch_size, maxsize=self.queue_size,
+                  setup=lambda: NearDupIndex(get_connection(self.db_path)),
+                  teardown=lambda index: index.conn.close()),
+        ]
+        if render_pool is not None:
+            from generator import QuoteGenerator
+            from render_farm import _render_chunk, output_filename
+            fmt = self.output_format
+            gen = QuoteGenerator(background_image=self.background_image, output_folder=self.output_folder,
+                                 verbose=False)
+
+            def render_batch(records, _state):
+                jobs = [{"date": r["date"], "author": r["author"], "quote": r["quote"], "output_format": fmt,
+                         "filename": output_filename(gen, r["id"], r["date"], r["author"], r["quote"], fmt)}
+                        for r in records]
+                METRICS.merge(render_pool.submit(_render_chunk, jobs).result()[3])
+                return records
+
+            # 每个线程同时只有一个批次在进程池中，线程数 = 进程数
+            stages.append(Stage("render", render_batch, workers=self.render_workers,
+                                batch_size=RENDER_BATCH, maxsize=self.queue_size))
+        for up, down in zip(stages, stages[1:]):
+            up.downstream = down
+        return stages
+
+    def run(self, start_url):
+        adapter = adapter_for(start_url)
+        settings = dict(adapter.crawl) if adapter is not None else {}
+        settings.update(self.crawl_settings)
+        today = datetime.today().strftime("%Y.%m.%d")
+
+        render_pool = parse_pool = None
+        if self.render:
+            from render_farm import _init_worker
+            os.makedirs(self.output_folder, exist_ok=True)
+            render_pool = ProcessPoolExecutor(self.render_workers, initializer=_init_worker,
+                                              initargs=(self.background_image, self.output_folder))
+        if self.parse_processes:
+            parse_pool = ProcessPoolExecutor(self.parse_processes)
+        cache = HttpCache(self.cache_path) if self.cache_path else None
+
+        tracker = PageTracker()
+        self.stages = self._build_stages(render_pool, tracker)
+        head = self.stages[0]
+        for stage in self.stages:
+            stage.start()
+
+        async def handle_items(url, quotes):
+            # 返回的 future 在整页入库提交后才为 True，crawler 到那时才缓存该页的链接
+            confirmed = tracker.expect(url, len(quotes))
+            loop = asyncio.get_running_loop()
+            for author, text in quotes:
+                item = (time.perf_counter(), {"date": today, "author": author, "quote": text, "url": url})
+                try:
+                    head.inbox.put_nowait(item)
+                except queue.Full:
+                    # 背压：队列满时在线程里阻塞等待，事件循环继续处理在途请求
+                    await loop.run_in_executor(None, head.inbox.put, item)
+            return confirmed
+
+        crawler = Crawler(**settings, cache=cache, parse_executor=parse_pool)
+        try:
+            self.crawl_stats = crawler.crawl(start_url, parse_page, handle_items)
+        finally:
+            head.close()
+            for stage in self.stages:
+                stage.join()
+            for pool in (parse_pool, render_pool):
+                if pool is not None:
+                    pool.shutdown()
+            if cache is not None:
+                cache.close()
+        for stage in self.stages:
+            if stage.error is not None:
+                raise stage.error
+        return self.stages
+
+    def report(self):
+        lines = []
+        cs = self.crawl_stats
+        if cs is not None:
+            parsed = max(cs.pages - cs.cached, 1)
+            lines.append(f"{'fetch':10s} pages {cs.pages:5d}  {cs.pages / cs.elapsed:8.1f}/s  "
+                         f"mean {cs.fetch_seconds / max(cs.pages, 1) * 1000:7.1f}ms  "
+                         f"{cs.bytes / 1024:.1f} KB  errors {cs.errors}")
+            lines.append(f"{'parse':10s} pages {cs.pages - cs.cached:5d}  "
+                         f"mean {cs.parse_seconds / parsed * 1000:7.1f}ms  cached {cs.cached}")
+        lines.extend(str(stage.stats) for stage in self.stages)
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Scrape, validate, insert and optionally render quotes")
+    parser.add_argument("url")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--render", action="store_true", help="render posters for newly inserted quotes")
+    parser.add_argument("--parse-processes", type=int, default=0, help="parse pages in N processes")
+    parser.add_argument("--render-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="outputs")
+    parser.add_argument("--max-pages", type=int)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--metrics", default=os.environ.get(METRICS_ENV),
+                        help="write stage timings to this file (.json, otherwise Prometheus text)")
+    parser.add_argument("--profile", action="store_true", help="cProfile the run (profiles/pipeline.prof)")
+    opts = parser.parse_args()
+
+    url = opts.url if urlparse(opts.url).scheme else "https://" + opts.url
+    crawl = {"max_pages": opts.max_pages} if opts.max_pages else {}
+    pipe = QuotePipeline(db_path=opts.db, render=opts.render, parse_processes=opts.parse_processes,
+                         render_workers=opts.render_workers, output_folder=opts.output,
+                         cache_path=None if opts.no_cache else HTTP_CACHE_PATH, crawl_settings=crawl)
+    start = time.perf_counter()
+    with profiled("pipeline", opts.profile or None):
+        pipe.run(url)
+    elapsed = time.perf_counter() - start
+    print(pipe.report())
+    inserted = pipe.stages[1].stats.items_out
+    print(f"✅ Done in {elapsed:.1f}s: {inserted} new quotes")
+    if pipe.rejected:
+        print(f"⚠️ {pipe.rejected} quotes rejected by validation (over {MAX_QUOTE_LENGTH} characters)")
+    if opts.metrics:
+        print(METRICS.report())
+        print(f"📈 Metrics written to {METRICS.write(opts.metrics)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""按需出图的轻量 HTTP 服务（asyncio，无额外依赖）。
+
+    python poster_server.py --port 8080 --workers 4
+
+路由（都支持 ?format=<格式或 encoding profile>，默认 jpeg）：
+    GET /poster/<id>           按 id
+    GET /poster/date/<日期>     该日期的第一条语录（日期格式与库中一致，如 2025.08.11）
+    GET /poster/random         随机一条
+    GET /poster/today          今日语录：按当天日期确定性地挑选，同一天结果相同
+    GET /stats                 缓存命中、合并请求、渲染次数等（JSON）
+    GET /metrics               各阶段耗时直方图（Prometheus 文本格式，含 worker 中的绘制/编码）
+
+渲染在进程池中进行，每个 worker 持有一个预热过的 QuoteGenerator；
+同一海报的并发请求只渲染一次（请求合并），热门海报按字节上限缓存在内存 LRU 中。
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import random
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from metrics import METRICS
+from utils import DB_PATH, SELECT_QUOTE_BY_ID_SQL, get_connection, sample_quotes
+
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+MAX_HEADER_BYTES = 16 * 1024
+
+log = logging.getLogger(__name__)
+
+# ---------- worker 进程 ----------
+_worker_gen = None
+
+
+def _init_worker(background_image):
+    global _worker_gen
+    from generator import QuoteGenerator
+    _worker_gen = QuoteGenerator(background_image=background_image, verbose=False)
+    _worker_gen.warm_up()
+
+
+def _render_in_worker(date, author, quote, output_format):
+    result = _worker_gen.render(date, author, quote, output_format)
+    return result.data, result.mime_type, METRICS.drain()
+
+
+# ---------- 内存 LRU ----------
+class ImageLRU:
+    """按总字节数限制大小的 LRU：key → (data, mime_type, etag)。"""
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._items = OrderedDict()
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is not None:
+            self._items.move_to_end(key)
+        return item
+
+    def put(self, key, item):
+        size = len(item[0])
+        if size > self.max_bytes:
+            return
+        old = self._items.pop(key, None)
+        if old is not None:
+            self.bytes -= len(old[0])
+        self._items[key] = item
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, evicted = self._items.popitem(last=False)
+            self.bytes -= len(evicted[0])
+
+    def __len__(self):
+        return len(self._items)
+
+
+# ---------- 服务 ----------
+class PosterServer:
+    def __init__(self, db_path=DB_PATH, workers=None, cache_bytes=DEFAULT_CACHE_BYTES,
+                 background_image="quote_template_background.jpg"):
+        self.db_path = db_path
+        self.workers = workers or os.cpu_count()
+        self.background_image = background_image
+        self.cache = ImageLRU(cache_bytes)
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "coalesced": 0, "renders": 0, "not_modified": 0,
+                      "errors": 0}
+        self._inflight = {}
+        self._pool = None
+        self._conn = None
+
+    # ----- 查询 -----
+    def _lookup(self, path):
+        """返回 (date, author, quote)；找不到时为 None。"""
+        parts = [unquote(p) for p in path.strip("/").split("/")]
+        if len(parts) < 2 or parts[0] != "poster":
+            return None
+        if parts[1] == "random":
+            rows = sample_quotes(self._conn, 1, "quote_date, author, quote")
+            row = rows[0] if rows else None
+        elif parts[1] == "today":
+            today = datetime.today().strftime("%Y.%m.%d")
+            rows = sample_quotes(self._conn, 1, "quote_date, author, quote", rng=random.Random(today))
+            row = (today,) + tuple(rows[0][1:]) if rows else None
+        elif parts[1] == "date" and len(parts) == 3:
+            row = self._conn.execute(
+                "SELECT quote_date, author, quote FROM quotes WHERE quote_date = ? ORDER BY id LIMIT 1",
+                (parts[2],)).fetchone()
+        elif parts[1].isdigit():
+            row = self._conn.execute(SELECT_QUOTE_BY_ID_SQL, (int(parts[1]),)).fetchone()
+        else:
+            return None
+        if row is None:
+            return None
+        date, author, quote = row
+        return date or datetime.today().strftime("%Y.%m.%d"), author, quote
+
+    async def poster(self, date, author, quote, output_format):
+        """返回 (data, mime_type, etag)；命中 LRU 直接返回，相同 key 的并发请求共享一次渲染。"""
+        key = (date, author, quote, output_format)
+        item = self.cache.get(key)
+        if item is not None:
+            self.stats["hits"] += 1
+            return item
+        pending = self._inflight.get(key)
+        if pending is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(pending)
+
+        self.stats["misses"] += 1
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._inflight[key] = future
+        try:
+            self.stats["renders"] += 1
+            data, mime, snapshot = await loop.run_in_executor(
+                self._pool, _render_in_worker, date, author, quote, output_format)
+            METRICS.merge(snapshot)
+            item = (data, mime, '"%s"' % hashlib.sha1(data).hexdigest()[:16])
+            self.cache.put(key, item)
+            future.set_result(item)
+            return item
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+
+    # ----- HTTP -----
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except asyncio.LimitOverrunError:
+                    await self._respond(writer, 431, b"headers too large", "text/plain", keep_alive=False)
+                    break
+                lines = head.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    await self._respond(writer, 400, b"bad request", "text/plain", keep_alive=False)
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version.upper() == "HTTP/1.1")
+                await self._dispatch(writer, method, target, headers, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def _dispatch(self, writer, method, target, headers, keep_alive):
+        self.stats["requests"] += 1
+        if method not in ("GET", "HEAD"):
+            return await self._respond(writer, 405, b"method not allowed", "text/plain", keep_alive)
+        url = urlsplit(target)
+        if url.path == "/stats":
+            body = json.dumps({**self.stats, "cached_images": len(self.cache),
+                               "cached_bytes": self.cache.bytes}).encode()
+            return await self._respond(writer, 200, body, "application/json", keep_alive)
+        if url.path == "/metrics":
+            body = METRICS.to_prometheus().encode()
+            return await self._respond(writer, 200, body, "text/plain; version=0.0.4", keep_alive)
+
+        output_format = parse_qs(url.query).get("format", ["jpeg"])[0]
+        record = self._lookup(url.path)
+        if record is None:
+            return await self._respond(writer, 404, b"not found", "text/plain", keep_alive)
+        try:
+            data, mime, etag = await self.poster(*record, output_format)
+        except ValueError as e:  # 未知的格式 / profile
+            return await self._respond(writer, 400, str(e).encode(), "text/plain", keep_alive)
+        except Exception:
+            # 渲染失败（worker 崩溃、字体缺失……）：记录堆栈并返回 500，连接继续可用
+            self.stats["errors"] += 1
+            log.exception("render failed: %s", target)
+            return await self._respond(writer, 500, b"internal server error", "text/plain", keep_alive)
+
+        if headers.get("if-none-match") == etag:
+            self.stats["not_modified"] += 1
+            return await self._respond(writer, 304, b"", None, keep_alive, {"ETag": etag})
+        body = data if method == "GET" else b""
+        await self._respond(writer, 200, body, mime, keep_alive, {"ETag": etag}, length=len(data))
+
+    @staticmethod
+    async def _respond(writer, status, body, content_type, keep_alive, extra=None, length=None):
+        reason = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+                  405: "Method Not Allowed", 431: "Request Header Fields Too Large",
+                  500: "Internal Server Error"}[status]
+        lines = [f"HTTP/1.1 {status} {reason}",
+                 f"Content-Length: {len(body) if length is None else length}",
+                 f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+        if content_type:
+            lines.append(f"Content-Type: {content_type}")
+        for k, v in (extra or {}).items():
+            lines.append(f"{k}: {v}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        await writer.drain()
+
+    # ----- 生命周期 -----
+    def start_pool(self):
+        """启动渲染进程池；每个 worker 在 initializer 里预热（加载字体与背景），
+        预热的耗时留在 worker 的指标里，随第一次渲染的快照一起汇总。"""
+        self._pool = ProcessPoolExecutor(self.workers, initializer=_init_worker,
+                                         initargs=(self.background_image,))
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    async def serve(self, host="127.0.0.1", port=8080, ready=None):
+        # 连接在事件循环所在线程里打开（sqlite 连接不能跨线程使用）
+        self._conn = get_connection(self.db_path)
+        try:
+            server = await asyncio.start_server(self._handle, host, port, limit=MAX_HEADER_BYTES)
+            if ready is not None:
+                ready(server.sockets[0].getsockname()[1])
+            async with server:
+                await server.serve_forever()
+        finally:
+            self._conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve quote posters over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--cache-mb", type=int, default=DEFAULT_CACHE_BYTES // (1024 * 1024))
+    parser.add_argument("--background", default="quote_template_background.jpg")
+    opts = parser.parse_args()
+
+    server = PosterServer(opts.db, opts.workers, opts.cache_mb * 1024 * 1024, opts.background)
+    server.start_pool()
+    print(f"🚀 Serving posters on http://{opts.host}:{opts.port}/poster/today ({opts.workers} workers)")
+    try:
+        asyncio.run(server.serve(opts.host, opts.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
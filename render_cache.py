@@ -0,0 +1,104 @@
+"""按内容寻址的出图缓存。
+
+所有渲染输入（日期、作者、正文、模板文件、字体、格式）算出一个 sha256 key，
+输出文件名带上 key 前缀，因此同一天的不同语录不会再互相覆盖；
+输出目录下的 render_cache.sqlite 记录 key → 文件，重复请求直接返回已有路径，
+总大小超过上限时按最近最少使用（LRU）删除缓存登记过的文件。
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import time
+
+MANIFEST_NAME = "render_cache.sqlite"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+CREATE_MANIFEST = """
+CREATE TABLE IF NOT EXISTS renders (
+    key TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_renders_last_used ON renders(last_used);
+"""
+
+
+def file_fingerprint(path):
+    """模板/字体文件的身份：路径 + 大小 + mtime；文件不存在时为 None。"""
+    if not path or not os.path.exists(path):
+        return None
+    st = os.stat(path)
+    return [path, st.st_size, int(st.st_mtime)]
+
+
+def render_key(**inputs):
+    payload = json.dumps(inputs, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class RenderCache:
+    def __init__(self, folder="outputs", max_bytes=DEFAULT_MAX_BYTES):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(folder, exist_ok=True)
+        self.conn = sqlite3.connect(os.path.join(folder, MANIFEST_NAME))
+        self.conn.executescript(CREATE_MANIFEST)
+
+    def filename(self, key, prefix, output_format):
+        return f"{prefix}_{key[:12]}.{output_format}"
+
+    def get(self, key):
+        """命中则刷新 last_used 并返回路径；文件已被手动删除时视为未命中。"""
+        row = self.conn.execute("SELECT path FROM renders WHERE key = ?", (key,)).fetchone()
+        if row and os.path.exists(row[0]):
+            with self.conn:
+                self.conn.execute("UPDATE renders SET last_used = ? WHERE key = ?", (time.time(), key))
+            self.hits += 1
+            return row[0]
+        if row:
+            with self.conn:
+                self.conn.execute("DELETE FROM renders WHERE key = ?", (key,))
+        self.misses += 1
+        return None
+
+    def put(self, key, path):
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO renders (key, path, bytes, created, last_used) VALUES (?, ?, ?, ?, ?)",
+                (key, path, os.path.getsize(path), now, now),
+            )
+        self.evict(keep=key)
+
+    def total_bytes(self):
+        return self.conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM renders").fetchone()[0]
+
+    def evict(self, keep=None):
+        """超出 max_bytes 时删除最久未使用的文件（keep 除外），返回删除数量。"""
+        total = self.total_bytes()
+        if total <= self.max_bytes:
+            return 0
+        removed = []
+        for key, path, size in self.conn.execute(
+                "SELECT key, path, bytes FROM renders ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            removed.append((key,))
+        with self.conn:
+            self.conn.executemany("DELETE FROM renders WHERE key = ?", removed)
+        return len(removed)
+
+    def close(self):
+        self.conn.close()
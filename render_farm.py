@@ -0,0 +1,186 @@
+"""非交互批量出图：把 quotes.db 中的语录分片给多进程渲染。
+
+用法：
+    python render_farm.py all
+    python render_farm.py range 100 200
+    python render_farm.py author "Albert Einstein"
+    python render_farm.py all --skip-overflow      跳过排版预检放不下的语录（见 render_fit.py）
+
+输出文件名为 quote_<id>_<hash>.<fmt>，hash 取自 QuoteGenerator.render_key（内容、模板、字体、
+排版与编码参数）；重新运行时已存在且 hash 一致的图片会直接跳过，因此中断后可以断点续跑，
+换了背景或字体后则会重新渲染。没有日期的语录日期行留空（不用当天日期，否则每天都要重画）。
+"""
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from encoding import get_profile
+from generator import QuoteGenerator
+from metrics import METRICS, METRICS_ENV, PROFILE_DIR, profiled
+from utils import get_connection
+
+DB_PATH = "quotes.db"
+CHUNK_SIZE = 64
+
+# 每个 worker 进程持有一个预热好的 QuoteGenerator
+_worker_gen = None
+# --profile 时每个 worker 累计 cProfile，每批结束后写到 profiles/render-worker-<pid>.prof
+_worker_profiler = None
+
+
+def _init_worker(background_image, output_folder, profile=False):
+    global _worker_gen, _worker_profiler
+    _worker_gen = QuoteGenerator(background_image=background_image, output_folder=output_folder, verbose=False)
+    _worker_gen.warm_up()
+    if profile:
+        import cProfile
+        _worker_profiler = cProfile.Profile()
+
+
+def _render_chunk(records):
+    """返回 (pid, 张数, 秒, 指标快照)；快照由主进程 METRICS.merge() 汇总。"""
+    start = time.perf_counter()
+    if _worker_profiler is not None:
+        _worker_profiler.enable()
+    try:
+        paths = _worker_gen.generate_many(records)
+    finally:
+        if _worker_profiler is not None:
+            _worker_profiler.disable()
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            _worker_profiler.dump_stats(os.path.join(PROFILE_DIR, f"render-worker-{os.getpid()}.prof"))
+    return os.getpid(), len(paths), time.perf_counter() - start, METRICS.drain()
+
+
+def render_hash(gen, date, author, quote, output_format):
+    """输出文件名中的 hash：QuoteGenerator.render_key 的前 16 位。"""
+    return gen.render_key(date, author, quote, output_format)[:16]
+
+
+def output_filename(gen, row_id, date, author, quote, output_format):
+    # output_format 可以是编码 profile 名（如 webp-small），扩展名取自 profile
+    ext = get_profile(output_format).extension
+    return f"quote_{row_id}_{render_hash(gen, date, author, quote, output_format)}.{ext}"
+
+
+def select_rows(conn, mode, start=None, end=None, author=None):
+    """按模式返回 (id, date, author, quote) 游标。"""
+    sql = "SELECT id, quote_date, author, quote FROM quotes"
+    params = ()
+    if mode == "range":
+        sql += " WHERE id BETWEEN ? AND ?"
+        params = (start, end)
+    elif mode == "author":
+        sql += " WHERE author = ?"
+        params = (author,)
+    sql += " ORDER BY id"
+    return conn.execute(sql, params)
+
+
+def pending_records(gen, rows, output_folder, output_format):
+    """过滤掉已渲染（文件存在且 hash 一致）的行，产出 generate_many 记录。"""
+    existing = set(os.listdir(output_folder)) if os.path.isdir(output_folder) else set()
+    skipped = 0
+    records = []
+    for row_id, date, author, quote in rows:
+        date = date or ""
+        filename = output_filename(gen, row_id, date, author, quote, output_format)
+        if filename in existing:
+            skipped += 1
+            continue
+        records.append({"date": date, "author": author, "quote": quote,
+                        "output_format": output_format, "filename": filename})
+    return records, skipped
+
+
+def run(records, workers, background_image, output_folder, chunk_size=CHUNK_SIZE, profile=False):
+    """渲染所有记录，返回 {pid: (images, seconds)}。"""
+    per_worker = {}
+    chunks = [records[i:i + chunk_size] for i in range(0, len(records), chunk_size)]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(background_image, output_folder, profile)) as pool:
+        futures = [pool.submit(_render_chunk, c) for c in chunks]
+        done = 0
+        try:
+            for fut in as_completed(futures):
+                pid, count, elapsed, snapshot = fut.result()
+                METRICS.merge(snapshot)
+                images, seconds = per_worker.get(pid, (0, 0.0))
+                per_worker[pid] = (images + count, seconds + elapsed)
+                done += count
+                print(f"\rRendered {done}/{len(records)}", end="", flush=True)
+        except KeyboardInterrupt:
+            print("\n⚠️ Interrupted, cancelling pending chunks (re-run to resume) ...")
+            for fut in futures:
+                fut.cancel()
+            raise
+    print()
+    return per_worker
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render posters for quotes in quotes.db")
+    parser.add_argument("mode", choices=["all", "range", "author"])
+    parser.add_argument("args", nargs="*", help="range: START END；author: NAME")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--format", default="jpeg", help="format or encoding profile (see encoding.py)")
+    parser.add_argument("--background", default="quote_template_background.jpg")
+    parser.add_argument("--output", default="outputs")
+    parser.add_argument("--skip-overflow", action="store_true",
+                        help="precheck the layout and skip quotes that do not fit the template")
+    parser.add_argument("--metrics", default=os.environ.get(METRICS_ENV), help="write stage timings to this file (.json, otherwise Prometheus text)")
+    parser.add_argument("--profile", action="store_true",
+                        help="cProfile the run (profiles/render.prof, one render-worker-<pid>.prof per worker)")
+    opts = parser.parse_args()
+
+    start = end = author = None
+    if opts.mode == "range":
+        if len(opts.args) != 2:
+            parser.error("range needs START END")
+        start, end = int(opts.args[0]), int(opts.args[1])
+    elif opts.mode == "author":
+        if len(opts.args) != 1:
+            parser.error("author needs NAME")
+        author = opts.args[0]
+
+    os.makedirs(opts.output, exist_ok=True)
+    conn = get_connection(opts.db)
+    try:
+        rows = select_rows(conn, opts.mode, start, end, author)
+        if opts.skip_overflow:
+            from render_fit import FitChecker, overflowing, precheck
+            checker = FitChecker(background_image=opts.background)
+            precheck(conn, checker)
+            overflow_ids = {row[0] for row in overflowing(conn, checker.layout_key)}
+            rows = rows.fetchall()
+            kept = [r for r in rows if r[0] not in overflow_ids]
+            print(f"⚠️ Skipping {len(rows) - len(kept)} quotes that do not fit the template "
+                  f"(python render_fit.py lists them).")
+            rows = kept
+        gen = QuoteGenerator(background_image=opts.background, output_folder=opts.output, verbose=False)
+        records, skipped = pending_records(gen, rows, opts.output, opts.format)
+    finally:
+        conn.close()
+
+    print(f"{len(records)} to render, {skipped} already up to date.")
+    if not records:
+        return
+
+    t0 = time.perf_counter()
+    with profiled("render", opts.profile or None) as profiler:
+        per_worker = run(records, opts.workers, opts.background, opts.output, profile=profiler is not None)
+    wall = time.perf_counter() - t0
+
+    for pid, (images, seconds) in sorted(per_worker.items()):
+        rate = images / seconds if seconds else 0.0
+        print(f"worker {pid}: {images} images, {rate:.1f} images/sec")
+    print(f"✅ Done: {len(records)} images in {wall:.1f}s ({len(records) / wall:.1f} images/sec overall)")
+    if opts.metrics:
+        print(METRICS.report())
+        print(f"📈 Metrics written to {METRICS.write(opts.metrics)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""出图前的排版预检：不分配图像，只用缓存的字宽表计算正文断行与作者行宽度。
+
+正文从 45px 逐级缩小到 24px 仍放不进作者行上方的区域，或作者行比海报还宽时，
+这张海报就会出现文字重叠/出界。预检结果按 content_hash 存进 quotes.db：
+
+    quote_fit(content_hash, layout_key, fits, lines, font_size)
+
+layout_key 标识排版引擎版本（layout.LAYOUT_VERSION）、字体与背景文件（大小 + mtime）和模板几何，
+改了断行逻辑、换了字体或背景后旧结果会被重新计算。
+
+    python render_fit.py [--db quotes.db] [--force] [--show 10]    为新行预检并列出放不下的语录
+    python render_farm.py all --skip-overflow                       出图时跳过放不下的语录
+"""
+import argparse
+import hashlib
+import os
+import time
+from collections import namedtuple
+
+from utils import DB_PATH, get_connection
+
+CHUNK_SIZE = 10000
+
+Fit = namedtuple("Fit", "fits lines font_size")
+
+_PENDING_SQL = """
+SELECT q.id, q.content_hash, q.author, q.quote
+FROM quotes q LEFT JOIN quote_fit f ON f.content_hash = q.content_hash
+WHERE q.id > ? AND q.content_hash IS NOT NULL AND (f.layout_key IS NULL OR f.layout_key != ?)
+ORDER BY q.id LIMIT ?
+"""
+_UPSERT_SQL = "INSERT OR REPLACE INTO quote_fit (content_hash, layout_key, fits, lines, font_size) VALUES (?, ?, ?, ?, ?)"
+
+
+class FitChecker:
+    """用 QuoteGenerator 出图时相同的排版引擎判断一条语录能否放进模板。"""
+
+    def __init__(self, gen=None, background_image="quote_template_background.jpg"):
+        import generator
+        from layout import LAYOUT_VERSION
+        from render_cache import file_fingerprint
+        self.gen = gen or generator.QuoteGenerator(background_image=background_image, verbose=False,
+                                                   output_folder=".")
+        self.width = generator._get_background(self.gen.background_image).width
+        self.author_font = self.gen._load_fonts()[1]
+        engine = generator._get_layout_engine(self.gen.notosans_path)
+        geometry = (LAYOUT_VERSION, file_fingerprint(self.gen.notosans_path),
+                    file_fingerprint(self.gen.arial_bold_italic_path), file_fingerprint(self.gen.background_image),
+                    self.width, self.width - 2 * generator.QUOTE_MARGIN, generator.QUOTE_BOX_HEIGHT,
+                    engine.max_size, engine.min_size, engine.step, engine.spacing)
+        self.layout_key = hashlib.sha1(repr(geometry).encode("utf-8")).hexdigest()[:16]
+        self._author_widths = {}
+
+    def author_width(self, author):
+        # 作者名重复率很高，按作者缓存行宽
+        w = self._author_widths.get(author)
+        if w is None:
+            w = self._author_widths[author] = self.author_font.getlength(f"---{author}")
+        return w
+
+    def check(self, author, quote):
+        """返回 (Fit, Layout)。"""
+        layout = self.gen.layout_quote(quote, self.width)
+        fits = not layout.overflow and self.author_width(author) <= self.width
+        return Fit(fits, len(layout.lines), layout.font_size), layout
+
+
+def precheck(conn, checker=None, chunk_size=CHUNK_SIZE, force=False):
+    """为还没有当前 layout_key 结果的行计算并保存（按 id 分块，每块一个事务）。
+
+    返回 (检查条数, 其中放不下的条数)。force=True 时重新计算所有行。
+    """
+    checker = checker or FitChecker()
+    if force:
+        with conn:
+            conn.execute("DELETE FROM quote_fit")
+    checked = overflow = 0
+    last_id = 0
+    while True:
+        rows = conn.execute(_PENDING_SQL, (last_id, checker.layout_key, chunk_size)).fetchall()
+        if not rows:
+            return checked, overflow
+        batch = []
+        for _, h, author, quote in rows:
+            fit = checker.check(author, quote)[0]
+            overflow += not fit.fits
+            batch.append((h, checker.layout_key, int(fit.fits), fit.lines, fit.font_size))
+        with conn:
+            conn.executemany(_UPSERT_SQL, batch)
+        checked += len(rows)
+        last_id = rows[-1][0]
+
+
+def overflowing(conn, layout_key, limit=None):
+    """放不下的语录 (id, author, quote, lines, font_size)，按 id 排序。"""
+    sql = ("SELECT q.id, q.author, q.quote, f.lines, f.font_size FROM quotes q "
+           "JOIN quote_fit f ON f.content_hash = q.content_hash "
+           "WHERE f.layout_key = ? AND f.fits = 0 ORDER BY q.id")
+    if limit is not None:
+        sql += f" LIMIT {int(limit)}"
+    return conn.execute(sql, (layout_key,)).fetchall()
+
+
+def summary(conn, layout_key):
+    """{font_size: (放得下的条数, 放不下的条数)}。"""
+    result = {}
+    for size, fits, count in conn.execute(
+            "SELECT font_size, fits, COUNT(*) FROM quote_fit WHERE layout_key = ? GROUP BY font_size, fits",
+            (layout_key,)):
+        ok, bad = result.get(size, (0, 0))
+        result[size] = (ok + count, bad) if fits else (ok, bad + count)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precheck which quotes fit the poster template")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--background", default="quote_template_background.jpg")
+    parser.add_argument("--force", action="store_true", help="recompute every row")
+    parser.add_argument("--show", type=int, default=10, help="number of overflowing quotes to print")
+    opts = parser.parse_args()
+
+    if not os.path.exists(opts.background):
+        raise SystemExit(f"❌ Background image not found: {opts.background}")
+    checker = FitChecker(background_image=opts.background)
+    conn = get_connection(opts.db)
+    try:
+        start = time.perf_counter()
+        checked, overflow = precheck(conn, checker, force=opts.force)
+        elapsed = time.perf_counter() - start
+        if checked:
+            print(f"🔎 Checked {checked} quotes in {elapsed:.2f}s ({checked / elapsed:,.0f} quotes/sec), "
+                  f"{overflow} do not fit")
+        for size, (ok, bad) in sorted(summary(conn, checker.layout_key).items(), reverse=True):
+            print(f"  {size}px: {ok} fit" + (f", {bad} overflow" if bad else ""))
+        for _id, author, quote, lines, size in overflowing(conn, checker.layout_key, opts.show):
+            print(f"  ⚠️ {_id}: {lines} lines at {size}px - {author} - {quote[:60]!r}")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,59 +1,38 @@
-import requests 
-import sqlite3
-from bs4 import BeautifulSoup
-from utils import initialize_database, add_quotes
+from utils import get_connection
+from crawler import Crawler
+from frontier import CrawlFrontier
+from http_cache import HTTP_CACHE_PATH, HttpCache
+from ingest import PageIngest
+from sites import get_adapter
 
 
 DB_path = "quotes.db"
+BASE_URL = "https://quotes.toscrape.com/page/{}/"
+ADAPTER = get_adapter("quotes.toscrape.com")
 
-def quote_exists(conn, quote_text):
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM quotes WHERE quote = ?", (quote_text,))
-    return cursor.fetchone() is not None
+def parse_page(url, html):
+    # 抽取规则见 sites.py；下一页取自 li.next > a，最后一页没有该链接时自然结束
+    return ADAPTER.parse(url, html)
 
-def scrape_quotes():
-    initialize_database("quotes.db")
-    conn = sqlite3.connect("quotes.db")
+def scrape_quotes(base_url=BASE_URL, db_path=DB_path, cache_path=HTTP_CACHE_PATH):
+    conn = get_connection(db_path)
+    cache = HttpCache(cache_path) if cache_path else None
+    frontier = CrawlFrontier(conn, base_url)
+    # 每页一个事务，入库规则与计数见 ingest.py
+    ingest = PageIngest(conn, frontier)
 
-    page = 1
-    current_day = 1
+    # 翻页是链式的（第 N 页解析完才知道是否有第 N+1 页），下一页的抓取与本页入库重叠进行
+    crawler = Crawler(**ADAPTER.crawl, cache=cache, frontier=frontier)
+    crawler.crawl(base_url.format(1), parse_page, ingest)
+    ingest.report(crawler, cache)
 
-    while True:
-        url = f"https://quotes.toscrape.com/page/{page}/"
-        res = requests.get(url)
-        if res.status_code != 200:
-            print(f"Status code {res.status_code}, fetching stopped.")
-            break
-
-        soup = BeautifulSoup(res.text, "html.parser")
-        quotes = soup.find_all("div", class_="quote")
-
-        if not quotes:
-            break 
-
-        for q in quotes:
-            text = q.find("span", class_="text").text.strip()
-            author = q.find("small", class_="author").text.strip()
-
-            date = f"2025.{(current_day - 1)//30 + 1:02d}.{(current_day - 1) % 30 + 1:02d}"
-            current_day += 1
-
-            if quote_exists(conn, text):
-                print(f"Quote already exists: {text}")
-                continue
-
-            add_quotes(conn,date, author, text)
-            print(f"Quote added: {text} by {author} on {date}")
-
-        page += 1
-    
     conn.close()
+    if cache is not None:
+        cache.close()
     print("Scraping completed.")
 
 if __name__ == "__main__":
-    scrape_quotes()
-    
-
-
-            
-
+    from metrics import profiled, write_from_env
+    with profiled("scrape"):
+        scrape_quotes()
+    write_from_env()
@@ -1,8 +1,9 @@
-import requests
-from bs4 import BeautifulSoup
-import sqlite3
-from utils import initialize_database, add_quotes
-import time
+from utils import get_connection
+from crawler import Crawler
+from frontier import CrawlFrontier
+from http_cache import HTTP_CACHE_PATH, HttpCache
+from ingest import PageIngest
+from sites import get_adapter
 
 def get_next_index(conn):
     cursor = conn.cursor()
@@ -10,62 +11,39 @@ def get_next_index(conn):
     result = cursor.fetchone()[0]
     return result + 1 if result is not None else 1
 
-def quote_exists(conn, quote_text):
-    cursor = conn.cursor()
-    cursor.execute("SELECT 1 FROM quotes WHERE quote = ?", (quote_text,))
-    return cursor.fetchone() is not None
-
-def scrape_goodreads():
-    print("Initializing database...")
-    initialize_database("quotes.db")
-    conn = sqlite3.connect("quotes.db")
-    current_day = get_next_index(conn)
-
-    page = 1
-    MAX_PAGES = 100 
-
-    while page <= MAX_PAGES:
-        url = f"https://www.goodreads.com/quotes?page={page}"
-        print(f"\nFetching page {page} ...")
-        headers = {
-            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3"
-        }
-        res = requests.get(url, headers=headers)
-        if res.status_code != 200:
-            print(f"Error fetching page {page}, status: {res.status_code}")
-            break
-
-        soup = BeautifulSoup(res.text, "html.parser")
-        quote_blocks = soup.find_all("div", class_="quoteText")
+BASE_URL = "https://www.goodreads.com/quotes?page={}"
+ADAPTER = get_adapter("goodreads.com")
+MAX_PAGES = ADAPTER.crawl["max_pages"]
+HEADERS = ADAPTER.crawl["headers"]
 
-        if not quote_blocks:
-            print("No more quotes found. Stopping.")
-            break
+def parse_page(url, html):
+    # 抽取规则见 sites.py（div.quoteText + span.authorOrTitle，下一页 a.next_page）
+    quotes, next_urls = ADAPTER.parse(url, html)
+    if not quotes:
+        print("No more quotes found. Stopping.")
+        return [], []
+    return quotes, next_urls
 
-        for block in quote_blocks:
-            full_text = block.get_text(separator="\n", strip=True)
-            parts = full_text.split("―")
-            if len(parts) < 2:
-                continue
-
-            quote = parts[0].strip('“”"\n ')
-            author = parts[1].strip().split(",")[0]
-
-            date = f"2025.{(current_day - 1)//30 + 1:02d}.{(current_day - 1)%30 + 1:02d}"
-            current_day += 1
-
-            if quote_exists(conn, quote):
-                print("Already exists:", quote[:60])
-                continue
-
-            add_quotes(conn, date, author, quote)
-            print("✅ Added:", quote[:60])
+def scrape_goodreads(base_url=BASE_URL, db_path="quotes.db", cache_path=HTTP_CACHE_PATH):
+    print("Initializing database...")
+    conn = get_connection(db_path)
+    cache = HttpCache(cache_path) if cache_path else None
+    frontier = CrawlFrontier(conn, base_url)
+    # 每页一个事务，入库规则与计数见 ingest.py；日期序号接着库中最大的 id
+    ingest = PageIngest(conn, frontier, first_day=get_next_index(conn))
 
-        page += 1
-        time.sleep(1)  
+    # 每秒最多 1 个请求（替代原来的 time.sleep(1)）
+    crawler = Crawler(**ADAPTER.crawl, cache=cache, frontier=frontier)
+    crawler.crawl(base_url.format(1), parse_page, ingest)
+    ingest.report(crawler, cache)
 
     conn.close()
+    if cache is not None:
+        cache.close()
     print("\nScraping complete.")
 
 if __name__ == "__main__":
-    scrape_goodreads()
\ No newline at end of file
+    from metrics import profiled, write_from_env
+    with profiled("scrape"):
+        scrape_goodreads()
+    write_from_env()
\ No newline at end of file
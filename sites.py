@@ -0,0 +1,242 @@
+"""站点适配器注册表：按 host 选择声明式抽取规则。
+
+每个适配器只写 CSS 选择器和正则，加载时编译一次：
+装了 lxml + cssselect 时编译成 lxml 的 XPath 选择器，否则用 soupsieve（随 bs4 安装）。
+lxml 下 “tag.class” 这样的简单选择器不走 XPath，直接按标签遍历并比较 class：
+每条语录要选好几次，XPath 每次调用的固定开销比遍历一个小容器还大。
+命中适配器的页面只跑它自己的几个精确选择器，不再走 extract.py 的通用启发式；
+没有适配器的站点仍然由 extract.extract_page() 处理。
+
+    adapter = adapter_for(url)
+    quotes, next_urls = adapter.parse(url, html)   # quotes 为 [(author, text), ...]
+"""
+import importlib.util
+import re
+import warnings
+from urllib.parse import urljoin, urlparse
+
+from extract import available_backends, clean_quotes, get_backend
+
+
+def _lxml_selectors_available():
+    return all(importlib.util.find_spec(m) is not None for m in ("lxml", "cssselect"))
+
+
+# ---------- 选择器编译：lxml (XPath) / soupsieve ----------
+_TAG_CLASS = re.compile(r"^([a-zA-Z][\w-]*)?(?:\.([\w-]+))?$")
+
+
+class _TagClassSelector:
+    """lxml 下的 “tag” / “.class” / “tag.class” 选择器（与 CSSSelector 一样匹配 el 自身及其后代）。"""
+    __slots__ = ("tag", "cls")
+
+    def __init__(self, tag, cls):
+        self.tag = tag.lower() if tag else None
+        self.cls = cls
+
+    def _iter(self, el):
+        cls = self.cls
+        for node in el.iter(self.tag) if self.tag else el.iter():
+            if isinstance(node.tag, str) and (cls is None or cls in (node.get("class") or "").split()):
+                yield node
+
+    def __call__(self, el):
+        return list(self._iter(el))
+
+    def first(self, el):
+        return next(self._iter(el), None)
+
+
+class _LxmlSelectors:
+    name = "lxml"
+
+    def __init__(self):
+        from lxml.cssselect import CSSSelector
+        self._compile = CSSSelector
+
+    def compile(self, selector):
+        m = _TAG_CLASS.match(selector.strip())
+        if m and (m.group(1) or m.group(2)):
+            return _TagClassSelector(m.group(1), m.group(2))
+        return self._compile(selector)
+
+    @staticmethod
+    def select(compiled, el):
+        return compiled(el)
+
+    @staticmethod
+    def select_one(compiled, el):
+        if isinstance(compiled, _TagClassSelector):
+            return compiled.first(el)
+        found = compiled(el)
+        return found[0] if found else None
+
+
+class _SoupSelectors:
+    name = "html.parser"
+
+    def __init__(self):
+        import soupsieve
+        self._compile = soupsieve.compile
+
+    def compile(self, selector):
+        return self._compile(selector)
+
+    @staticmethod
+    def select(compiled, el):
+        return compiled.select(el)
+
+    @staticmethod
+    def select_one(compiled, el):
+        return compiled.select_one(el)
+
+
+_SELECTOR_ENGINES = {"lxml": _LxmlSelectors, "html.parser": _SoupSelectors}
+_engines = {}
+
+
+def available_engines():
+    if "lxml" in available_backends() and not _lxml_selectors_available():
+        # 只装了 lxml：适配器会退回 soupsieve + html.parser，慢一个数量级
+        warnings.warn("lxml is installed but cssselect is not; site adapters fall back to html.parser "
+                      "(pip install cssselect)", RuntimeWarning, stacklevel=2)
+    return [name for name in _SELECTOR_ENGINES if name != "lxml" or _lxml_selectors_available()]
+
+
+def _engine(name=None):
+    name = name or available_engines()[0]
+    if name not in available_engines():
+        raise ValueError(f"selector engine {name!r} is not available")
+    engine = _engines.get(name)
+    if engine is None:
+        engine = _engines[name] = _SELECTOR_ENGINES[name]()
+    return engine
+
+
+# ---------- 适配器 ----------
+class SiteAdapter:
+    """item 选出每条语录的容器；text / author 为 (选择器, 正则)：
+
+    选择器为 None 时取 item 本身的文本；正则有分组时取第 1 组，匹配失败则丢弃该条。
+    next 为“下一页”链接的选择器；crawl 是传给 Crawler 的参数（限速、请求头、页数上限等）。
+    """
+
+    def __init__(self, name, hosts, item, text, author, next=None, crawl=None):
+        self.name = name
+        self.hosts = tuple(h.lower() for h in hosts)
+        self.rules = {"item": item, "text": text, "author": author, "next": next}
+        self.crawl = dict(crawl or {})
+        self._compiled = {}
+        self.compiled()  # 加载时编译默认引擎的规则，写错的选择器/正则立即报错
+
+    def matches(self, host):
+        host = host.lower().split(":")[0]
+        return any(host == h or host.endswith("." + h) for h in self.hosts)
+
+    def compiled(self, engine=None):
+        engine = _engine(engine)
+        rules = self._compiled.get(engine.name)
+        if rules is None:
+            def field(rule):
+                selector, pattern = rule if isinstance(rule, tuple) else (rule, None)
+                return (engine.compile(selector) if selector else None,
+                        re.compile(pattern) if pattern else None)
+
+            r = self.rules
+            rules = self._compiled[engine.name] = (
+                engine,
+                engine.compile(r["item"]),
+                field(r["text"]),
+                field(r["author"]),
+                engine.compile(r["next"]) if r["next"] else None,
+            )
+        return rules
+
+    def parse(self, url, html, engine=None):
+        """返回 (quotes, next_urls)，与 Crawler 的 parse_page 接口一致。"""
+        engine, item_sel, text_rule, author_rule, next_sel = self.compiled(engine)
+        backend = get_backend(engine.name)
+        root = backend.parse(html)
+        if root is None:
+            return [], []
+
+        def value(item, rule):
+            selector, pattern = rule
+            el = engine.select_one(selector, item) if selector is not None else item
+            if el is None:
+                return None
+            text = backend.text(el)
+            if pattern is None:
+                return text
+            m = pattern.search(text)
+            if not m:
+                return None
+            return m.group(1) if m.groups() else m.group(0)
+
+        extracted = []
+        for item in engine.select(item_sel, root):
+            text, author = value(item, text_rule), value(item, author_rule)
+            if text and author:
+                extracted.append((author, text))
+
+        next_urls = []
+        if next_sel is not None:
+            link = engine.select_one(next_sel, root)
+            if link is not None and link.get("href"):
+                next_urls.append(urljoin(url, link.get("href")))
+        return clean_quotes(extracted), next_urls
+
+
+# ---------- 注册表 ----------
+ADAPTERS = []
+
+
+def register(adapter):
+    ADAPTERS.append(adapter)
+    return adapter
+
+
+def adapter_for(url):
+    """按 URL 的 host 选择适配器；没有匹配时返回 None（走通用抽取）。"""
+    host = urlparse(url).netloc
+    for adapter in ADAPTERS:
+        if adapter.matches(host):
+            return adapter
+    return None
+
+
+def get_adapter(name):
+    for adapter in ADAPTERS:
+        if adapter.name == name:
+            return adapter
+    raise KeyError(name)
+
+
+register(SiteAdapter(
+    name="quotes.toscrape.com",
+    hosts=["quotes.toscrape.com"],
+    item="div.quote",
+    text=("span.text", r'^[“"]?(.+?)[”"]?$'),
+    author="small.author",
+    next="li.next > a",
+    crawl={"concurrency": 2, "max_pages": 1000},
+))
+
+register(SiteAdapter(
+    name="goodreads.com",
+    hosts=["goodreads.com"],
+    item="div.quoteText",
+    # 贪婪匹配到署名破折号前的最后一个引号，语录中间的引号不会截断正文
+    text=(None, r'^[“"](.+)[”"]\s*[―\-–]'),
+    author=("span.authorOrTitle", r"^([^,]+)"),
+    next="a.next_page",
+    crawl={
+        "concurrency": 2,
+        "rate_per_host": 1.0,
+        "max_pages": 100,
+        "headers": {
+            "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                          "(KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.3",
+        },
+    },
+))
@@ -0,0 +1,137 @@
+"""quotes.db 与 JSONL / CSV 之间的流式导出、批量导入。
+
+    python transfer.py export quotes.jsonl
+    python transfer.py export quotes.csv --db other.db
+    python transfer.py import quotes.jsonl
+
+导出按 CHUNK_SIZE 分块读取游标，内存占用与表大小无关；
+导入与 add_quotes() 走同样的规则（长度校验 + content_hash 去重），
+但用 QuoteWriter 批量提交事务；与抓取一样跳过库中已有语录的近似重复（neardup.py），
+新语录的签名随同一事务写入。格式由扩展名决定（.jsonl / .csv），也可用 --format 指定。
+"""
+import argparse
+import csv
+import json
+import os
+import resource
+import sys
+import time
+
+from neardup import NearDupIndex
+from utils import DB_PATH, QuoteWriter, get_connection
+
+CHUNK_SIZE = 5000
+FIELDS = ("date", "author", "quote")
+
+
+def _detect_format(path, fmt=None):
+    fmt = fmt or os.path.splitext(path)[1].lstrip(".").lower()
+    if fmt not in ("jsonl", "csv"):
+        raise ValueError(f"unsupported format: {fmt!r} (use jsonl or csv)")
+    return fmt
+
+
+def iter_rows(conn, chunk_size=CHUNK_SIZE):
+    """按 id 顺序分块产出 (date, author, quote)。"""
+    cur = conn.execute("SELECT quote_date, author, quote FROM quotes ORDER BY id")
+    while True:
+        rows = cur.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield from rows
+
+
+def export_quotes(conn, path, fmt=None, chunk_size=CHUNK_SIZE):
+    """流式导出整张表，返回导出行数。"""
+    fmt = _detect_format(path, fmt)
+    count = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            writer = csv.writer(f)
+            writer.writerow(FIELDS)
+            for row in iter_rows(conn, chunk_size):
+                writer.writerow(row)
+                count += 1
+        else:
+            for row in iter_rows(conn, chunk_size):
+                f.write(json.dumps(dict(zip(FIELDS, row)), ensure_ascii=False))
+                f.write("\n")
+                count += 1
+    return count
+
+
+def read_records(path, fmt=None):
+    """逐条产出 dict；JSONL 中无法解析、不是对象或字段不是字符串的行产出 None。
+    兼容旧导出里的 quote_date 字段名。"""
+    fmt = _detect_format(path, fmt)
+    with open(path, encoding="utf-8", newline="") as f:
+        records = csv.DictReader(f) if fmt == "csv" else (_decode_line(line) for line in f if line.strip())
+        for rec in records:
+            if rec is not None and "date" not in rec and "quote_date" in rec:
+                rec["date"] = rec["quote_date"]
+            yield rec
+
+
+def _decode_line(line):
+    try:
+        rec = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(rec, dict):
+        return None
+    if any(not isinstance(rec.get(k, ""), str) for k in (*FIELDS, "quote_date")):
+        return None
+    return rec
+
+
+def import_quotes(conn, path, fmt=None, batch_size=CHUNK_SIZE):
+    """批量导入，返回 (读取行数, 新增行数, 校验失败行数, 近似重复行数)。重复内容计入读取但不新增。"""
+    seen = rejected = 0
+    with QuoteWriter(conn, batch_size=batch_size, flush_interval=float("inf"),
+                     neardup=NearDupIndex(conn)) as writer:
+        for rec in read_records(path, fmt):
+            seen += 1
+            if rec is None:
+                rejected += 1
+                continue
+            try:
+                writer.add(rec.get("date") or "", rec.get("author") or "", rec.get("quote"))
+            except ValueError:
+                rejected += 1
+    return seen, writer.inserted, rejected, writer.near_duplicates
+
+
+def peak_rss_mb():
+    # Linux 上 ru_maxrss 单位为 KB，macOS 上为字节
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream quotes.db to/from JSONL or CSV")
+    parser.add_argument("action", choices=["export", "import"])
+    parser.add_argument("path")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--format", choices=["jsonl", "csv"])
+    opts = parser.parse_args()
+
+    conn = get_connection(opts.db)
+    start = time.perf_counter()
+    try:
+        if opts.action == "export":
+            rows = export_quotes(conn, opts.path, opts.format)
+            summary = f"exported {rows} rows"
+        else:
+            rows, inserted, rejected, near = import_quotes(conn, opts.path, opts.format)
+            summary = (f"read {rows} rows, inserted {inserted}, rejected {rejected}, "
+                       f"duplicates {rows - inserted - rejected - near}, near duplicates {near}")
+    finally:
+        conn.close()
+    elapsed = time.perf_counter() - start
+
+    rate = rows / elapsed if elapsed else 0.0
+    print(f"✅ {summary} in {elapsed:.1f}s ({rate:,.0f} rows/sec, peak RSS {peak_rss_mb():.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
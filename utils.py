@@ -1,7 +1,14 @@
 import sqlite3
 import os
+import time
+import hashlib
+import random
+import re
+
+from metrics import METRICS
 
 DB_PATH = "quotes.db"
+MAX_QUOTE_LENGTH = 25
 
 
 CREATE_TABLE_QUERY = """
@@ -9,50 +16,134 @@ CREATE TABLE IF NOT EXISTS quotes (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     quote_date TEXT NOT NULL,
     author TEXT NOT NULL,
-    quote TEXT NOT NULL
+    quote TEXT NOT NULL,
+    content_hash TEXT
 );
 """
 
 
-# Triggers to enforce quote length <= 25 on INSERT/UPDATE
-CREATE_LENGTH_CHECK_TRIGGER_INSERT = """
+# Statements on the canonical schema (see migrations.py); constant SQL text lets
+# sqlite3 reuse its cached prepared statements.
+INSERT_QUOTE_SQL = "INSERT OR IGNORE INTO quotes (quote_date, author, quote, content_hash) VALUES (?, ?, ?, ?)"
+SELECT_QUOTE_BY_ID_SQL = "SELECT quote_date, author, quote FROM quotes WHERE id = ?"
+EXISTS_HASH_SQL = "SELECT 1 FROM quotes WHERE content_hash = ?"
+
+
+# Triggers to enforce quote length <= MAX_QUOTE_LENGTH on INSERT/UPDATE
+CREATE_LENGTH_CHECK_TRIGGER_INSERT = f"""
 CREATE TRIGGER IF NOT EXISTS trg_quotes_len_ins
 BEFORE INSERT ON quotes
 FOR EACH ROW
-WHEN length(NEW.quote) > 25
+WHEN length(NEW.quote) > {MAX_QUOTE_LENGTH}
 BEGIN
-SELECT RAISE(ABORT, 'quote too long (max 25)');
+SELECT RAISE(ABORT, 'quote too long (max {MAX_QUOTE_LENGTH})');
 END;
 """
 
 
-CREATE_LENGTH_CHECK_TRIGGER_UPDATE = """
+CREATE_LENGTH_CHECK_TRIGGER_UPDATE = f"""
 CREATE TRIGGER IF NOT EXISTS trg_quotes_len_upd
 BEFORE UPDATE OF quote ON quotes
 FOR EACH ROW
-WHEN length(NEW.quote) > 25
+WHEN length(NEW.quote) > {MAX_QUOTE_LENGTH}
+BEGIN
+SELECT RAISE(ABORT, 'quote too long (max {MAX_QUOTE_LENGTH})');
+END;
+"""
+
+
+# Full-text index over quote + author (external content: rows live only in quotes).
+# remove_diacritics lets "celine" match "Céline"; prefix='2 3' adds prefix indexes
+# so short prefix queries ("sta*") don't scan the whole term list.
+CREATE_FTS_TABLE = """
+CREATE VIRTUAL TABLE IF NOT EXISTS quotes_fts USING fts5(
+    quote, author,
+    content='quotes', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+);
+"""
+
+# Triggers keeping quotes_fts in sync with quotes (FTS5 external-content protocol)
+CREATE_FTS_TRIGGER_INSERT = """
+CREATE TRIGGER IF NOT EXISTS trg_quotes_fts_ins
+AFTER INSERT ON quotes
+BEGIN
+INSERT INTO quotes_fts (rowid, quote, author) VALUES (NEW.id, NEW.quote, NEW.author);
+END;
+"""
+
+CREATE_FTS_TRIGGER_DELETE = """
+CREATE TRIGGER IF NOT EXISTS trg_quotes_fts_del
+AFTER DELETE ON quotes
+BEGIN
+INSERT INTO quotes_fts (quotes_fts, rowid, quote, author) VALUES ('delete', OLD.id, OLD.quote, OLD.author);
+END;
+"""
+
+CREATE_FTS_TRIGGER_UPDATE = """
+CREATE TRIGGER IF NOT EXISTS trg_quotes_fts_upd
+AFTER UPDATE OF quote, author ON quotes
 BEGIN
-SELECT RAISE(ABORT, 'quote too long (max 25)');
+INSERT INTO quotes_fts (quotes_fts, rowid, quote, author) VALUES ('delete', OLD.id, OLD.quote, OLD.author);
+INSERT INTO quotes_fts (rowid, quote, author) VALUES (NEW.id, NEW.quote, NEW.author);
 END;
 """
 
+SEARCH_QUOTES_SQL = """
+SELECT q.id, q.quote_date, q.author, q.quote, bm25(quotes_fts) AS score
+FROM quotes_fts JOIN quotes q ON q.id = quotes_fts.rowid
+WHERE quotes_fts MATCH ?
+ORDER BY score
+LIMIT ?
+"""
+
+
+# Content hash used for de-duplication: UNIQUE index + INSERT OR IGNORE
+CREATE_CONTENT_HASH_INDEX = """
+CREATE UNIQUE INDEX IF NOT EXISTS idx_quotes_content_hash ON quotes(content_hash);
+"""
+
+# Curly/typographic quotes fold to their ASCII forms before hashing
+_QUOTE_FOLD = str.maketrans({"“": '"', "”": '"', "„": '"', "«": '"', "»": '"',
+                             "‘": "'", "’": "'", "‚": "'"})
+
+
+def normalize_text(text):
+    """Fold case, whitespace and curly quotes the same way page-level de-dup does."""
+    text = " ".join((text or "").translate(_QUOTE_FOLD).split())
+    return text.strip('"\' ').casefold()
+
+
+def content_hash(author, quote):
+    key = f"{normalize_text(author)}\x1f{normalize_text(quote)}"
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def enable_wal(conn):
+    """Switch to WAL journaling so bulk writes don't fsync the main file per commit."""
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+
+
+def connect(db_path: str = DB_PATH):
+    conn = sqlite3.connect(db_path)
+    enable_wal(conn)
+    return conn
+
 
 def initialize_database(db_path: str = DB_PATH):
-    """Create DB/table and ensure length triggers are present."""
+    """Create the DB if needed and migrate it to the canonical schema (see migrations.py)."""
+    from migrations import migrate
     conn = sqlite3.connect(db_path)
     try:
-        cur = conn.cursor()
-        cur.executescript(CREATE_TABLE_QUERY)
-        cur.executescript(CREATE_LENGTH_CHECK_TRIGGER_INSERT)
-        cur.executescript(CREATE_LENGTH_CHECK_TRIGGER_UPDATE)
-        conn.commit()
+        migrate(conn)
     finally:
         conn.close()
 
 
 def get_connection(db_path: str = DB_PATH):
     initialize_database(db_path)
-    return sqlite3.connect(db_path)
+    return connect(db_path)
 
 
 def get_all_quotes(conn):
@@ -63,19 +154,176 @@ def get_all_quotes(conn):
     return rows
 
 
-def add_quotes(conn, quote_date, author, quote):
-# Add a new quote to the database with a defensive length check.
+def sample_quotes(conn, k=5, columns="id, author, quote", rng=random):
+    """Pick up to k distinct random rows in O(k) index lookups (no ORDER BY RANDOM()).
+
+    Random ids are drawn from [MIN(id), MAX(id)] and fetched by primary key; a probe
+    that lands in a gap left by deleted rows is redrawn, and only after repeated
+    misses falls back to the next existing id. Small id ranges are sampled directly.
+    """
+    # Separate queries: SQLite only uses the O(1) rowid shortcut for a lone MIN()/MAX()
+    lo = conn.execute("SELECT MIN(id) FROM quotes").fetchone()[0]
+    hi = conn.execute("SELECT MAX(id) FROM quotes").fetchone()[0]
+    if lo is None:
+        return []
+
+    span = hi - lo + 1
+    if span <= k * 4:
+        rows = conn.execute(f"SELECT id, {columns} FROM quotes").fetchall()
+        return [r[1:] for r in rng.sample(rows, min(k, len(rows)))]
+
+    exact_sql = f"SELECT id, {columns} FROM quotes WHERE id = ?"
+    next_sql = f"SELECT id, {columns} FROM quotes WHERE id >= ? ORDER BY id LIMIT 1"
+    picked, rows = set(), []
+    misses = 0
+    while len(rows) < k and misses < k * 20:
+        probe = rng.randint(lo, hi)
+        row = conn.execute(exact_sql, (probe,)).fetchone()
+        if row is None and misses >= k * 10:
+            row = conn.execute(next_sql, (probe,)).fetchone()
+        if row is None or row[0] in picked:
+            misses += 1
+            continue
+        picked.add(row[0])
+        rows.append(row[1:])
+    return rows
+
+
+_SEARCH_TERM = re.compile(r"(author:)?(\w+)", re.IGNORECASE)
+
+
+def fts_query(text, prefix=True):
+    """Turn free text into an FTS5 MATCH expression.
+
+    Every word must match (implicit AND); words are quoted so FTS5 operators in
+    user input are taken literally. ``author:name`` restricts a word to the
+    author column. With prefix=True each word also matches longer terms
+    ("hun" finds "hungry"). Returns None when the text has no searchable words.
+    """
+    terms = []
+    for column, word in _SEARCH_TERM.findall(text or ""):
+        term = f'"{word}"' + ("*" if prefix else "")
+        terms.append(f"author : {term}" if column else term)
+    return " ".join(terms) or None
+
+
+def search_quotes(conn, text, limit=10, prefix=True):
+    """Keyword/author search over quotes_fts, best BM25 match first.
+
+    Returns rows of (id, quote_date, author, quote, score); lower score ranks higher.
+    """
+    query = fts_query(text, prefix)
+    if query is None:
+        return []
+    return conn.execute(SEARCH_QUOTES_SQL, (query, limit)).fetchall()
+
+
+def check_quote(quote):
+# Defensive length check shared by add_quotes() and QuoteWriter.
     if quote is None:
         raise ValueError("quote cannot be None")
-    if len(quote) > 25:
-        raise ValueError(f"quote too long (len={len(quote)}), max 25")
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO quotes (quote_date, author, quote) VALUES (?, ?, ?)", (quote_date, author, quote))
-    conn.commit()
+    if len(quote) > MAX_QUOTE_LENGTH:
+        raise ValueError(f"quote too long (len={len(quote)}), max {MAX_QUOTE_LENGTH}")
+
+
+def insert_quote(conn, quote_date, author, quote):
+# Insert one row and record its near-duplicate signature in the same transaction.
+# Returns False when an equivalent quote (same content_hash) already exists.
+    from neardup import index_quote
+    quote_hash = content_hash(author, quote)
+    with conn:
+        cursor = conn.execute(INSERT_QUOTE_SQL, (quote_date, author, quote, quote_hash))
+        if cursor.rowcount:
+            index_quote(conn, quote_hash, quote)
+    return cursor.rowcount > 0
+
+
+def add_quotes(conn, quote_date, author, quote):
+# Add a new quote to the database with a defensive length check.
+# Returns False when an equivalent quote (same content_hash) already exists.
+    check_quote(quote)
+    if not insert_quote(conn, quote_date, author, quote):
+        return False
     print(f"Quote added: {quote_date} - {author}: {quote}")
+    return True
+
+
+class QuoteWriter:
+    """Buffered quote inserts flushed with executemany in a single transaction.
+
+    Rows are validated like add_quotes() (unless validate=False) and written once
+    batch_size rows are pending or flush_interval seconds have passed since the
+    last flush. Duplicates (same content_hash) are dropped by INSERT OR IGNORE;
+    ``inserted`` counts rows that were actually written. Use as a context manager
+    (or call flush()) so the tail of the buffer is written.
+
+    With a neardup.NearDupIndex on the same connection, quotes that are near
+    duplicates of an indexed (or still buffered) quote are skipped too (counted in
+    ``near_duplicates``; exact repeats are left to INSERT OR IGNORE and not counted); signatures of the buffered quotes are recorded only after
+    their INSERT succeeds, in the same transaction, and discarded if it fails.
+    """
+
+    def __init__(self, conn, batch_size=1000, flush_interval=5.0, validate=True, neardup=None):
+        self.conn = conn
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.validate = validate
+        self.neardup = neardup
+        self.written = 0
+        self.inserted = 0
+        self.near_duplicates = 0
+        self._pending = []
+        self._pending_hashes = set()
+        self._last_flush = time.monotonic()
+
+    def _exists(self, quote_hash):
+        return (quote_hash in self._pending_hashes
+                or self.conn.execute(EXISTS_HASH_SQL, (quote_hash,)).fetchone() is not None)
+
+    def add(self, quote_date, author, quote):
+        if self.validate:
+            check_quote(quote)
+        quote_hash = content_hash(author, quote)
+        if self.neardup is not None:
+            with METRICS.span("dedup_query"):
+                duplicate = None if self._exists(quote_hash) else self.neardup.check(author, quote)
+            if duplicate is not None:
+                self.near_duplicates += 1
+                METRICS.inc("quotes_near_duplicate")
+                return
+        self._pending.append((quote_date, author, quote, quote_hash))
+        self._pending_hashes.add(quote_hash)
+        if (len(self._pending) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            try:
+                with METRICS.span("db_insert"), self.conn:
+                    cur = self.conn.executemany(INSERT_QUOTE_SQL, self._pending)
+                    if self.neardup is not None:
+                        self.neardup.record()
+            except Exception:
+                if self.neardup is not None:
+                    self.neardup.discard()
+                raise
+            self.written += len(self._pending)
+            self.inserted += cur.rowcount
+            METRICS.inc("quotes_written", len(self._pending))
+            METRICS.inc("quotes_inserted", cur.rowcount)
+            self._pending = []
+            self._pending_hashes.clear()
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
 
 
 def find_violations(conn):
     cur = conn.cursor()
-    cur.execute("SELECT id, quote FROM quotes WHERE length(quote) > 25")
+    cur.execute("SELECT id, quote FROM quotes WHERE length(quote) > ?", (MAX_QUOTE_LENGTH,))
     return cur.fetchall()
\ No newline at end of file
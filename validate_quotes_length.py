@@ -1,17 +1,19 @@
-import sqlite3
-from utils import get_connection, find_violations
+from utils import MAX_QUOTE_LENGTH, get_connection, find_violations
 
 
 def main():
     conn = get_connection("quotes.db")
     bad = find_violations(conn)
+    conn.close()
     if not bad:
-        print("All quotes satisfy length <= 25.")
-    return
+        print(f"All quotes satisfy length <= {MAX_QUOTE_LENGTH}.")
+        return
     print(f"{len(bad)} violating row(s):")
     for _id, q in bad:
         print(f"- id={_id}, len={len(q)}: {q!r}")
+    print("Run `python validation.py --fix --delete-long` to remove them, "
+          "or `python validation.py` for the other checks.")
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
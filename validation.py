@@ -0,0 +1,306 @@
+"""quotes 表的批量校验与修复。
+
+按 id 分块流式读取整张表，每块交给一组规则批量检查；结果写成违规报告（JSONL），
+或者加 --fix 在一个事务里应用可自动修复的项（失败时整体回滚）：
+
+    python validation.py                                   所有规则，只打印汇总
+    python validation.py --rules length,empty --report violations.jsonl
+    python validation.py --fix [--delete-long]             修复；--delete-long 删除超长语录
+
+规则是 Rule 的子类，check(rows) 接收一块 (id, quote_date, author, quote) 行，
+返回 Violation 列表；用 register() 加入 RULES 后即可在 --rules 中使用。
+"""
+import argparse
+import json
+import re
+import sqlite3
+import time
+import unicodedata
+from abc import ABC, abstractmethod
+from collections import Counter, namedtuple
+
+from utils import DB_PATH, MAX_QUOTE_LENGTH, content_hash, get_connection
+
+CHUNK_SIZE = 10000
+
+# fix 为 None（只报告）、DELETE（删除该行），或 {列名: 新值}
+DELETE = "delete"
+Violation = namedtuple("Violation", "id rule message fix")
+
+
+class Rule(ABC):
+    name = ""
+    description = ""
+
+    @abstractmethod
+    def check(self, rows):
+        """rows 为一块 (id, quote_date, author, quote)，返回 Violation 列表。"""
+
+
+# ---------- 内置规则 ----------
+class LengthRule(Rule):
+    name = "length"
+    description = f"quote longer than {MAX_QUOTE_LENGTH} characters"
+
+    def __init__(self, max_length=MAX_QUOTE_LENGTH, delete=False):
+        self.max_length = max_length
+        self.delete = delete
+
+    def check(self, rows):
+        limit, fix = self.max_length, DELETE if self.delete else None
+        return [Violation(r[0], self.name, f"quote too long (len={len(r[3])}), max {limit}", fix)
+                for r in rows if len(r[3]) > limit]
+
+
+class EmptyRule(Rule):
+    name = "empty"
+    description = "empty quote (deleted) or empty author (set to a placeholder)"
+
+    def __init__(self, placeholder="Unknown"):
+        self.placeholder = placeholder
+
+    def check(self, rows):
+        out = []
+        for _id, _, author, quote in rows:
+            if not quote or not quote.strip():
+                out.append(Violation(_id, self.name, "empty quote", DELETE))
+            elif not author or not author.strip():
+                out.append(Violation(_id, self.name, "empty author", {"author": self.placeholder}))
+        return out
+
+
+# UTF-8 被当成 cp1252/latin-1 解码后的典型乱码（â€™、Ã©、Â ）
+_MOJIBAKE = re.compile("[ÂÃ][\u0080-¿]|â€|â\u0080")
+# 控制字符（保留换行与制表符）、零宽字符、BOM
+_INVISIBLE = re.compile("[\u0000-\u0008\u000b-\u001f\u007f-\u009f​-‍⁠﻿]")
+
+
+def _repair_mojibake(text):
+    for codec in ("cp1252", "latin-1"):
+        try:
+            fixed = text.encode(codec).decode("utf-8")
+        except UnicodeError:
+            continue
+        if not _MOJIBAKE.search(fixed):
+            return fixed
+    return None
+
+
+class EncodingRule(Rule):
+    name = "encoding"
+    description = "mojibake, replacement characters, invisible characters, NBSP, untrimmed or non-NFC text"
+
+    def _clean(self, text):
+        """返回 (问题列表, 修复后的文本或 None)。"""
+        if text.isascii() and text.isprintable() and text == text.strip():
+            return [], text  # 绝大多数行走这条快速路径
+        if not text.strip():
+            return [], text  # 空白由 EmptyRule 处理
+        problems, fixed = [], text
+        if _MOJIBAKE.search(fixed):
+            repaired = _repair_mojibake(fixed)
+            problems.append("mojibake")
+            if repaired is None:
+                return problems, None
+            fixed = repaired
+        if "�" in fixed:
+            problems.append("replacement character")
+            return problems, None
+        if _INVISIBLE.search(fixed):
+            problems.append("invisible characters")
+            fixed = _INVISIBLE.sub("", fixed)
+        if " " in fixed:
+            problems.append("non-breaking space")
+            fixed = fixed.replace(" ", " ")
+        if fixed != fixed.strip():
+            problems.append("surrounding whitespace")
+            fixed = fixed.strip()
+        normalized = unicodedata.normalize("NFC", fixed)
+        if normalized != fixed:
+            problems.append("not NFC")
+            fixed = normalized
+        return problems, fixed
+
+    def check(self, rows):
+        out = []
+        for _id, _, author, quote in rows:
+            updates, problems, fixable = {}, [], True
+            for column, text in (("author", author), ("quote", quote)):
+                found, fixed = self._clean(text or "")
+                if found:
+                    problems.extend(f"{column}: {p}" for p in found)
+                    if fixed is None:
+                        fixable = False
+                    else:
+                        updates[column] = fixed
+            if problems:
+                out.append(Violation(_id, self.name, ", ".join(problems), updates if fixable else None))
+        return out
+
+
+class RenderWidthRule(Rule):
+    """与 render_fit.py 的预检相同：用出图时的排版引擎检查正文与作者行是否超出模板。"""
+    name = "render-width"
+    description = "quote does not fit the template box at the minimum font size, or author line wider than the poster"
+
+    def __init__(self, background_image="quote_template_background.jpg"):
+        self.background_image = background_image
+        self._checker = None
+
+    def check(self, rows):
+        if self._checker is None:
+            from render_fit import FitChecker
+            self._checker = FitChecker(background_image=self.background_image)
+        checker, width = self._checker, self._checker.width
+        out = []
+        for _id, _, author, quote in rows:
+            fit, layout = checker.check(author, quote)
+            if fit.fits:
+                continue
+            if layout.overflow:
+                out.append(Violation(_id, self.name, f"quote overflows ({fit.lines} lines at "
+                                                     f"{fit.font_size}px, height {layout.height})", None))
+            author_width = checker.author_width(author)
+            if author_width > width:
+                out.append(Violation(_id, self.name, f"author line {author_width:.0f}px wider than {width}px", None))
+        return out
+
+
+RULES = {}
+
+
+def register(rule_cls):
+    RULES[rule_cls.name] = rule_cls
+    return rule_cls
+
+
+for _rule in (LengthRule, EmptyRule, EncodingRule, RenderWidthRule):
+    register(_rule)
+
+
+# ---------- 扫描与修复 ----------
+ValidationResult = namedtuple("ValidationResult", "rows counts timings updated deleted failed seconds")
+
+
+def scan(conn, chunk_size=CHUNK_SIZE):
+    """按 id 分块产出 (id, quote_date, author, quote) 行列表；内存占用与表大小无关。"""
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT id, quote_date, author, quote FROM quotes WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, chunk_size)).fetchall()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1][0]
+
+
+def _apply(conn, row, fixes):
+    """返回 "updated" / "deleted" / "failed"。"""
+    _id, _, author, quote = row
+    if DELETE in fixes:
+        conn.execute("DELETE FROM quotes WHERE id = ?", (_id,))
+        return "deleted"
+    updates = {}
+    for fix in fixes:
+        updates.update(fix)
+    new_hash = content_hash(updates.get("author", author), updates.get("quote", quote))
+    # 只 SET 改动的列：只改作者时不触发 quote 列上的长度触发器
+    assignments = ", ".join(f"{column} = ?" for column in updates)
+    try:
+        old_hash = conn.execute("SELECT content_hash FROM quotes WHERE id = ?", (_id,)).fetchone()[0]
+        conn.execute(f"UPDATE quotes SET {assignments}, content_hash = ? WHERE id = ?",
+                     (*updates.values(), new_hash, _id))
+    except sqlite3.IntegrityError as e:
+        if "UNIQUE" not in str(e):
+            return "failed"  # 例如长度触发器拒绝更新
+        # 修复后与已有的一行相同：保留已有的那行
+        conn.execute("DELETE FROM quotes WHERE id = ?", (_id,))
+        return "deleted"
+    # 内容变了，旧的近似重复签名作废（neardup.py cluster 会重新建索引）
+    conn.execute("DELETE FROM quote_minhash WHERE content_hash = ?", (old_hash,))
+    return "updated"
+
+
+def validate(conn, rules, fix=False, report=None, chunk_size=CHUNK_SIZE):
+    """对整张表运行 rules。report 为可写文件对象时每条违规写一行 JSON。
+
+    fix=True 时所有修复在同一个事务里执行，出错则整体回滚。
+    """
+    start = time.perf_counter()
+    counts = Counter()
+    timings = Counter()
+    outcome = Counter()
+    total = 0
+    if fix:
+        conn.execute("BEGIN")
+    try:
+        for rows in scan(conn, chunk_size):
+            total += len(rows)
+            found = {}
+            for rule in rules:
+                t0 = time.perf_counter()
+                hits = rule.check(rows)
+                timings[rule.name] += time.perf_counter() - t0
+                for v in hits:
+                    counts[v.rule] += 1
+                    found.setdefault(v.id, []).append(v)
+                    if report is not None:
+                        report.write(json.dumps(v._asdict(), ensure_ascii=False) + "\n")
+            if fix and found:
+                by_id = {r[0]: r for r in rows}
+                for _id, violations in found.items():
+                    fixes = [v.fix for v in violations if v.fix is not None]
+                    if fixes:
+                        outcome[_apply(conn, by_id[_id], fixes)] += 1
+        if fix:
+            conn.execute("COMMIT")
+    except BaseException:
+        if fix:
+            conn.execute("ROLLBACK")
+        raise
+    return ValidationResult(total, counts, timings, outcome["updated"], outcome["deleted"], outcome["failed"],
+                            time.perf_counter() - start)
+
+
+def build_rules(names=None, delete_long=False):
+    rules = []
+    for name in names or RULES:
+        if name not in RULES:
+            raise ValueError(f"unknown rule {name!r} (available: {', '.join(RULES)})")
+        rules.append(LengthRule(delete=delete_long) if name == LengthRule.name else RULES[name]())
+    return rules
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate (and optionally repair) the quotes table")
+    parser.add_argument("--db", default=DB_PATH)
+    parser.add_argument("--rules", help=f"comma separated, default all: {','.join(RULES)}")
+    parser.add_argument("--report", help="write every violation as a JSON line to this file")
+    parser.add_argument("--fix", action="store_true", help="apply automatic fixes in one transaction")
+    parser.add_argument("--delete-long", action="store_true", help="with --fix, delete quotes over the length limit")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    opts = parser.parse_args()
+
+    rules = build_rules(opts.rules.split(",") if opts.rules else None, opts.delete_long)
+    conn = get_connection(opts.db)
+    report = open(opts.report, "w", encoding="utf-8") if opts.report else None
+    try:
+        result = validate(conn, rules, fix=opts.fix, report=report, chunk_size=opts.chunk_size)
+    finally:
+        if report is not None:
+            report.close()
+        conn.close()
+
+    print(f"Scanned {result.rows} rows in {result.seconds:.2f}s "
+          f"({result.rows / max(result.seconds, 1e-9):,.0f} rows/sec)")
+    for rule in rules:
+        print(f"  {rule.name:14s} {result.counts[rule.name]:8d}  {result.timings[rule.name]:7.2f}s  {rule.description}")
+    if opts.fix:
+        print(f"✅ Fixed: {result.updated} updated, {result.deleted} deleted, {result.failed} could not be fixed")
+    if opts.report:
+        print(f"📄 Violations written to {opts.report}")
+
+
+if __name__ == "__main__":
+    main()